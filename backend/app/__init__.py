@@ -40,6 +40,14 @@ def create_app(config_name=None):
         enable_utc=True,
     )
     
+    class ContextTask(celery.Task):
+        """Run every Celery task inside the Flask app context"""
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    celery.Task = ContextTask
+    
     # Initialize Sentry if configured
     if app.config.get('SENTRY_DSN'):
         import sentry_sdk
@@ -51,7 +59,7 @@ def create_app(config_name=None):
         )
     
     # Register blueprints
-    from app.routes import ideas, markets, bets, agents, experiments, investigations, workspaces, runs
+    from app.routes import ideas, markets, bets, agents, experiments, investigations, workspaces, runs, jobs, llm
     app.register_blueprint(ideas.bp)
     app.register_blueprint(markets.bp)
     app.register_blueprint(bets.bp)
@@ -61,6 +69,8 @@ def create_app(config_name=None):
     app.register_blueprint(workspaces.bp)
     app.register_blueprint(runs.bp)
     app.register_blueprint(runs.runs_bp)  # Standalone runs endpoints
+    app.register_blueprint(jobs.bp)
+    app.register_blueprint(llm.bp)
     
     # Health check endpoint
     @app.route('/health')
@@ -1,13 +1,18 @@
 from app.models.user import User
 from app.models.source import Source
 from app.models.idea import Idea
+from app.models.idea_keyword import IdeaKeyword
 from app.models.market import Market
+from app.models.market_neighbor import MarketNeighbor
 from app.models.bet import Bet
 from app.models.agent import Agent
 from app.models.experiment import Experiment
 from app.models.investigation import Investigation
 from app.models.workspace import Workspace
+from app.models.generated_script import GeneratedScript
 from app.models.run import Run
+from app.models.job import Job
+from app.models.llm_batch import LLMBatch
 
-__all__ = ['User', 'Source', 'Idea', 'Market', 'Bet', 'Agent', 'Experiment', 'Investigation', 'Workspace', 'Run']
+__all__ = ['User', 'Source', 'Idea', 'IdeaKeyword', 'Market', 'MarketNeighbor', 'Bet', 'Agent', 'Experiment', 'Investigation', 'Workspace', 'GeneratedScript', 'Run', 'Job', 'LLMBatch']
 
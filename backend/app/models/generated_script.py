@@ -0,0 +1,45 @@
+from datetime import datetime
+from app import db
+from app.services.embedding_codec import encode_embedding, decode_embedding
+
+class GeneratedScript(db.Model):
+    """Library entry: a generated test script, reusable for similar hypotheses (see app/services/script_library.py)"""
+    __tablename__ = 'generated_scripts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    investigation_id = db.Column(db.Integer, db.ForeignKey('investigations.id', ondelete='SET NULL'), nullable=True)
+    adapted_from_id = db.Column(db.Integer, db.ForeignKey('generated_scripts.id', ondelete='SET NULL'), nullable=True)
+    hypothesis = db.Column(db.Text, nullable=False)
+    formalized_claim = db.Column(db.Text)
+    main_py = db.Column(db.Text, nullable=False)
+    explanation = db.Column(db.Text)
+    model_used = db.Column(db.String(50))
+    embedding_blob = db.Column(db.LargeBinary, nullable=False)  # Hypothesis + formalized claim, see embedding_codec.py
+    use_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime)
+    
+    @property
+    def embedding(self):
+        return decode_embedding(self.embedding_blob)
+    
+    @embedding.setter
+    def embedding(self, value):
+        self.embedding_blob = encode_embedding(value)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'investigation_id': self.investigation_id,
+            'adapted_from_id': self.adapted_from_id,
+            'hypothesis': self.hypothesis,
+            'formalized_claim': self.formalized_claim,
+            'explanation': self.explanation,
+            'model_used': self.model_used,
+            'use_count': self.use_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
+    
+    def __repr__(self):
+        return f'<GeneratedScript {self.id}: {self.hypothesis[:50]}>'
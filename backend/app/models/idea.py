@@ -1,6 +1,22 @@
 from datetime import datetime
+from sqlalchemy.orm import validates
 from app import db
-import json
+from app.models.idea_keyword import IdeaKeyword
+from app.services.embedding_codec import encode_embedding, decode_embedding, legacy_json_to_blob
+
+def normalize_keywords(value):
+    """Normalize a keyword list or comma-separated string into unique, lowercased keywords"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    
+    normalized = []
+    for keyword in value:
+        keyword = ' '.join(str(keyword).lower().split())[:128]
+        if keyword and keyword not in normalized:
+            normalized.append(keyword)
+    return normalized
 
 class Idea(db.Model):
     __tablename__ = 'ideas'
@@ -10,13 +26,45 @@ class Idea(db.Model):
     title = db.Column(db.Text, nullable=False)
     abstract = db.Column(db.Text, nullable=False)
     keywords = db.Column(db.Text, default='')  # Store as comma-separated string for SQLite
-    embedding = db.Column(db.Text)  # Store as JSON string for SQLite
+    _embedding_json = db.Column('embedding', db.Text)  # Legacy JSON embeddings, see migrate_embeddings_to_binary.py
+    embedding_blob = db.Column(db.LargeBinary)  # Packed vector, see app/services/embedding_codec.py
     extracted_claim = db.Column(db.Text)
     confidence_score = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     markets = db.relationship('Market', backref='idea', lazy='dynamic')
+    keyword_links = db.relationship('IdeaKeyword', backref='idea', lazy=True, cascade='all, delete-orphan')
+    
+    @validates('keywords')
+    def _sync_keywords(self, key, value):
+        """Keep the comma-separated column and the idea_keywords index in step on every write"""
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(str(k).strip() for k in value if str(k).strip())
+        
+        # Reuse existing rows so re-saving the same keyword doesn't delete and re-insert it
+        existing = {link.keyword: link for link in self.keyword_links}
+        self.keyword_links = [
+            existing.get(keyword) or IdeaKeyword(keyword=keyword)
+            for keyword in normalize_keywords(value)
+        ]
+        return value or ''
+    
+    @property
+    def embedding(self):
+        """Get embedding as a float32 numpy array (None if missing)"""
+        if self.embedding_blob is not None:
+            return decode_embedding(self.embedding_blob)
+        if self._embedding_json:
+            # Row not migrated yet
+            return decode_embedding(legacy_json_to_blob(self._embedding_json, dtype='float32'))
+        return None
+    
+    @embedding.setter
+    def embedding(self, value):
+        """Set embedding from a list or numpy array"""
+        self.embedding_blob = encode_embedding(value)
+        self._embedding_json = None
     
     def to_dict(self, include_embedding=False):
         # Parse keywords from comma-separated string
@@ -32,11 +80,9 @@ class Idea(db.Model):
             'confidence_score': self.confidence_score,
             'created_at': self.created_at.isoformat()
         }
-        if include_embedding and self.embedding:
-            try:
-                data['embedding'] = json.loads(self.embedding)
-            except:
-                data['embedding'] = self.embedding
+        if include_embedding:
+            embedding = self.embedding
+            data['embedding'] = embedding.tolist() if embedding is not None else None
         return data
     
     def __repr__(self):
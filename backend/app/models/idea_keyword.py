@@ -0,0 +1,16 @@
+from app import db
+
+class IdeaKeyword(db.Model):
+    """Normalized idea <-> keyword association (inverted index over Idea.keywords)"""
+    __tablename__ = 'idea_keywords'
+    
+    idea_id = db.Column(db.Integer, db.ForeignKey('ideas.id', ondelete='CASCADE'), primary_key=True)
+    keyword = db.Column(db.String(128), primary_key=True)
+    
+    __table_args__ = (
+        # Lookups go keyword -> ideas, so lead the index with the keyword
+        db.Index('idx_idea_keywords_keyword', 'keyword', 'idea_id'),
+    )
+    
+    def __repr__(self):
+        return f'<IdeaKeyword {self.idea_id}: {self.keyword}>'
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.embedding_codec import encode_embedding, decode_embedding
 import json
 
 class Investigation(db.Model):
@@ -26,11 +27,23 @@ class Investigation(db.Model):
     confidence = db.Column(db.Float)  # 0-1
     summary = db.Column(db.Text)
     
+    # Evidence reuse (see app/services/evidence_library.py)
+    claim_embedding_blob = db.Column(db.LargeBinary)  # Formalized claim, see embedding_codec.py
+    provenance = db.Column(db.Text)  # JSON: investigation and similarity the reused steps came from
+    
     # Timestamps
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
     
+    @property
+    def claim_embedding(self):
+        return decode_embedding(self.claim_embedding_blob)
+    
+    @claim_embedding.setter
+    def claim_embedding(self, value):
+        self.claim_embedding_blob = encode_embedding(value)
+    
     def to_dict(self):
         # Parse JSON fields
         try:
@@ -48,6 +61,11 @@ class Investigation(db.Model):
         except:
             evidence = self.evidence or []
         
+        try:
+            provenance = json.loads(self.provenance) if isinstance(self.provenance, str) else self.provenance
+        except:
+            provenance = None
+        
         return {
             'id': self.id,
             'idea_id': self.idea_id,
@@ -60,6 +78,7 @@ class Investigation(db.Model):
             'conclusion': self.conclusion,
             'confidence': self.confidence,
             'summary': self.summary,
+            'provenance': provenance,
             'created_at': self.created_at.isoformat(),
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
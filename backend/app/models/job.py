@@ -0,0 +1,73 @@
+from app import db
+from datetime import datetime
+import json
+import uuid
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_type = db.Column(db.String(50), nullable=False)
+    dedupe_key = db.Column(db.String(128))  # Single-flight key, see app/tasks/single_flight.py
+    investigation_id = db.Column(db.Integer)  # Investigation the job works on, from its params
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    
+    progress = db.Column(db.Float, default=0.0)  # 0-1
+    progress_message = db.Column(db.Text)
+    
+    # Handler arguments and return value as JSON
+    _params = db.Column('params', db.Text, default='{}')
+    _result = db.Column('result', db.Text)
+    error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('idx_jobs_type_status', 'job_type', 'status'),
+        db.Index('idx_jobs_dedupe_key', 'dedupe_key', 'status'),
+        db.Index('idx_jobs_investigation', 'investigation_id', 'status'),
+    )
+    
+    @property
+    def params(self):
+        """Get params as dict"""
+        if self._params:
+            return json.loads(self._params)
+        return {}
+    
+    @params.setter
+    def params(self, value):
+        """Set params from dict"""
+        self._params = json.dumps(value)
+    
+    @property
+    def result(self):
+        """Get result as dict"""
+        if self._result:
+            return json.loads(self._result)
+        return None
+    
+    @result.setter
+    def result(self, value):
+        """Set result from dict"""
+        self._result = json.dumps(value) if value is not None else None
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'params': self.params,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.job_type} - {self.status}>'
@@ -0,0 +1,96 @@
+from app import db
+from datetime import datetime
+import json
+
+class LLMBatch(db.Model):
+    """One JSONL batch of LLM requests submitted by the bulk processor (see app/services/bulk_llm.py)"""
+    __tablename__ = 'llm_batches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # claim_extraction, investigation
+    phase = db.Column(db.String(20), nullable=False)  # claims, formalize, steps, conclusion
+    parent_id = db.Column(db.Integer, db.ForeignKey('llm_batches.id'), nullable=True)  # Previous phase of the same run
+    status = db.Column(db.String(20), nullable=False, default='prepared')  # prepared, submitted, completed, applied, failed
+    
+    backend = db.Column(db.String(20), nullable=False)  # openai, local
+    remote_id = db.Column(db.String(128))
+    input_path = db.Column(db.Text, nullable=False)
+    output_path = db.Column(db.Text)
+    request_count = db.Column(db.Integer, default=0)
+    
+    # {item id: [custom_id, ...]}, {custom_id: content} for requests answered from the LLM cache
+    # when the batch was created, and the phase's outputs (e.g. investigations created) as JSON
+    _items = db.Column('items', db.Text, default='{}')
+    _cached = db.Column('cached', db.Text, default='{}')
+    _results = db.Column('results', db.Text)
+    error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    applied_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('idx_llm_batches_kind_status', 'kind', 'status'),
+    )
+    
+    @property
+    def items(self):
+        """Get items as dict"""
+        if self._items:
+            return json.loads(self._items)
+        return {}
+    
+    @items.setter
+    def items(self, value):
+        """Set items from dict"""
+        self._items = json.dumps(value)
+    
+    @property
+    def cached(self):
+        """Get cached contents as dict"""
+        if self._cached:
+            return json.loads(self._cached)
+        return {}
+    
+    @cached.setter
+    def cached(self, value):
+        """Set cached contents from dict"""
+        self._cached = json.dumps(value)
+    
+    @property
+    def results(self):
+        """Get results as dict"""
+        if self._results:
+            return json.loads(self._results)
+        return None
+    
+    @results.setter
+    def results(self, value):
+        """Set results from dict"""
+        self._results = json.dumps(value) if value is not None else None
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'phase': self.phase,
+            'parent_id': self.parent_id,
+            'status': self.status,
+            'backend': self.backend,
+            'remote_id': self.remote_id,
+            'input_path': self.input_path,
+            'output_path': self.output_path,
+            'request_count': self.request_count,
+            'cached_count': len(self.cached),
+            'item_count': len(self.items),
+            'results': self.results,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
+    
+    def __repr__(self):
+        return f'<LLMBatch {self.id}: {self.kind}/{self.phase} - {self.status}>'
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.embedding_codec import encode_embedding, decode_embedding
 import json
 
 class Market(db.Model):
@@ -17,11 +18,22 @@ class Market(db.Model):
     resolution_outcome = db.Column(db.String(50))
     bid_price = db.Column(db.Float)  # Initial bid price from JSON (for binary Yes/No markets)
     ask_price = db.Column(db.Float)  # Initial ask price from JSON (for binary Yes/No markets)
+    embedding_blob = db.Column(db.LargeBinary)  # Question + idea embedding, see app/services/market_similarity.py
     
     # Relationships
     bets = db.relationship('Bet', backref='market', lazy='dynamic')
     experiments = db.relationship('Experiment', backref='market', lazy='dynamic')
     
+    @property
+    def embedding(self):
+        """Get embedding as a float32 numpy array (None if missing)"""
+        return decode_embedding(self.embedding_blob)
+    
+    @embedding.setter
+    def embedding(self, value):
+        """Set embedding from a list or numpy array"""
+        self.embedding_blob = encode_embedding(value)
+    
     def to_dict(self):
         # Parse JSON fields
         try:
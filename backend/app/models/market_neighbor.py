@@ -0,0 +1,16 @@
+from app import db
+
+class MarketNeighbor(db.Model):
+    """Precomputed k-nearest-neighbour edge between two markets"""
+    __tablename__ = 'market_neighbors'
+    
+    market_id = db.Column(db.Integer, db.ForeignKey('markets.id', ondelete='CASCADE'), primary_key=True)
+    neighbor_id = db.Column(db.Integer, db.ForeignKey('markets.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)  # Cosine similarity
+    
+    __table_args__ = (
+        db.Index('idx_market_neighbors_score', 'market_id', 'score'),
+    )
+    
+    def __repr__(self):
+        return f'<MarketNeighbor {self.market_id} -> {self.neighbor_id}: {self.score:.3f}>'
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Agent, Market, Bet
-from app.services.agent_bettor import AgentBettor
+from app.services.agent_bettor import AgentBettor, place_agent_bets
+from app.tasks.jobs import submit_single_flight_job
+from app.tasks.single_flight import single_flight_key
+import json
 
 bp = Blueprint('agents', __name__, url_prefix='/api/agents')
 
@@ -33,9 +36,9 @@ def create_agent():
     
     agent = Agent(
         name=data['name'],
-        type=data['type'],
-        creds=data.get('creds', {}),
-        meta=data.get('meta', {}),
+        agent_type=data['type'],
+        config=json.dumps(data.get('config', {})),
+        description=data.get('description'),
         is_active=data.get('is_active', True)
     )
     
@@ -49,7 +52,7 @@ def place_initial_bet(agent_id):
     """Agent places an initial bet on a market"""
     agent = Agent.query.get_or_404(agent_id)
     
-    if agent.type != 'bettor':
+    if agent.agent_type != 'bettor':
         return jsonify({'error': 'Agent is not a bettor'}), 400
     
     if not agent.is_active:
@@ -71,29 +74,54 @@ def place_initial_bet(agent_id):
         bettor = AgentBettor(agent, current_app.config)
         bet_recommendation = bettor.generate_bet(market)
         
-        # Validate stake against max
-        max_stake = current_app.config['AGENT_MAX_STAKE']
-        if bet_recommendation['stake'] > max_stake:
-            bet_recommendation['stake'] = max_stake
-        
-        # Place the bet
-        bet = Bet(
-            market_id=market_id,
-            agent_id=agent_id,
-            outcome=bet_recommendation['outcome'],
-            stake=bet_recommendation['stake'],
-            odds=bet_recommendation['odds'],
-            rationale=bet_recommendation['rationale']
-        )
-        
-        db.session.add(bet)
+        # Place the bet (stake capped at AGENT_MAX_STAKE and the agent's balance)
+        bets, skipped = place_agent_bets(agent_id, [(market, bet_recommendation)], current_app.config['AGENT_MAX_STAKE'])
+        if not bets:
+            db.session.rollback()
+            return jsonify({'error': skipped[0]['reason']}), 400
         db.session.commit()
         
-        return jsonify(bet.to_dict()), 201
+        return jsonify(Bet.query.get(bets[0]['id']).to_dict()), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/<int:agent_id>/sweep', methods=['POST'])
+def sweep_markets(agent_id):
+    """
+    Agent evaluates all active markets (or market_ids) and bets on them as a background job
+    Markets the agent has already bet on are skipped unless skip_existing is false;
+    packed=true evaluates several markets per LLM request.
+    """
+    agent = Agent.query.get_or_404(agent_id)
+    
+    if agent.agent_type != 'bettor':
+        return jsonify({'error': 'Agent is not a bettor'}), 400
+    
+    if not agent.is_active:
+        return jsonify({'error': 'Agent is not active'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    params = {
+        'agent_id': agent_id,
+        'market_ids': data.get('market_ids'),
+        'skip_existing': bool(data.get('skip_existing', True)),
+        'limit': data.get('limit'),
+        'packed': bool(data.get('packed', False)),
+        'refresh_cache': bool(data.get('refresh_cache', False))
+    }
+    
+    # Poll /api/jobs/<job_id> for the placed bets; a second identical sweep attaches to the first
+    dedupe_key = single_flight_key('agent_sweep', agent_id, params)
+    job, created = submit_single_flight_job('agent_sweep', dedupe_key, lambda: params)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'deduplicated': not created
+    }), 202
+
 @bp.route('/<int:agent_id>/bets', methods=['GET'])
 def get_agent_bets(agent_id):
     """Get all bets placed by an agent"""
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Idea, Source
-from app.services.claim_generator import get_claim_generator
+from app.tasks.jobs import submit_single_flight_job
+from app.tasks.single_flight import single_flight_key
+from app.services.keyword_index import get_related_ideas
+from app.services.idea_search import get_idea_search_service, idea_index, parse_search_date
 from sqlalchemy import func
 from datetime import datetime
 
@@ -43,32 +46,107 @@ def get_ideas():
         'offset': offset
     }), 200
 
+@bp.route('/search', methods=['GET', 'POST'])
+def search_ideas():
+    """Hybrid lexical + semantic search fused with reciprocal rank fusion"""
+    # POST allows passing a precomputed query embedding
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    query = data.get('q') or data.get('query', '')
+    
+    try:
+        limit = min(int(data.get('limit', 20)), 100)
+        filters = {
+            'source_id': int(data['source_id']) if data.get('source_id') is not None else None,
+            'min_confidence': float(data['min_confidence']) if data.get('min_confidence') is not None else None,
+            'max_confidence': float(data['max_confidence']) if data.get('max_confidence') is not None else None,
+            'created_after': parse_search_date(data.get('created_after')),
+            'created_before': parse_search_date(data.get('created_before'))
+        }
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid search parameter: {str(e)}'}), 400
+    
+    query_embedding = data.get('embedding') if request.method == 'POST' else None
+    if not query.strip() and not query_embedding:
+        return jsonify({'error': 'q or embedding required'}), 400
+    
+    service = get_idea_search_service(current_app.config)
+    try:
+        search = service.search(query, limit=limit, filters=filters, query_embedding=query_embedding)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ideas_by_id = {
+        idea.id: idea
+        for idea in Idea.query.filter(Idea.id.in_([r[0] for r in search['results']])).all()
+    }
+    
+    results = []
+    for idea_id, score, lexical_rank, vector_rank in search['results']:
+        idea = ideas_by_id.get(idea_id)
+        if not idea:
+            continue
+        idea_dict = idea.to_dict()
+        idea_dict['search_score'] = score
+        idea_dict['lexical_rank'] = lexical_rank
+        idea_dict['vector_rank'] = vector_rank
+        results.append(idea_dict)
+    
+    return jsonify({
+        'ideas': results,
+        'query': query,
+        'cached': search['cached']
+    }), 200
+
 @bp.route('/<int:idea_id>', methods=['GET'])
 def get_idea(idea_id):
     """Get a specific idea by ID"""
     idea = Idea.query.get_or_404(idea_id)
     return jsonify(idea.to_dict()), 200
 
+@bp.route('/<int:idea_id>/related', methods=['GET'])
+def get_idea_related(idea_id):
+    """Get ideas sharing keywords with an idea, ranked by overlap then recency"""
+    idea = Idea.query.get_or_404(idea_id)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    
+    related = []
+    for related_idea, shared_count in get_related_ideas(idea, limit=limit):
+        idea_dict = related_idea.to_dict()
+        idea_dict['shared_keywords'] = shared_count
+        related.append(idea_dict)
+    
+    return jsonify({
+        'idea_id': idea_id,
+        'related': related
+    }), 200
+
 @bp.route('/search/semantic', methods=['POST'])
 def semantic_search():
     """Semantic search using embeddings"""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     query_embedding = data.get('embedding')
     limit = data.get('limit', 10)
     
     if not query_embedding:
         return jsonify({'error': 'embedding required'}), 400
     
-    # Use pgvector for similarity search
-    # This requires the embedding to be in the correct format
-    similar_ideas = Idea.query.filter(
-        Idea.embedding.isnot(None)
-    ).order_by(
-        Idea.embedding.cosine_distance(query_embedding)
-    ).limit(limit).all()
+    try:
+        limit = max(1, int(limit))
+        ranked = idea_index.rank(query_embedding, limit)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ideas_by_id = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_([idea_id for idea_id, _ in ranked])).all()}
+    results = []
+    for idea_id, similarity in ranked:
+        if idea_id not in ideas_by_id:
+            continue
+        idea_dict = ideas_by_id[idea_id].to_dict()
+        idea_dict['similarity'] = similarity
+        results.append(idea_dict)
     
     return jsonify({
-        'ideas': [idea.to_dict() for idea in similar_ideas]
+        'ideas': results
     }), 200
 
 @bp.route('', methods=['POST'])
@@ -116,33 +194,21 @@ def generate_claims():
         db.session.add(source)
         db.session.commit()
     
-    # Generate claims
-    generator = get_claim_generator()
-    generated_claims = generator.generate_batch(count=count, categories=categories)
-    
-    # Save to database
-    ideas = []
-    for claim_data in generated_claims:
-        # Convert keywords list to comma-separated string for SQLite
-        keywords_str = ', '.join(claim_data.get('keywords', [])) if isinstance(claim_data.get('keywords'), list) else claim_data.get('keywords', '')
-        
-        idea = Idea(
-            source_id=source.id,
-            title=claim_data['title'],
-            abstract=claim_data['abstract'],
-            keywords=keywords_str,
-            extracted_claim=claim_data['claim'],
-            confidence_score=claim_data['confidence_score'],
-            created_at=datetime.utcnow()
-        )
-        db.session.add(idea)
-        ideas.append(idea)
+    params = {
+        'source_id': source.id,
+        'count': count,
+        'categories': categories,
+        'packed': bool(data.get('packed', False))
+    }
     
-    db.session.commit()
+    # Generate claims in the background; poll /api/jobs/<job_id> for the result.
+    # An identical request already in flight is shared rather than generating twice.
+    dedupe_key = single_flight_key('claim_generation', source.id, params)
+    job, created = submit_single_flight_job('claim_generation', dedupe_key, lambda: params)
     
     return jsonify({
         'success': True,
-        'generated_count': len(ideas),
-        'ideas': [idea.to_dict() for idea in ideas]
-    }), 201
-
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'deduplicated': not created
+    }), 202
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Investigation, Idea, Agent
-from app.services.investigation_service import get_investigation_service
+from app.services.bulk_investigator import BulkInvestigator
+from app.services.event_stream import sse_event, sse_comment, sse_response
+from app.tasks.jobs import find_in_flight_job, submit_single_flight_job
+from app.tasks.single_flight import single_flight_key
 from datetime import datetime
 import json
+import time
 
 bp = Blueprint('investigations', __name__, url_prefix='/api')
 
@@ -44,6 +48,37 @@ def get_investigations():
         'offset': offset
     }), 200
 
+@bp.route('/investigations/bulk', methods=['POST'])
+def start_bulk_investigation():
+    """
+    Investigate the backlog (ideas without a completed investigation, highest confidence first)
+    Continues the checkpointed run if one is unfinished; only one bulk run is active at a time.
+    """
+    data = request.get_json(silent=True) or {}
+    params = {
+        'limit': data.get('limit'),
+        'workers': data.get('workers'),
+        'rate_per_minute': data.get('rate_per_minute'),
+        'retry_failed': bool(data.get('retry_failed', False)),
+        'fresh': bool(data.get('fresh', False))
+    }
+    job, created = submit_single_flight_job('investigation_bulk', single_flight_key('investigation_bulk', 'backlog'), lambda: params)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'deduplicated': not created
+    }), 202
+
+@bp.route('/investigations/bulk/checkpoint', methods=['GET'])
+def get_bulk_investigation_checkpoint():
+    """Progress of the current or last bulk investigation run"""
+    checkpoint = BulkInvestigator(current_app.config).load_checkpoint()
+    if checkpoint is None:
+        return jsonify({'error': 'No bulk investigation run'}), 404
+    return jsonify(checkpoint), 200
+
 @bp.route('/investigations/<int:investigation_id>', methods=['GET'])
 def get_investigation(investigation_id):
     """Get a specific investigation"""
@@ -57,10 +92,91 @@ def get_investigation(investigation_id):
     
     return jsonify(inv_dict), 200
 
+@bp.route('/investigations/<int:investigation_id>/stream', methods=['GET'])
+def stream_investigation(investigation_id):
+    """
+    Server-sent events for a running investigation
+    Emits 'formalized' once the claim is formalized, a 'step' per reasoning step as it is
+    committed, then 'completed' or 'failed' with the full investigation ('timeout' if it
+    never finishes). Step event ids list the step numbers sent so far (e.g. "2,1,3"), so
+    a reconnect resumes via Last-Event-ID whatever order the steps completed in.
+    """
+    Investigation.query.get_or_404(investigation_id)
+    poll_interval = current_app.config.get('SSE_POLL_INTERVAL_SECONDS', 0.5)
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+    max_seconds = current_app.config.get('SSE_MAX_STREAM_SECONDS', 900)
+    try:
+        resumed = [int(n) for n in request.headers.get('Last-Event-ID', '').split(',') if n.strip()]
+    except ValueError:
+        resumed = []
+    
+    def events():
+        sent_formalized = bool(resumed)
+        sent_step_numbers = list(resumed)
+        started = last_sent = time.monotonic()
+        
+        while True:
+            inv_dict = Investigation.query.get(investigation_id).to_dict()
+            db.session.rollback()  # end the read so the next poll sees new commits
+            finished = inv_dict['status'] in ('completed', 'failed')
+            frames = []
+            
+            if not sent_formalized and inv_dict['formalized_claim']:
+                sent_formalized = True
+                frames.append(sse_event('formalized', {
+                    'formalized_claim': inv_dict['formalized_claim'],
+                    'test_criteria': inv_dict['test_criteria']
+                }))
+            
+            # Steps are appended in completion order while running and re-sorted at the end,
+            # so they are tracked by step number rather than position
+            steps = inv_dict['reasoning_steps'] or []
+            evidence = inv_dict['evidence'] or []
+            for index, step in enumerate(steps):
+                if step.get('step') in sent_step_numbers:
+                    continue
+                sent_step_numbers.append(step.get('step'))
+                frames.append(sse_event('step', {
+                    'reasoning_step': step,
+                    'evidence': evidence[index] if index < len(evidence) else None
+                }, event_id=','.join(str(number) for number in sent_step_numbers)))
+            
+            if finished:
+                frames.append(sse_event(inv_dict['status'], inv_dict))
+            elif time.monotonic() - started > max_seconds:
+                frames.append(sse_event('timeout', {'investigation_id': investigation_id}))
+                finished = True
+            elif not frames and time.monotonic() - last_sent > heartbeat:
+                frames.append(sse_comment())
+            
+            for frame in frames:
+                yield frame
+            if frames:
+                last_sent = time.monotonic()
+            if finished:
+                return
+            time.sleep(poll_interval)
+    
+    return sse_response(events())
+
 @bp.route('/ideas/<int:idea_id>/investigate', methods=['POST'])
 def create_investigation(idea_id):
-    """Create and run an investigation for an idea"""
+    """Create an investigation for an idea and start it as a background job"""
     idea = Idea.query.get_or_404(idea_id)
+    # refresh_cache=true re-asks the LLM instead of reusing cached responses for this claim
+    data = request.get_json(silent=True) or {}
+    refresh_cache = bool(data.get('refresh_cache', False))
+    
+    # Identical requests (double clicks, several tabs) share one job and its result
+    dedupe_key = single_flight_key('investigation', idea_id, {
+        'title': idea.title,
+        'abstract': idea.abstract,
+        'claim': idea.extracted_claim,
+        'refresh_cache': refresh_cache
+    })
+    in_flight = find_in_flight_job(dedupe_key)
+    if in_flight is not None:
+        return _investigation_job_response(in_flight, deduplicated=True)
     
     # Check if there's already a recent investigation
     existing = Investigation.query.filter_by(
@@ -83,49 +199,51 @@ def create_investigation(idea_id):
         db.session.add(agent)
         db.session.commit()
     
-    # Create investigation record
-    investigation = Investigation(
-        idea_id=idea_id,
-        agent_id=agent.id,
-        formalized_claim='',  # Will be filled by service
-        status='investigating',
-        started_at=datetime.utcnow()
-    )
-    db.session.add(investigation)
-    db.session.commit()
-    
-    # Run investigation
-    try:
-        service = get_investigation_service()
-        result = service.run_investigation(
-            idea.title,
-            idea.abstract,
-            idea.extracted_claim or idea.title
+    def create_investigation_row():
+        # Create investigation record (committed together with the job)
+        investigation = Investigation(
+            idea_id=idea_id,
+            agent_id=agent.id,
+            formalized_claim='',  # Will be filled by service
+            status='investigating',
+            started_at=datetime.utcnow()
         )
-        
-        # Update investigation with results
-        investigation.formalized_claim = result['formalized_claim']
-        investigation.test_criteria = json.dumps(result['test_criteria'])
-        investigation.reasoning_steps = json.dumps(result['reasoning_steps'])
-        investigation.evidence = json.dumps(result['evidence'])
-        investigation.conclusion = result['conclusion']
-        investigation.confidence = result['confidence']
-        investigation.summary = result['summary']
-        investigation.status = 'completed'
-        investigation.completed_at = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'investigation': investigation.to_dict()
-        }), 201
-        
-    except Exception as e:
-        investigation.status = 'failed'
-        investigation.summary = f'Investigation failed: {str(e)}'
-        db.session.commit()
-        return jsonify({'error': str(e)}), 500
+        db.session.add(investigation)
+        db.session.flush()
+        return {'investigation_id': investigation.id, 'refresh_cache': refresh_cache}
+    
+    # Run the investigation in the background; poll /api/jobs/<job_id> for the result
+    job, created = submit_single_flight_job('investigation', dedupe_key, create_investigation_row)
+    
+    return _investigation_job_response(job, deduplicated=not created)
+
+@bp.route('/investigations/<int:investigation_id>/resume', methods=['POST'])
+def resume_investigation(investigation_id):
+    """Re-run a failed or interrupted investigation, keeping its formalized claim and finished steps"""
+    investigation = Investigation.query.get_or_404(investigation_id)
+    if investigation.status == 'completed':
+        return jsonify({'error': 'Investigation already completed'}), 400
+    
+    dedupe_key = single_flight_key('investigation_resume', investigation_id)
+    
+    def mark_investigating():
+        investigation.status = 'investigating'
+        investigation.started_at = investigation.started_at or datetime.utcnow()
+        return {'investigation_id': investigation_id, 'resume': True}
+    
+    # Attach to the job already running this investigation (the original one or a resume)
+    job, created = submit_single_flight_job('investigation', dedupe_key, mark_investigating, investigation_id=investigation_id)
+    
+    return _investigation_job_response(job, deduplicated=not created)
+
+def _investigation_job_response(job, deduplicated=False):
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'investigation_id': job.params.get('investigation_id'),
+        'status_url': f'/api/jobs/{job.id}',
+        'deduplicated': deduplicated
+    }), 202
 
 @bp.route('/ideas/<int:idea_id>/investigations', methods=['GET'])
 def get_idea_investigations(idea_id):
@@ -0,0 +1,10 @@
+from flask import Blueprint, jsonify
+from app.models import Job
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+@bp.route('/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get job status, progress and (when finished) the result"""
+    job = Job.query.get_or_404(job_id)
+    return jsonify(job.to_dict()), 200
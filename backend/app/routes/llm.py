@@ -0,0 +1,69 @@
+from flask import Blueprint, Response, jsonify, current_app, request
+from app.models import LLMBatch
+from app.services.bulk_llm import PHASES
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_metrics import get_llm_metrics
+from app.services.llm_rate_limiter import get_rate_limiter
+from app.tasks.jobs import submit_single_flight_job
+from app.tasks.single_flight import single_flight_key
+
+bp = Blueprint('llm', __name__, url_prefix='/api/llm')
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """LLM response cache hit/miss counters (this process) and entry count"""
+    return jsonify(get_llm_cache(current_app.config).stats()), 200
+
+@bp.route('/limits', methods=['GET'])
+def get_limits():
+    """Per-model rate limiter state in this process (AIMD limit, in flight, waiting, 429s)"""
+    return jsonify(get_rate_limiter(current_app.config).stats()), 200
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """LLM call latency/token histograms and counters by task and stage (Prometheus text format)"""
+    return Response(get_llm_metrics(current_app.config).prometheus(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/metrics/summary', methods=['GET'])
+def get_metrics_summary():
+    """Per task/stage/model call totals and latency quantiles in this process, slowest first"""
+    return jsonify({'series': get_llm_metrics(current_app.config).summary()}), 200
+
+@bp.route('/cache', methods=['DELETE'])
+def clear_cache():
+    """Drop every cached LLM response"""
+    get_llm_cache(current_app.config).clear()
+    return jsonify({'success': True}), 200
+
+@bp.route('/bulk', methods=['POST'])
+def start_bulk():
+    """
+    Run claim_extraction or investigation over the idea backlog through LLM batches
+    Resumes unfinished batches of the kind and starts a new run over up to `limit` ideas.
+    Only one bulk job per kind runs at a time; further requests attach to it.
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    if kind not in PHASES:
+        return jsonify({'error': f"kind must be one of: {', '.join(PHASES)}"}), 400
+    
+    params = {'kind': kind, 'limit': data.get('limit'), 'wait': bool(data.get('wait', True))}
+    job, created = submit_single_flight_job('llm_bulk', single_flight_key('llm_bulk', kind), lambda: params)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'deduplicated': not created
+    }), 202
+
+@bp.route('/batches', methods=['GET'])
+def get_batches():
+    """Recent LLM batches, optionally filtered by kind and status"""
+    query = LLMBatch.query
+    if request.args.get('kind'):
+        query = query.filter_by(kind=request.args['kind'])
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    batches = query.order_by(LLMBatch.id.desc()).limit(request.args.get('limit', 100, type=int)).all()
+    return jsonify({'batches': [batch.to_dict() for batch in batches]}), 200
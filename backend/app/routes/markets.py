@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Market, Idea, Source, Bet
+from app.services.market_autocomplete import get_market_autocomplete, notify_market_created
+from app.services.market_similarity import get_market_similarity_service
+from app.tasks.similarity import schedule_add_market
 from datetime import datetime
 import json
 import os
@@ -45,6 +48,19 @@ def get_markets():
         'offset': offset
     }), 200
 
+@bp.route('/autocomplete', methods=['GET'])
+def autocomplete_markets():
+    """Type-ahead market lookup by question text and idea keywords, ranked by volume"""
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    
+    index = get_market_autocomplete(current_app.config.get('AUTOCOMPLETE_REFRESH_SECONDS', 5))
+    
+    return jsonify({
+        'query': query,
+        'suggestions': index.search(query, limit=limit)
+    }), 200
+
 @bp.route('/<int:market_id>', methods=['GET'])
 def get_market(market_id):
     """Get a specific market by ID"""
@@ -85,6 +101,8 @@ def create_market():
     
     db.session.add(market)
     db.session.commit()
+    notify_market_created()
+    schedule_add_market(market.id)
     
     return jsonify(market.to_dict()), 201
 
@@ -109,6 +127,23 @@ def update_market(market_id):
     
     return jsonify(market.to_dict()), 200
 
+@bp.route('/<int:market_id>/similar', methods=['GET'])
+def get_similar_markets(market_id):
+    """Get precomputed similar markets"""
+    Market.query.get_or_404(market_id)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    
+    similar = []
+    for market, score in get_market_similarity_service(current_app.config).get_similar(market_id, limit=limit):
+        market_dict = market.to_dict()
+        market_dict['similarity'] = score
+        similar.append(market_dict)
+    
+    return jsonify({
+        'market_id': market_id,
+        'similar': similar
+    }), 200
+
 @bp.route('/<int:market_id>/odds', methods=['GET'])
 def get_market_odds(market_id):
     """Get current odds for a market"""
@@ -141,23 +176,24 @@ def generate_market_from_keyword():
     except json.JSONDecodeError:
         return jsonify({'error': 'Invalid JSON in markets.json'}), 500
     
-    # Get existing market titles to avoid duplicates
-    existing_titles = {m.question_text for m in Market.query.all()}
-    
     # Filter markets by keyword in keywords field or market title
     matching_markets = []
     for market_data in markets_data:
-        # Skip if already exists
-        if market_data['market_title'] in existing_titles:
-            continue
-            
-        # Check if keyword matches
         keywords_str = market_data.get('keywords', '').lower()
         title_str = market_data.get('market_title', '').lower()
         
         if keyword in keywords_str or keyword in title_str:
             matching_markets.append(market_data)
     
+    # Skip markets that already exist (only the matching titles are looked up)
+    if matching_markets:
+        existing_titles = {
+            question_text for (question_text,) in db.session.query(Market.question_text).filter(
+                Market.question_text.in_([m['market_title'] for m in matching_markets])
+            )
+        }
+        matching_markets = [m for m in matching_markets if m['market_title'] not in existing_titles]
+    
     if not matching_markets:
         return jsonify({'error': f'No new markets found matching keyword: {keyword}'}), 404
     
@@ -248,6 +284,8 @@ def generate_market_from_keyword():
     db.session.add(yes_bet)
     db.session.add(no_bet)
     db.session.commit()
+    notify_market_created()
+    schedule_add_market(market.id)
     
     return jsonify({
         'success': True,
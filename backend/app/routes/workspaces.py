@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Workspace, Investigation
+from app.services.code_generator import stream_test_code, investigation_test_data
+from app.services.event_stream import sse_event, sse_response
+from app.services.llm_rate_limiter import llm_priority
 import hashlib
 from datetime import datetime
-from app.services.code_generator import generate_test_code
+from app.tasks.jobs import submit_single_flight_job
+from app.tasks.single_flight import single_flight_key
 
 bp = Blueprint('workspaces', __name__, url_prefix='/api/workspaces')
 
@@ -15,47 +19,61 @@ def create_workspace():
     # Check if AI code generation is requested
     generate_ai_code = data.get('generate_ai_code', False)
     files = data.get('files', {'main.py': '# Write your code here\n'})
-    explanation = None
+    
+    def new_workspace():
+        workspace = Workspace(
+            investigation_id=data.get('investigation_id'),
+            agent_id=data.get('agent_id'),
+            name=data.get('name', 'Untitled Workspace'),
+            description=data.get('description', ''),
+            files=files
+        )
+        db.session.add(workspace)
+        return workspace
     
     if generate_ai_code and data.get('investigation_id'):
-        # Get investigation details
-        investigation_id = data.get('investigation_id')
+        investigation_id = data['investigation_id']
         investigation = Investigation.query.get(investigation_id)
+        refresh_cache = bool(data.get('refresh_cache', False))
         
-        if investigation and investigation.idea:
-            try:
-                # Generate AI code
-                investigation_data = {
-                    'hypothesis': investigation.idea.extracted_claim or investigation.idea.title,
-                    'formalized_claim': investigation.formalized_claim or investigation.idea.extracted_claim,
-                    'context': investigation.idea.abstract or ''
-                }
-                
-                result = generate_test_code(investigation_data)
-                files = {'main.py': result['main_py']}
-                explanation = result['explanation']
-                
-            except Exception as e:
-                # If AI generation fails, use template
-                print(f"AI code generation failed: {e}")
-                explanation = f"AI generation failed: {str(e)}. Using template."
-    
-    workspace = Workspace(
-        investigation_id=data.get('investigation_id'),
-        agent_id=data.get('agent_id'),
-        name=data.get('name', 'Untitled Workspace'),
-        description=data.get('description', ''),
-        files=files
-    )
-    
-    db.session.add(workspace)
+        # Repeated identical requests attach to the generation already running; the
+        # workspace fields are part of the key so a different request gets its own workspace
+        dedupe_key = single_flight_key('workspace_code_generation', investigation_id, {
+            'formalized_claim': investigation.formalized_claim if investigation else None,
+            'idea_id': investigation.idea_id if investigation else None,
+            'refresh_cache': refresh_cache,
+            'workspace': {
+                'agent_id': data.get('agent_id'),
+                'name': data.get('name', 'Untitled Workspace'),
+                'description': data.get('description', ''),
+                'files': files
+            }
+        })
+        
+        def create_workspace_row():
+            workspace = new_workspace()
+            db.session.flush()
+            return {
+                'workspace_id': workspace.id,
+                'investigation_id': investigation_id,
+                'refresh_cache': refresh_cache
+            }
+        
+        # Generate code in the background; the job fills in main.py and returns the explanation
+        job, created = submit_single_flight_job('workspace_code_generation', dedupe_key, create_workspace_row)
+        workspace = Workspace.query.get(job.params['workspace_id'])
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}',
+            'deduplicated': not created,
+            'data': workspace.to_dict()
+        }), 202
+    
+    workspace = new_workspace()
     db.session.commit()
     
-    response_data = workspace.to_dict()
-    if explanation:
-        response_data['explanation'] = explanation
-    
-    return jsonify({'success': True, 'data': response_data}), 201
+    return jsonify({'success': True, 'data': workspace.to_dict()}), 201
 
 
 @bp.get('/<int:workspace_id>')
@@ -65,6 +83,44 @@ def get_workspace(workspace_id):
     return jsonify({'success': True, 'data': workspace.to_dict()})
 
 
+@bp.get('/<int:workspace_id>/generate/stream')
+def stream_generated_code(workspace_id):
+    """
+    Server-sent events: generate main.py for the workspace's investigation
+    Emits 'code' and then 'explanation' events with text pieces as the model produces
+    them, then 'done' with the saved workspace and explanation. Create the workspace
+    without generate_ai_code and open this stream instead of polling a job.
+    """
+    workspace = Workspace.query.get_or_404(workspace_id)
+    investigation = Investigation.query.get(workspace.investigation_id) if workspace.investigation_id else None
+    if not investigation or not investigation.idea:
+        return jsonify({'error': 'Workspace has no investigation to generate code from'}), 400
+    
+    investigation_data = investigation_test_data(investigation)
+    refresh_cache = request.args.get('refresh_cache', 'false').lower() == 'true'
+    db.session.rollback()  # don't hold a transaction open while the model streams
+    
+    def events():
+        with llm_priority('interactive'):
+            for kind, payload in stream_test_code(investigation_data, refresh_cache=refresh_cache):
+                if kind != 'result':
+                    yield sse_event(kind, {'delta': payload})
+                    continue
+                
+                workspace = Workspace.query.get(workspace_id)
+                workspace.files = {'main.py': payload['main_py']}
+                workspace.updated_at = datetime.utcnow()
+                db.session.commit()
+                
+                response_data = workspace.to_dict()
+                response_data['explanation'] = payload['explanation']
+                if payload.get('library'):
+                    response_data['library'] = payload['library']
+                yield sse_event('done', {'success': True, 'model_used': payload['model_used'], 'data': response_data})
+    
+    return sse_response(events())
+
+
 @bp.get('/<int:workspace_id>/files')
 def list_files(workspace_id):
     """List all files in workspace"""
@@ -1,61 +1,30 @@
-import openai
-from app.models import Idea, Market, Bet
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from app.models import Agent, Idea, Market, Bet
+from app.services.keyword_index import get_related_ideas
+from app.services.llm_client import get_llm_client, LLMClient, run_async
+from app.services.prompt_builder import BuiltPrompt, PromptBuilder
 from app import db
 
-class AgentBettor:
-    """LLM-based agent that places bets on markets"""
-    
-    def __init__(self, agent, config):
-        self.agent = agent
-        self.config = config
-        openai.api_key = config.get('OPENAI_API_KEY')
-    
-    def generate_bet(self, market):
-        """Generate a bet recommendation for a market"""
-        # Get the idea associated with the market
-        idea = Idea.query.get(market.idea_id)
-        
-        # Get similar historical bets (simplified for demo)
-        historical_context = self._get_historical_context(idea)
-        
-        # Build prompt for LLM
-        prompt = self._build_prompt(market, idea, historical_context)
-        
-        # Call OpenAI API
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert AI safety researcher evaluating the likelihood of research claims."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            # Parse response
-            result = self._parse_llm_response(response.choices[0].message.content, market)
-            return result
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate bet: {str(e)}")
-    
-    def _build_prompt(self, market, idea, historical_context):
-        """Build the prompt for the LLM"""
-        prompt = f"""
+SYSTEM_PROMPT = "You are an expert AI safety researcher evaluating the likelihood of research claims."
+
+BET_PROMPT = """
 You are evaluating a prediction market about an AI safety research claim.
 
-Market Question: {market.question_text}
+Market Question: {question}
 
 Idea Details:
-- Title: {idea.title}
-- Abstract: {idea.abstract}
-- Extracted Claim: {idea.extracted_claim}
+- Title: {title}
+- Abstract: {abstract}
+- Extracted Claim: {claim}
 
-Possible Outcomes: {', '.join(market.outcomes)}
+Possible Outcomes: {outcomes}
 
 Resolution Rule:
-{market.resolution_rule}
+{resolution_rule}
 
 Historical Context:
 {historical_context}
@@ -74,12 +43,235 @@ Format your response as JSON:
     "rationale": "Your reasoning here"
 }}
 """
-        return prompt
+
+# Filled per market with str.format, giving each market its own set of prompt sections
+PACKED_MARKET_SECTION = """
+=== Market ID: {market_id} ===
+Market Question: {{question_{i}}}
+Extracted Claim: {{claim_{i}}}
+Abstract: {{abstract_{i}}}
+Possible Outcomes: {{outcomes_{i}}}
+Resolution Rule: {{resolution_rule_{i}}}
+Historical Context:
+{{historical_context_{i}}}
+"""
+
+PACKED_BET_PROMPT = """
+You are evaluating {count} prediction markets about AI safety research claims.
+Evaluate each market independently.
+{sections}
+For each market provide:
+1. Your probability estimate for each of its outcomes (must sum to 1.0)
+2. Top 3 pieces of evidence supporting your estimate
+3. Recommended stake (as a percentage, max 100)
+4. Brief rationale (2-3 sentences)
+
+Format your response as JSON with one entry per market:
+{{
+    "bets": [
+        {{
+            "market_id": 123,
+            "probabilities": {{"outcome1": 0.X, "outcome2": 0.Y}},
+            "evidence": ["point 1", "point 2", "point 3"],
+            "stake_percentage": X,
+            "rationale": "Your reasoning here"
+        }}
+    ]
+}}
+"""
+
+
+def market_outcomes(market) -> List[str]:
+    """Market.outcomes is stored as a JSON string"""
+    try:
+        return json.loads(market.outcomes) if isinstance(market.outcomes, str) else list(market.outcomes)
+    except (TypeError, ValueError):
+        return [market.outcomes]
+
+
+class AgentBettor:
+    """LLM-based agent that places bets on markets"""
+    
+    def __init__(self, agent, config):
+        self.agent = agent
+        self.config = config
+    
+    def _bet_request(self, prompt: str) -> Dict:
+        """Chat-completion arguments for a bet prompt"""
+        return {
+            'model': self.config.get('AGENT_BET_MODEL', 'gpt-4o-mini'),
+            'messages': [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 500
+        }
+    
+    def generate_bet(self, market, use_cache=True, refresh_cache=False):
+        """
+        Generate a bet recommendation for a market
+        Identical prompts (same market, idea and context) are served from the LLM cache
+        unless use_cache is False or refresh_cache is set
+        """
+        # Get the idea associated with the market
+        idea = Idea.query.get(market.idea_id)
+        
+        # Get similar historical bets (simplified for demo)
+        historical_context = self._get_historical_context(idea)
+        
+        # Build prompt for LLM
+        prompt = self._build_prompt(market, idea, historical_context)
+        
+        # Call the LLM
+        try:
+            content = get_llm_client(self.config).complete(
+                'agent_bet',
+                use_cache=use_cache,
+                refresh=refresh_cache,
+                prompt_report=prompt.report,
+                **self._bet_request(prompt.text)
+            )
+            
+            # Parse response
+            result = self._parse_llm_response(content, market)
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate bet: {str(e)}")
+    
+    def generate_bets(self, markets: List[Market], packed: bool = False, progress_callback=None,
+                      use_cache: bool = True, refresh_cache: bool = False) -> List[Tuple[Market, Optional[Dict], Optional[str]]]:
+        """
+        Generate bet recommendations for many markets concurrently
+        Up to AGENT_SWEEP_CONCURRENCY requests run at once; packed=True asks for up to
+        AGENT_SWEEP_PACK_SIZE markets per request. Returns (market, recommendation, error)
+        per market in input order; a market whose LLM call failed has recommendation None.
+        """
+        if not markets:
+            return []
+        
+        # Prompts read the database, so build them before entering the event loop
+        ideas = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_({m.idea_id for m in markets})).all()}
+        contexts = {idea_id: self._get_historical_context(idea) for idea_id, idea in ideas.items()}
+        items = [(market, ideas[market.idea_id], contexts[market.idea_id]) for market in markets]
+        
+        client = get_llm_client(self.config)
+        max_concurrency = self.config.get('AGENT_SWEEP_CONCURRENCY', 5)
+        pack_size = self.config.get('AGENT_SWEEP_PACK_SIZE', 5) if packed else 1
+        cache_options = {'use_cache': use_cache, 'refresh': refresh_cache}
+        
+        return run_async(self._generate_bets_async(client, items, max_concurrency, pack_size, cache_options, progress_callback))
+    
+    async def _generate_bets_async(self, client: LLMClient, items: List[Tuple], max_concurrency: int, pack_size: int,
+                                   cache_options: Dict, progress_callback=None):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        count = len(items)
+        done = 0
+        
+        async def run_chunk(chunk: List[Tuple]):
+            nonlocal done
+            if pack_size > 1:
+                results = await self._generate_packed_async(client, semaphore, chunk, cache_options)
+            else:
+                results = [await self._generate_bet_async(client, semaphore, *chunk[0], cache_options)]
+            done += len(results)
+            if progress_callback:
+                progress_callback(0.9 * done / count, f'Evaluated {done}/{count} markets')
+            return results
+        
+        chunks = [items[i:i + pack_size] for i in range(0, count, pack_size)]
+        results = await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+        return [result for chunk_results in results for result in chunk_results]
+    
+    async def _generate_bet_async(self, client: LLMClient, semaphore: asyncio.Semaphore, market, idea,
+                                  historical_context: str, cache_options: Dict):
+        """Async generate_bet for sweeps; failures are reported instead of raised"""
+        try:
+            prompt = self._build_prompt(market, idea, historical_context)
+            async with semaphore:
+                content = await client.acomplete(
+                    'agent_bet',
+                    **cache_options,
+                    prompt_report=prompt.report,
+                    **self._bet_request(prompt.text)
+                )
+            return market, self._parse_llm_response(content, market), None
+        except Exception as e:
+            print(f"Error generating bet for market {market.id}: {e}")
+            return market, None, str(e)
+    
+    async def _generate_packed_async(self, client: LLMClient, semaphore: asyncio.Semaphore, chunk: List[Tuple],
+                                     cache_options: Dict):
+        """
+        Evaluate several markets with one request
+        Answers are matched by market_id; markets missing from the response are retried on their own
+        """
+        try:
+            prompt = self._build_packed_prompt(chunk)
+            async with semaphore:
+                content = await client.acomplete(
+                    'agent_bet_packed',
+                    **cache_options,
+                    prompt_report=prompt.report,
+                    **{**self._bet_request(prompt.text), 'max_tokens': 400 * len(chunk)}
+                )
+            start_idx = content.find('{')
+            answers = {
+                str(answer.get('market_id')): answer
+                for answer in json.loads(content[start_idx:content.rfind('}') + 1]).get('bets', [])
+                if isinstance(answer, dict)
+            }
+        except Exception as e:
+            print(f"Error generating packed bets: {e}")
+            answers = {}
+        
+        results = []
+        for market, idea, historical_context in chunk:
+            answer = answers.get(str(market.id))
+            if answer and answer.get('probabilities'):
+                results.append((market, self._parse_llm_response(json.dumps(answer), market), None))
+            else:
+                results.append(await self._generate_bet_async(client, semaphore, market, idea, historical_context, cache_options))
+        return results
+    
+    def _prompt_builder(self) -> PromptBuilder:
+        return PromptBuilder(self.config.get('LLM_PROMPT_MAX_TOKENS', 6000), model=self.config.get('AGENT_BET_MODEL'))
+    
+    def _build_prompt(self, market, idea, historical_context) -> BuiltPrompt:
+        """
+        Build the prompt for the LLM
+        The abstract is summarized and the resolution rule and historical context are
+        truncated to their budgets; the context is cut first if the prompt is still too long.
+        """
+        return (self._prompt_builder()
+                .add('question', market.question_text, budget=200)
+                .add('title', idea.title, budget=100)
+                .add('abstract', idea.abstract, budget=400, priority=1, strategy='summarize')
+                .add('claim', idea.extracted_claim, budget=200)
+                .add('outcomes', ', '.join(market_outcomes(market)))
+                .add('resolution_rule', market.resolution_rule, budget=200, priority=2)
+                .add('historical_context', historical_context, budget=150, priority=3)
+                .render(BET_PROMPT))
+    
+    def _build_packed_prompt(self, chunk: List[Tuple]) -> BuiltPrompt:
+        """Prompt evaluating several markets at once, one answer per market_id; per-market budgets are tighter"""
+        builder = self._prompt_builder().add('count', str(len(chunk)))
+        sections = []
+        for i, (market, idea, historical_context) in enumerate(chunk):
+            sections.append(PACKED_MARKET_SECTION.format(market_id=market.id, i=i))
+            (builder
+             .add(f'question_{i}', market.question_text, budget=200)
+             .add(f'claim_{i}', idea.extracted_claim, budget=200)
+             .add(f'abstract_{i}', idea.abstract, budget=200, priority=1, strategy='summarize')
+             .add(f'outcomes_{i}', ', '.join(market_outcomes(market)))
+             .add(f'resolution_rule_{i}', market.resolution_rule, budget=120, priority=2)
+             .add(f'historical_context_{i}', historical_context, budget=80, priority=3))
+        
+        return builder.render(PACKED_BET_PROMPT.replace('{sections}', "\n".join(sections)))
     
     def _parse_llm_response(self, response_text, market):
         """Parse the LLM response into a bet recommendation"""
-        import json
-        
         try:
             # Try to extract JSON from response
             start_idx = response_text.find('{')
@@ -114,11 +306,12 @@ Format your response as JSON:
                 'stake': stake,
                 'rationale': rationale
             }
-            
+        
         except Exception as e:
             # Fallback to simple bet
+            get_llm_client(self.config).metrics.record_fallback('agent_bet')
             return {
-                'outcome': market.outcomes[0],
+                'outcome': market_outcomes(market)[0],
                 'probability': 0.5,
                 'odds': 1.0,
                 'stake': self.config['AGENT_MAX_STAKE'] * 0.1,
@@ -127,19 +320,54 @@ Format your response as JSON:
     
     def _get_historical_context(self, idea):
         """Get historical context from similar ideas/markets"""
-        # Simplified for demo - in production, use embedding similarity
         context = "Limited historical data available for this type of claim."
         
-        if idea.keywords:
-            # Find similar ideas by keywords
-            similar_ideas = Idea.query.filter(
-                Idea.keywords.overlap(idea.keywords)
-            ).limit(3).all()
-            
-            if similar_ideas:
-                context = "Similar research areas:\n"
-                for similar in similar_ideas:
-                    context += f"- {similar.title}\n"
+        # Find similar ideas by shared keywords
+        similar_ideas = get_related_ideas(idea, limit=3)
+        
+        if similar_ideas:
+            context = "Similar research areas:\n"
+            for similar, shared_count in similar_ideas:
+                context += f"- {similar.title} ({shared_count} shared keywords)\n"
         
         return context
 
+
+def place_agent_bets(agent_id: int, recommendations: List[Tuple[Market, Dict]], max_stake: float) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Place an agent's bets in one bulk insert and debit its balance
+    Each stake is capped at max_stake; bets are funded highest-probability first and the
+    last one is shrunk to the remaining balance. The agent row is locked for the update.
+    The caller commits. Returns: (placed bet rows, skipped [{'market_id', 'reason'}])
+    """
+    agent = db.session.query(Agent).filter_by(id=agent_id).with_for_update().one()
+    balance = agent.balance or 0.0
+    now = datetime.utcnow()
+    rows, skipped = [], []
+    
+    for market, recommendation in sorted(recommendations, key=lambda item: -item[1]['probability']):
+        if recommendation['outcome'] not in market_outcomes(market):
+            skipped.append({'market_id': market.id, 'reason': f"Invalid outcome: {recommendation['outcome']}"})
+            continue
+        stake = min(recommendation['stake'], max_stake, balance)
+        if stake <= 0:
+            skipped.append({'market_id': market.id, 'reason': 'Insufficient balance'})
+            continue
+        balance -= stake
+        rows.append({
+            'market_id': market.id,
+            'agent_id': agent_id,
+            'outcome': recommendation['outcome'],
+            'stake': stake,
+            'odds': recommendation['odds'],
+            'rationale': recommendation['rationale'],
+            'created_at': now
+        })
+    
+    if rows:
+        result = db.session.execute(insert(Bet).returning(Bet.id, sort_by_parameter_order=True), rows)
+        for row, bet_id in zip(rows, [r.id for r in result]):
+            row['id'] = bet_id
+        agent.balance = balance
+    
+    return rows, skipped
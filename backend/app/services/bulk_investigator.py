@@ -0,0 +1,280 @@
+"""
+Bulk Investigator
+Investigates the backlog of ideas without a completed investigation, highest
+confidence_score first, by running InvestigationService on a worker pool
+(INVESTIGATION_BULK_WORKERS) paced by a token bucket (INVESTIGATION_BULK_RATE_PER_MINUTE).
+Finished investigations are inserted INVESTIGATION_BULK_WRITE_BATCH at a time.
+
+Progress is kept in a JSON checkpoint (INVESTIGATION_BULK_CHECKPOINT, by default in the
+instance folder): the ordered selection, the ideas written or failed so far and running
+totals. It is rewritten atomically after every write batch and whenever a run stops, so an
+interrupted run loses at most the investigations still in flight (cheap to redo through
+the LLM cache), and the next run continues the same selection. Unlike bulk_llm.py this makes regular interactive-style calls, at
+batch priority.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from flask import current_app
+from sqlalchemy import exists, insert
+from app import db
+from app.models import Agent, Idea, Investigation
+from app.services.embedding_codec import encode_embedding
+from app.services.investigation_service import InvestigationService
+from app.services.llm_metrics import record_llm_calls, summarize_llm_calls
+from app.services.llm_rate_limiter import TokenBucket, llm_priority
+
+CHECKPOINT_NAME = 'bulk_investigation_checkpoint.json'
+
+
+def active_investigation(config):
+    """EXISTS clause for ideas with a completed investigation or one started within SINGLE_FLIGHT_STALE_SECONDS"""
+    stale_before = datetime.utcnow() - timedelta(seconds=config.get('SINGLE_FLIGHT_STALE_SECONDS', 1800))
+    return exists().where(
+        Investigation.idea_id == Idea.id,
+        (Investigation.status == 'completed') |
+        ((Investigation.status == 'investigating') & (Investigation.started_at >= stale_before))
+    )
+
+
+def select_backlog(config, limit: int, exclude: Iterable[int] = ()) -> List[int]:
+    """
+    Ideas without a completed (or recently started) investigation, highest confidence first
+    The one selection used by bulk investigation runs and the investigation kind of bulk LLM batches.
+    """
+    query = db.session.query(Idea.id).filter(~active_investigation(config))
+    exclude = list(exclude)
+    if exclude:
+        query = query.filter(~Idea.id.in_(exclude))
+    rows = query.order_by(Idea.confidence_score.desc().nulls_last(), Idea.id).limit(limit).all()
+    return [idea_id for idea_id, in rows]
+
+
+class BulkInvestigator:
+    """Checkpointed bulk runs of InvestigationService over the idea backlog"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.checkpoint_path = (config.get('INVESTIGATION_BULK_CHECKPOINT') or
+                                os.path.join(current_app.instance_path, CHECKPOINT_NAME))
+    
+    # Checkpoint
+    
+    def load_checkpoint(self) -> Optional[Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError as e:
+            print(f"Ignoring unreadable bulk investigation checkpoint: {e}")
+            return None
+    
+    def _save_checkpoint(self, checkpoint: Dict):
+        checkpoint['updated_at'] = datetime.utcnow().isoformat()
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    # Run
+    
+    def run(self, limit: Optional[int] = None, workers: Optional[int] = None, rate_per_minute: Optional[float] = None,
+            retry_failed: bool = False, fresh: bool = False, progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        Continue the checkpointed run, or start one over up to `limit` ideas
+        fresh=True discards an unfinished checkpoint; retry_failed=True gives its failed ideas
+        another attempt. Returns the checkpoint's totals plus this invocation's throughput.
+        """
+        workers = workers or self.config.get('INVESTIGATION_BULK_WORKERS', 4)
+        rate_per_minute = rate_per_minute or self.config.get('INVESTIGATION_BULK_RATE_PER_MINUTE', 30)
+        write_batch = self.config.get('INVESTIGATION_BULK_WRITE_BATCH', 20)
+        
+        checkpoint = None if fresh else self.load_checkpoint()
+        if checkpoint is None or checkpoint.get('finished'):
+            checkpoint = {
+                'started_at': datetime.utcnow().isoformat(),
+                'idea_ids': select_backlog(self.config, limit or self.config.get('INVESTIGATION_BULK_MAX_IDEAS', 1000)),
+                'done': [],
+                'failed': {},
+                'skipped': [],
+                'totals': {'completed': 0, 'failed': 0, 'skipped': 0, 'llm_calls': 0, 'cost_usd': 0.0},
+                'finished': False
+            }
+        if retry_failed:
+            checkpoint['failed'] = {}
+            checkpoint['totals']['failed'] = 0
+        
+        settled = set(checkpoint['done']) | set(checkpoint['skipped']) | {int(i) for i in checkpoint['failed']}
+        pending = [idea_id for idea_id in checkpoint['idea_ids'] if idea_id not in settled]
+        self._save_checkpoint(checkpoint)
+        
+        agent = Agent.query.filter_by(agent_type='researcher').first()
+        run_stats = {'completed': 0, 'failed': 0, 'skipped': 0, 'interrupted': False}
+        started = time.monotonic()
+        buffer: List[Dict] = []
+        
+        def flush():
+            # Taken off the buffer first so an interrupted write is never written twice
+            outcomes = buffer[:]
+            buffer.clear()
+            self._write(outcomes, checkpoint, agent.id if agent else None, run_stats)
+            self._save_checkpoint(checkpoint)
+            if progress_callback:
+                settled_count = len(checkpoint['done']) + len(checkpoint['skipped']) + len(checkpoint['failed'])
+                progress_callback(
+                    settled_count / max(1, len(checkpoint['idea_ids'])),
+                    f"{settled_count}/{len(checkpoint['idea_ids'])} ideas, "
+                    f"{self._per_minute(run_stats, started):.1f} investigations/min, {checkpoint['totals']['failed']} failed"
+                )
+        
+        app = current_app._get_current_object()
+        bucket = TokenBucket(rate_per_minute)
+        bucket_lock = threading.Lock()
+        
+        def paced_investigate(idea_id: int) -> Dict:
+            with bucket_lock:
+                delay = bucket.wait_time(1)
+                bucket.take(1)
+            if delay:
+                time.sleep(delay)
+            return self._investigate(app, idea_id)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-investigation')
+        try:
+            queue = iter(pending)
+            running = set()
+            while True:
+                # Keep at most `workers` submitted so the pacing applies to actual starts
+                while len(running) < workers:
+                    idea_id = next(queue, None)
+                    if idea_id is None:
+                        break
+                    running.add(executor.submit(paced_investigate, idea_id))
+                if not running:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    buffer.append(future.result())
+                if len(buffer) >= write_batch:
+                    flush()
+            checkpoint['finished'] = True
+        except KeyboardInterrupt:
+            # Ctrl-C from the command line: return the stats of what was written
+            run_stats['interrupted'] = True
+        finally:
+            # Write what finished on every exit, including errors in a job thread; in-flight
+            # investigations are redone by the next run
+            executor.shutdown(wait=False, cancel_futures=True)
+            flush()
+        
+        elapsed = time.monotonic() - started
+        return {
+            'selected': len(checkpoint['idea_ids']),
+            'remaining': len(checkpoint['idea_ids']) - len(checkpoint['done']) - len(checkpoint['skipped']) - len(checkpoint['failed']),
+            'finished': checkpoint['finished'],
+            'totals': checkpoint['totals'],
+            'failures': checkpoint['failed'],
+            'run': {
+                **run_stats,
+                'workers': workers,
+                'rate_per_minute': rate_per_minute,
+                'elapsed_seconds': round(elapsed, 1),
+                'investigations_per_minute': round(self._per_minute(run_stats, started), 2)
+            }
+        }
+    
+    @staticmethod
+    def _per_minute(run_stats: Dict, started: float) -> float:
+        elapsed = time.monotonic() - started
+        return run_stats['completed'] * 60.0 / elapsed if elapsed > 0 else 0.0
+    
+    def _investigate(self, app, idea_id: int) -> Dict:
+        """Run one investigation on a worker thread; errors are returned, not raised"""
+        started_at = datetime.utcnow()
+        with app.app_context(), llm_priority('batch'), record_llm_calls() as calls:
+            try:
+                idea = db.session.get(Idea, idea_id)
+                result = InvestigationService().run_investigation(
+                    idea.title,
+                    idea.abstract,
+                    idea.extracted_claim or idea.title
+                )
+                error = None
+            except Exception as e:
+                print(f"Bulk investigation of idea {idea_id} failed: {e}")
+                result, error = None, str(e)
+        return {
+            'idea_id': idea_id,
+            'result': result,
+            'error': error,
+            'started_at': started_at,
+            'completed_at': datetime.utcnow(),
+            'llm': summarize_llm_calls(calls)
+        }
+    
+    def _write(self, outcomes: List[Dict], checkpoint: Dict, agent_id: Optional[int], run_stats: Dict):
+        """Insert the finished investigations of a write batch in one statement and update the checkpoint"""
+        if not outcomes:
+            return
+        totals = checkpoint['totals']
+        for outcome in outcomes:
+            if outcome['llm']:
+                totals['llm_calls'] += outcome['llm']['calls']
+                totals['cost_usd'] = round(totals['cost_usd'] + outcome['llm']['cost_usd'], 6)
+        
+        succeeded = [outcome for outcome in outcomes if outcome['error'] is None]
+        # Investigated interactively while this batch was running
+        already_done = {
+            idea_id for idea_id, in db.session.query(Investigation.idea_id).filter(
+                Investigation.idea_id.in_([outcome['idea_id'] for outcome in succeeded]),
+                Investigation.status == 'completed'
+            )
+        } if succeeded else set()
+        
+        rows = []
+        for outcome in succeeded:
+            if outcome['idea_id'] in already_done:
+                checkpoint['skipped'].append(outcome['idea_id'])
+                continue
+            result = outcome['result']
+            rows.append({
+                'idea_id': outcome['idea_id'],
+                'agent_id': agent_id,
+                'formalized_claim': result['formalized_claim'],
+                'test_criteria': json.dumps(result['test_criteria']),
+                'status': 'completed',
+                'reasoning_steps': json.dumps(result['reasoning_steps']),
+                'evidence': json.dumps(result['evidence']),
+                'conclusion': result['conclusion'],
+                'confidence': result['confidence'],
+                'summary': result['summary'],
+                'claim_embedding_blob': encode_embedding(result['claim_embedding']),
+                'provenance': json.dumps(result['provenance']) if result['provenance'] else None,
+                'created_at': outcome['started_at'],
+                'started_at': outcome['started_at'],
+                'completed_at': outcome['completed_at']
+            })
+        if rows:
+            db.session.execute(insert(Investigation), rows)
+            db.session.commit()
+        
+        checkpoint['done'].extend(row['idea_id'] for row in rows)
+        for outcome in outcomes:
+            if outcome['error'] is not None:
+                checkpoint['failed'][str(outcome['idea_id'])] = outcome['error']
+        
+        skipped = len(succeeded) - len(rows)
+        failed = len(outcomes) - len(succeeded)
+        totals['completed'] += len(rows)
+        totals['skipped'] += skipped
+        totals['failed'] = len(checkpoint['failed'])
+        run_stats['completed'] += len(rows)
+        run_stats['skipped'] += skipped
+        run_stats['failed'] += failed
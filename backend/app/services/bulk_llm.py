@@ -0,0 +1,432 @@
+"""
+Bulk LLM Processing
+Runs claim extraction or investigation over a whole backlog of ideas through JSONL
+batches (see llm_batch.py) instead of interactive per-request calls. Runs go through
+phases, one batch each:
+    claim_extraction    claims                           (ideas without an extracted claim)
+    investigation       formalize -> steps -> conclusion (the bulk investigation backlog;
+                        one steps batch per level of the investigation pipeline DAG)
+
+Batches are LLMBatch rows committed at every state change (prepared -> submitted ->
+completed -> applied), so an interrupted run resumes where it stopped: prepared files
+are submitted, submitted ones polled, completed ones applied, and an applied phase gets
+its next phase. Ideas in unfinished batches are never selected again, identical requests
+are sent once, and requests already in the LLM cache are not sent at all (their responses
+are stored with the batch).
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import exists, insert, update
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Idea, Investigation, LLMBatch
+from app.services.bulk_investigator import active_investigation, select_backlog
+from app.services.embedding_codec import encode_embedding
+from app.services.evidence_library import EvidenceLibrary
+from app.services.idea_extractor import IdeaExtractor
+from app.services.investigation_pipeline import PipelineStep, step_input_hash
+from app.services.investigation_service import FALLBACK_CONCLUSION, InvestigationService
+from app.services.llm_batch import batch_custom_id, get_batch_backend, read_batch_output, write_batch_file
+from app.services.llm_cache import get_llm_cache
+
+PHASES = {
+    'claim_extraction': ['claims'],
+    'investigation': ['formalize', 'steps', 'conclusion'],
+}
+
+UNFINISHED = ('prepared', 'submitted', 'completed')
+
+# Requests per item: [(custom_id, request), ...]
+ItemRequests = Dict[int, List[Tuple[str, Dict]]]
+
+
+class BulkProcessor:
+    """Create, submit, poll and apply LLM batches for one kind of bulk work"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.backend = get_batch_backend(config)
+        self.cache = get_llm_cache(config)
+        self.extractor = IdeaExtractor(config)
+        self.investigations = InvestigationService()
+        self.batch_dir = config.get('LLM_BATCH_DIR', 'llm_batches')
+    
+    def run(self, kind: str, limit: Optional[int] = None, wait: bool = True,
+            progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        Resume the unfinished batches of a kind and start a run over up to `limit` new ideas
+        With wait=True, polls every LLM_BATCH_POLL_SECONDS until all batches are applied or
+        LLM_BATCH_MAX_WAIT_SECONDS has passed; anything still pending is picked up by the next run.
+        """
+        if kind not in PHASES:
+            raise ValueError(f"Unknown bulk kind: {kind}")
+        limit = limit or self.config.get('LLM_BATCH_MAX_ITEMS', 1000)
+        poll_seconds = self.config.get('LLM_BATCH_POLL_SECONDS', 5)
+        deadline = time.monotonic() + self.config.get('LLM_BATCH_MAX_WAIT_SECONDS', 3600)
+        
+        stats = {'kind': kind, 'selected': 0, 'applied': 0, 'fallbacks': 0, 'sent_requests': 0, 'skipped_requests': 0, 'batch_ids': []}
+        self._advance(kind, stats)
+        self._start(kind, limit, stats)
+        while True:
+            pending = self._advance(kind, stats)
+            if not pending or not wait or time.monotonic() > deadline:
+                break
+            if progress_callback:
+                progress_callback(0.5, f"Waiting for {len(pending)} batch(es): " +
+                                  ', '.join(f"{b.phase} #{b.id}" for b in pending))
+            time.sleep(poll_seconds)
+        
+        batches = LLMBatch.query.filter(LLMBatch.id.in_(stats.pop('batch_ids'))).order_by(LLMBatch.id).all()
+        stats['pending'] = len(pending)
+        stats['batches'] = [batch.to_dict() for batch in batches]
+        return stats
+    
+    # Batch lifecycle
+    
+    def _advance(self, kind: str, stats: Dict) -> List[LLMBatch]:
+        """Move every unfinished batch of the kind as far as it can go; returns those still unfinished"""
+        self._create_missing_phases(kind, stats)
+        for batch in LLMBatch.query.filter(LLMBatch.kind == kind, LLMBatch.status.in_(UNFINISHED)).order_by(LLMBatch.id).all():
+            if batch.id not in stats['batch_ids']:
+                stats['batch_ids'].append(batch.id)
+            try:
+                if batch.status == 'prepared':
+                    self._submit(batch)
+                if batch.status == 'submitted':
+                    self._poll(batch)
+                if batch.status == 'completed':
+                    self._apply(batch, stats)
+                    self._create_next_phase(batch, stats)
+            except Exception as e:
+                db.session.rollback()
+                print(f"LLM batch {batch.id} ({batch.kind}/{batch.phase}) error: {e}")
+                batch.error = str(e)
+                db.session.commit()
+        # Includes the next-phase batches created above
+        return LLMBatch.query.filter(LLMBatch.kind == kind, LLMBatch.status.in_(UNFINISHED)).order_by(LLMBatch.id).all()
+    
+    def _submit(self, batch: LLMBatch):
+        batch.remote_id = self.backend.submit(batch.input_path)
+        batch.status = 'submitted'
+        batch.submitted_at = datetime.utcnow()
+        db.session.commit()
+    
+    def _poll(self, batch: LLMBatch):
+        status = self.backend.status(batch.remote_id)
+        if status == 'completed':
+            batch.output_path = os.path.splitext(batch.input_path)[0] + '.output.jsonl'
+            self.backend.download(batch.remote_id, batch.output_path)
+            batch.status = 'completed'
+            batch.completed_at = datetime.utcnow()
+            db.session.commit()
+        elif status == 'failed':
+            # First-phase ideas become selectable again; later phases are recreated from their parent
+            batch.status = 'failed'
+            batch.error = batch.error or 'Batch failed at the backend'
+            db.session.commit()
+    
+    def _create_batch(self, kind: str, phase: str, item_requests: ItemRequests, stats: Dict,
+                      parent: Optional[LLMBatch] = None) -> Optional[LLMBatch]:
+        """
+        Write the batch file and record it as prepared
+        Identical requests share one line; requests already in the LLM cache are left out of
+        the file and their responses stored with the batch, so applying it does not depend on
+        the cache entry surviving until then.
+        """
+        if not item_requests:
+            return None
+        lines, cached = {}, {}
+        for requests in item_requests.values():
+            for custom_id, request in requests:
+                if custom_id in lines or custom_id in cached:
+                    continue
+                content = self.cache.get(custom_id.split(':', 1)[1])
+                if content is None:
+                    lines[custom_id] = request
+                else:
+                    cached[custom_id] = content
+        stats['skipped_requests'] += sum(len(r) for r in item_requests.values()) - len(lines)
+        
+        batch = LLMBatch(
+            kind=kind,
+            phase=phase,
+            parent_id=parent.id if parent is not None else None,
+            backend=self.backend.name,
+            input_path='',
+            items={str(item_id): [custom_id for custom_id, _ in requests] for item_id, requests in item_requests.items()},
+            cached=cached
+        )
+        db.session.add(batch)
+        db.session.flush()
+        
+        batch.input_path = os.path.abspath(os.path.join(
+            self.batch_dir, f"{kind}-{phase}-{batch.id}-{datetime.utcnow():%Y%m%d%H%M%S}.jsonl"
+        ))
+        batch.request_count = write_batch_file(batch.input_path, lines.items())
+        stats['sent_requests'] += batch.request_count
+        if not batch.request_count:
+            # Everything was cached: nothing to send
+            batch.status = 'completed'
+            batch.completed_at = datetime.utcnow()
+        db.session.commit()
+        stats['batch_ids'].append(batch.id)
+        return batch
+    
+    def _results(self, batch: LLMBatch) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """{custom_id: (content, error)} from the output file and the responses cached at creation"""
+        results = read_batch_output(batch.output_path)
+        for custom_id, (content, _) in results.items():
+            if content is not None:
+                self.cache.set(custom_id.split(':', 1)[1], content)
+        for custom_id, content in batch.cached.items():
+            results[custom_id] = (content, None)
+        return results
+    
+    def _apply(self, batch: LLMBatch, stats: Dict):
+        results = self._results(batch)
+        contents = {
+            int(item_id): [results.get(custom_id, (None, 'Missing from batch output'))[0] for custom_id in custom_ids]
+            for item_id, custom_ids in batch.items.items()
+        }
+        getattr(self, f'_apply_{batch.phase}')(batch, contents, stats)
+        batch.status = 'applied'
+        batch.applied_at = datetime.utcnow()
+        db.session.commit()
+    
+    def _create_next_phase(self, batch: LLMBatch, stats: Dict):
+        phases = PHASES[batch.kind]
+        index = phases.index(batch.phase)
+        if batch.phase == 'steps' and self._steps_level(batch) + 1 < len(self.investigations.pipeline.levels()):
+            # One steps batch per pipeline DAG level
+            self._create_batch(batch.kind, 'steps', self._requests_steps(batch), stats, parent=batch)
+        elif index + 1 < len(phases):
+            next_phase = phases[index + 1]
+            self._create_batch(batch.kind, next_phase, getattr(self, f'_requests_{next_phase}')(batch), stats, parent=batch)
+    
+    def _create_missing_phases(self, kind: str, stats: Dict):
+        """
+        Applied phases without a live next phase: the run was interrupted between the two
+        commits, or the next phase's batch failed at the backend and is retried
+        """
+        phases = PHASES[kind]
+        if len(phases) == 1:
+            return
+        child = aliased(LLMBatch)
+        orphans = LLMBatch.query.filter(
+            LLMBatch.kind == kind,
+            LLMBatch.status == 'applied',
+            LLMBatch.phase != phases[-1],
+            ~exists().where(child.parent_id == LLMBatch.id, child.status != 'failed')
+        ).all()
+        for batch in orphans:
+            self._create_next_phase(batch, stats)
+    
+    # Selection of new work
+    
+    def _in_flight_ids(self, kind: str) -> set:
+        """Ideas in unfinished batches of the kind (later investigation phases are keyed by investigation)"""
+        ids, investigation_ids = set(), set()
+        for batch in LLMBatch.query.filter(LLMBatch.kind == kind, LLMBatch.status.in_(UNFINISHED)):
+            (ids if batch.phase == PHASES[kind][0] else investigation_ids).update(int(item_id) for item_id in batch.items)
+        if investigation_ids:
+            ids.update(idea_id for idea_id, in db.session.query(Investigation.idea_id).filter(Investigation.id.in_(investigation_ids)))
+        return ids
+    
+    def _start(self, kind: str, limit: int, stats: Dict):
+        phase = PHASES[kind][0]
+        in_flight = self._in_flight_ids(kind)
+        if kind == 'claim_extraction':
+            query = Idea.query.filter((Idea.extracted_claim.is_(None)) | (Idea.extracted_claim == '')).order_by(Idea.created_at)
+            if in_flight:
+                query = query.filter(~Idea.id.in_(in_flight))
+            ideas = self._apply_local_claims(query.limit(limit).all(), stats)
+            stats['selected'] = stats['local_claims'] + len(ideas)
+        else:
+            # Same backlog and order as bulk investigation runs (bulk_investigator.py)
+            idea_ids = select_backlog(self.config, limit, exclude=in_flight)
+            ideas = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_(idea_ids)).all()} if idea_ids else {}
+            ideas = [ideas[idea_id] for idea_id in idea_ids if idea_id in ideas]
+            stats['selected'] = len(ideas)
+        self._create_batch(kind, phase, getattr(self, f'_requests_{phase}')(ideas), stats)
+    
+    def _apply_local_claims(self, ideas: List[Idea], stats: Dict) -> List[Idea]:
+        """Write the claims the claim classifier is confident about; returns the ideas left for the LLM"""
+        rows, remaining = [], []
+        for idea, local_claim in zip(ideas, self.extractor.local_claims([idea.abstract for idea in ideas])):
+            if local_claim is None:
+                remaining.append(idea)
+            else:
+                rows.append({'id': idea.id, 'extracted_claim': local_claim[0], 'confidence_score': local_claim[1]})
+        if rows:
+            db.session.execute(update(Idea), rows)
+            db.session.commit()
+        stats['local_claims'] = len(rows)
+        stats['applied'] += len(rows)
+        return remaining
+    
+    # Phases: _requests_<phase> builds item requests, _apply_<phase> writes results in bulk
+    
+    def _requests_claims(self, ideas: List[Idea]) -> ItemRequests:
+        requests = {}
+        for idea in ideas:
+            request = self.extractor.claim_request(idea.title, idea.abstract)
+            requests[idea.id] = [(batch_custom_id('claim_extraction', request), request)]
+        return requests
+    
+    def _apply_claims(self, batch: LLMBatch, contents: Dict[int, List], stats: Dict):
+        ideas = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_(contents)).all()}
+        rows = []
+        for idea_id, (content,) in contents.items():
+            idea = ideas.get(idea_id)
+            if idea is None:
+                continue
+            try:
+                claim, confidence = self.extractor.parse_claim(content)
+            except Exception:
+                claim = None
+            if not claim:
+                claim, confidence = self.extractor._extract_claim_heuristic(idea.title, idea.abstract)
+                stats['fallbacks'] += 1
+            rows.append({'id': idea_id, 'extracted_claim': claim, 'confidence_score': confidence})
+        if rows:
+            db.session.execute(update(Idea), rows)
+        stats['applied'] += len(rows)
+    
+    def _requests_formalize(self, ideas: List[Idea]) -> ItemRequests:
+        prompt_max_tokens = self.config.get('LLM_PROMPT_MAX_TOKENS', 6000)
+        requests = {}
+        for idea in ideas:
+            request, _ = self.investigations.formalize_request(
+                idea.title, idea.abstract, idea.extracted_claim or idea.title, prompt_max_tokens
+            )
+            requests[idea.id] = [(batch_custom_id('formalize_claim', request), request)]
+        return requests
+    
+    def _apply_formalize(self, batch: LLMBatch, contents: Dict[int, List], stats: Dict):
+        ideas = Idea.query.filter(
+            Idea.id.in_(contents),
+            ~active_investigation(self.config)  # investigated interactively meanwhile
+        ).all()
+        now = datetime.utcnow()
+        rows = []
+        for idea in ideas:
+            try:
+                formalized = self.investigations.parse_formalized(contents[idea.id][0])
+            except Exception:
+                formalized = self.investigations.fallback_formalized(idea.extracted_claim or idea.title)
+                stats['fallbacks'] += 1
+            rows.append({
+                'idea_id': idea.id,
+                'formalized_claim': formalized['formalized_claim'],
+                'test_criteria': json.dumps(formalized['test_criteria']),
+                'status': 'investigating',
+                'created_at': now,
+                'started_at': now
+            })
+        
+        investigation_ids = {}
+        if rows:
+            result = db.session.execute(insert(Investigation).returning(Investigation.id, sort_by_parameter_order=True), rows)
+            investigation_ids = {str(row['idea_id']): r.id for row, r in zip(rows, result)}
+        batch.results = {'investigation_ids': investigation_ids}
+    
+    def _steps_level(self, batch: LLMBatch) -> int:
+        """Pipeline DAG level a steps batch runs (0 for the first)"""
+        if batch.results and 'level' in batch.results:
+            return batch.results['level']
+        parent = db.session.get(LLMBatch, batch.parent_id) if batch.parent_id else None
+        return self._steps_level(parent) + 1 if parent is not None and parent.phase == 'steps' else 0
+    
+    def _level_requests(self, investigation: Investigation, level: int) -> List[Tuple[PipelineStep, str, Dict]]:
+        """(step, input hash, request) for a level's steps, rendered with the earlier levels' results"""
+        done = self.investigations.persisted_steps(
+            json.loads(investigation.reasoning_steps or '[]'), json.loads(investigation.evidence or '[]')
+        )
+        results = {step_id: reasoning_step.get('result', '') for step_id, (reasoning_step, _) in done.items()}
+        level_requests = []
+        for step in self.investigations.pipeline.levels()[level]:
+            request = self.investigations.step_request(step, step.render(investigation.formalized_claim, results))
+            level_requests.append((step, step_input_hash(step, request), request))
+        return level_requests
+    
+    def _requests_steps(self, parent: LLMBatch) -> ItemRequests:
+        investigation_ids = list((parent.results or {}).get('investigation_ids', {}).values())
+        level = self._steps_level(parent) + 1 if parent.phase == 'steps' else 0
+        requests = {}
+        for investigation in Investigation.query.filter(Investigation.id.in_(investigation_ids)).all():
+            requests[investigation.id] = [
+                (batch_custom_id('investigation_step', request), request)
+                for _, _, request in self._level_requests(investigation, level)
+            ]
+        return requests
+    
+    def _apply_steps(self, batch: LLMBatch, contents: Dict[int, List], stats: Dict):
+        level = self._steps_level(batch)
+        pipeline = self.investigations.pipeline
+        numbers = {step.id: i for i, step in enumerate(pipeline.steps, 1)}
+        investigations = Investigation.query.filter(Investigation.id.in_(contents)).all()
+        rows = []
+        for investigation in investigations:
+            done = self.investigations.persisted_steps(
+                json.loads(investigation.reasoning_steps or '[]'), json.loads(investigation.evidence or '[]')
+            )
+            for (step, input_hash, _), content in zip(self._level_requests(investigation, level), contents[investigation.id]):
+                i = numbers[step.id]
+                try:
+                    reasoning_step, evidence_item = self.investigations.parse_step(i, step, content)
+                except Exception:
+                    reasoning_step, evidence_item = self.investigations.fallback_step(i, step)
+                    stats['fallbacks'] += 1
+                reasoning_step['input_hash'] = input_hash
+                done[step.id] = (reasoning_step, evidence_item)
+            ordered = [done[step.id] for step in pipeline.steps if step.id in done]
+            rows.append({
+                'id': investigation.id,
+                'reasoning_steps': json.dumps([reasoning_step for reasoning_step, _ in ordered]),
+                'evidence': json.dumps([evidence_item for _, evidence_item in ordered])
+            })
+        if rows:
+            db.session.execute(update(Investigation), rows)
+        batch.results = {'investigation_ids': {str(row['id']): row['id'] for row in rows}, 'level': level}
+    
+    def _requests_conclusion(self, parent: LLMBatch) -> ItemRequests:
+        investigation_ids = list((parent.results or {}).get('investigation_ids', {}).values())
+        prompt_max_tokens = self.config.get('LLM_PROMPT_MAX_TOKENS', 6000)
+        requests = {}
+        for investigation in Investigation.query.filter(Investigation.id.in_(investigation_ids)).all():
+            request, _ = self.investigations.conclusion_request(
+                investigation.formalized_claim,
+                json.loads(investigation.test_criteria or '[]'),
+                json.loads(investigation.evidence or '[]'),
+                prompt_max_tokens
+            )
+            requests[investigation.id] = [(batch_custom_id('investigation_conclusion', request), request)]
+        return requests
+    
+    def _apply_conclusion(self, batch: LLMBatch, contents: Dict[int, List], stats: Dict):
+        now = datetime.utcnow()
+        # Claim embeddings make bulk results available for evidence reuse
+        claims = dict(db.session.query(Investigation.id, Investigation.formalized_claim).filter(Investigation.id.in_(contents)).all())
+        embeddings = dict(zip(claims, EvidenceLibrary(self.config).embed(list(claims.values())))) if claims else {}
+        rows = []
+        for investigation_id, (content,) in contents.items():
+            try:
+                conclusion, confidence, summary = self.investigations.parse_conclusion(content)
+            except Exception:
+                conclusion, confidence, summary = FALLBACK_CONCLUSION
+                stats['fallbacks'] += 1
+            rows.append({
+                'id': investigation_id,
+                'conclusion': conclusion,
+                'confidence': confidence,
+                'summary': summary,
+                'claim_embedding_blob': encode_embedding(embeddings.get(investigation_id)),
+                'status': 'completed',
+                'completed_at': now
+            })
+        if rows:
+            db.session.execute(update(Investigation), rows)
+        stats['applied'] += len(rows)
@@ -0,0 +1,136 @@
+"""
+Claim Sentence Classifier
+First tier of claim extraction. Abstracts are split into sentences with spaCy (nlp.pipe,
+CLAIM_NLP_BATCH_SIZE documents at a time) and every sentence is scored by a small linear
+model over lexical features: result verbs, numbers and percentages, comparisons against
+a baseline, metrics, hedging and position in the abstract. IdeaExtractor keeps the best
+sentence as the claim when it scores at least CLAIM_TIER_ACCEPT_SCORE and sends the
+remaining, ambiguous abstracts to the LLM.
+
+The spaCy model (CLAIM_SPACY_MODEL) runs with its statistical sentence segmenter only;
+without the model a rule-based sentencizer is used, and without spaCy a regex splitter.
+"""
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Logistic regression weights over the features below (bias included)
+WEIGHTS = {
+    'bias': -2.2,
+    'result_verb': 1.6,
+    'number': 0.9,
+    'percent': 0.8,
+    'comparison': 0.9,
+    'metric': 0.6,
+    'we_show': 0.7,
+    'hedge': -0.9,
+    'proposal': -0.8,
+    'background': -1.0,
+    'late_position': 0.4,
+    'too_short': -1.2,
+    'too_long': -0.6,
+}
+
+FEATURE_PATTERNS = {
+    'result_verb': r'\b(?:improv|outperform|reduc|achiev|increas|decreas|surpass|exceed|boost|lower|accelerat|'
+                   r'speed(?:s)? up|halv|doubl|mitigat|eliminat|enhanc)\w*',
+    'number': r'\b\d+(?:\.\d+)?\b',
+    'percent': r'\d\s*%|\bpercent(?:age points?)?\b|\b\d+(?:\.\d+)?x\b|\bfold\b',
+    'comparison': r'\b(?:than|over (?:the )?(?:baseline|prior|previous|existing)|compared (?:to|with)|relative to|'
+                  r'baselines?|state[- ]of[- ]the[- ]art|sota)\b',
+    'metric': r'\b(?:accuracy|error|f1|bleu|rouge|perplexity|auc|robustness|latency|throughput|success rate|'
+              r'sample efficiency|reward|loss|calibration|win rate)\b',
+    'we_show': r'\b(?:we|our results?|experiments?|results?) (?:show|demonstrate|find|found|confirm|observe|reveal)',
+    'hedge': r'\b(?:may|might|could|possibly|potentially|suggests?|appears? to|we hypothesi[sz]e)\b',
+    'proposal': r'\b(?:we (?:propose|introduce|present|describe|study|investigate|explore|consider)|this paper|'
+                r'in this work|we aim)\b',
+    'background': r'\b(?:recent(?:ly)?|has (?:been|become)|have (?:been|become)|remains?|is an? (?:important|open|key)|'
+                  r'challenge|however)\b',
+}
+
+_COMPILED = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in FEATURE_PATTERNS.items()}
+
+
+@dataclass
+class ClaimCandidate:
+    """An abstract's best claim sentence and its classifier score (0-1)"""
+    sentence: str
+    score: float
+
+
+def split_sentences(text: str) -> List[str]:
+    """Regex sentence splitter used when spaCy is not installed"""
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+(?=[A-Z0-9])', text or '') if s.strip()]
+
+
+_nlp: Dict[str, object] = {}
+_nlp_lock = threading.Lock()
+
+
+def get_nlp(model_name: str):
+    """spaCy pipeline reduced to sentence segmentation, loaded once per process (None without spaCy)"""
+    with _nlp_lock:
+        if model_name in _nlp:
+            return _nlp[model_name]
+        try:
+            import spacy
+        except ImportError:
+            print("spaCy is not installed; claim sentences are split with a regex")
+            _nlp[model_name] = None
+            return None
+        try:
+            # The senter component segments sentences without running the parser
+            nlp = spacy.load(model_name, exclude=['parser', 'ner', 'lemmatizer', 'attribute_ruler', 'tagger'])
+            if 'senter' in nlp.disabled:
+                nlp.enable_pipe('senter')
+            elif not nlp.has_pipe('senter'):
+                nlp.add_pipe('sentencizer')
+        except OSError as e:
+            print(f"spaCy model {model_name} unavailable ({e}); using the rule-based sentencizer")
+            nlp = spacy.blank('en')
+            nlp.add_pipe('sentencizer')
+        _nlp[model_name] = nlp
+        return nlp
+
+
+class ClaimClassifier:
+    """Scores abstract sentences as candidate testable claims"""
+    
+    def __init__(self, config):
+        self.model_name = config.get('CLAIM_SPACY_MODEL', 'en_core_web_sm')
+        self.batch_size = config.get('CLAIM_NLP_BATCH_SIZE', 64)
+    
+    def sentences(self, texts: Sequence[str]) -> List[List[str]]:
+        """Sentences of each text, segmented in nlp.pipe batches"""
+        nlp = get_nlp(self.model_name)
+        if nlp is None:
+            return [split_sentences(text) for text in texts]
+        return [
+            [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+            for doc in nlp.pipe((text or '' for text in texts), batch_size=self.batch_size)
+        ]
+    
+    @staticmethod
+    def score(sentence: str, position: int, count: int) -> float:
+        """Probability-like score that the sentence states a measurable result"""
+        words = len(sentence.split())
+        features = {name: 1.0 if pattern.search(sentence) else 0.0 for name, pattern in _COMPILED.items()}
+        # Results are usually reported in the second half of an abstract
+        features['late_position'] = 1.0 if count > 1 and position >= count / 2 else 0.0
+        features['too_short'] = 1.0 if words < 6 else 0.0
+        features['too_long'] = 1.0 if words > 60 else 0.0
+        logit = WEIGHTS['bias'] + sum(WEIGHTS[name] * value for name, value in features.items())
+        return 1.0 / (1.0 + math.exp(-logit))
+    
+    def best_claims(self, abstracts: Sequence[str]) -> List[Optional[ClaimCandidate]]:
+        """The highest-scoring sentence of each abstract (None for an empty abstract)"""
+        candidates = []
+        for sentences in self.sentences(abstracts):
+            scored = [
+                ClaimCandidate(sentence, self.score(sentence, position, len(sentences)))
+                for position, sentence in enumerate(sentences)
+            ]
+            candidates.append(max(scored, key=lambda candidate: candidate.score) if scored else None)
+        return candidates
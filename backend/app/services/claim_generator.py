@@ -2,10 +2,11 @@
 Research Claim Generator Service
 Generates testable research claims for AI safety and alignment research using OpenAI
 """
+import asyncio
 import json
 from typing import List, Dict
-from openai import OpenAI
 from flask import current_app
+from app.services.llm_client import get_llm_client, LLMClient, run_async
 
 class ClaimGenerator:
     """Generate testable research claims using OpenAI"""
@@ -14,12 +15,9 @@ class ClaimGenerator:
         self.client = None
     
     def _get_client(self):
-        """Lazy initialization of OpenAI client"""
+        """Lazy initialization of the shared LLM client"""
         if self.client is None:
-            api_key = current_app.config.get('OPENAI_API_KEY')
-            if not api_key:
-                raise ValueError("OpenAI API key not configured")
-            self.client = OpenAI(api_key=api_key)
+            self.client = get_llm_client(current_app.config)
         return self.client
     
     CATEGORIES = [
@@ -30,14 +28,14 @@ class ClaimGenerator:
         "capabilities"
     ]
     
-    def generate_claim(self, category: str = None) -> Dict:
-        """Generate a single research claim using OpenAI"""
-        if category is None or category not in self.CATEGORIES:
-            import random
-            category = random.choice(self.CATEGORIES)
-        
-        client = self._get_client()
-        
+    SYSTEM_PROMPT = """You are an AI safety researcher who generates realistic research paper summaries and testable claims. 
+Your claims should be based on current trends in AI safety research but should be novel and interesting.
+Always respond with valid JSON."""
+    
+    REQUIRED_FIELDS = ['title', 'abstract', 'keywords', 'claim', 'confidence_score']
+    
+    def _claim_request(self, category: str) -> Dict:
+        """Chat-completion arguments for a single claim"""
         prompt = f"""Generate a realistic, testable research claim in the AI safety and alignment field, specifically in the category: {category}.
 
 Create a complete research paper summary including:
@@ -70,42 +68,141 @@ Return your response in JSON format:
     "category": "{category}"
 }}"""
 
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.8,  # Higher temperature for more creative/diverse claims
+            'response_format': {"type": "json_object"}
+        }
+    
+    def _validate_claim(self, result: Dict, category: str) -> Dict:
+        """Ensure all required fields are present and tag the category"""
+        if not isinstance(result, dict):
+            raise ValueError("Claim is not a JSON object")
+        for field in self.REQUIRED_FIELDS:
+            if field not in result:
+                raise ValueError(f"Missing required field: {field}")
+        result['category'] = category
+        return result
+    
+    def generate_claim(self, category: str = None, use_cache: bool = False, refresh_cache: bool = False) -> Dict:
+        """
+        Generate a single research claim using OpenAI
+        Claims are sampled for variety, so the response cache is opt-in here
+        """
+        if category is None or category not in self.CATEGORIES:
+            import random
+            category = random.choice(self.CATEGORIES)
+        
+        client = self._get_client()
+        
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an AI safety researcher who generates realistic research paper summaries and testable claims. 
-Your claims should be based on current trends in AI safety research but should be novel and interesting.
-Always respond with valid JSON."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.8,  # Higher temperature for more creative/diverse claims
-                response_format={"type": "json_object"}
+            content = client.complete(
+                'claim_generation',
+                use_cache=use_cache,
+                refresh=refresh_cache,
+                **self._claim_request(category)
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            # Ensure all required fields are present
-            required_fields = ['title', 'abstract', 'keywords', 'claim', 'confidence_score']
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            result['category'] = category
-            
-            return result
+            return self._validate_claim(json.loads(content), category)
             
         except Exception as e:
             print(f"Error generating claim with OpenAI: {e}")
+            client.metrics.record_fallback('claim_generation')
             # Fallback to a template-based claim
             return self._generate_fallback_claim(category)
     
+    async def _generate_claim_async(self, client: LLMClient, semaphore: asyncio.Semaphore, category: str) -> Dict:
+        """Async generate_claim for batches, with the same per-claim fallback"""
+        try:
+            async with semaphore:
+                content = await client.acomplete('claim_generation', use_cache=False, **self._claim_request(category))
+            return self._validate_claim(json.loads(content), category)
+        except Exception as e:
+            print(f"Error generating claim with OpenAI: {e}")
+            client.metrics.record_fallback('claim_generation')
+            return self._generate_fallback_claim(category)
+    
+    def _packed_request(self, categories: List[str]) -> Dict:
+        """Chat-completion arguments asking for len(categories) claims in one response"""
+        counts = {category: categories.count(category) for category in dict.fromkeys(categories)}
+        plan = '\n'.join(f"- {n} claim(s) in category: {category}" for category, n in counts.items())
+        
+        prompt = f"""Generate {len(categories)} distinct, realistic, testable research claims in the AI safety and alignment field.
+
+Produce exactly this many claims per category, in this order:
+{plan}
+
+For each claim create a research paper summary with a title (10-15 words), an abstract (100-150 words),
+4-6 keywords, one specific testable claim sentence and a confidence score (0.65-0.95).
+Claims should be specific, measurable, neither obviously true nor obviously false, and not repeat each other.
+
+Category definitions:
+- scalability: Scaling laws, efficiency, compute optimization
+- alignment: Value alignment, RLHF, constitutional AI
+- interpretability: Mechanistic interpretability, causal tracing, circuit analysis
+- safety: Risk detection, adversarial robustness, red teaming
+- capabilities: Emergent abilities, reasoning, chain-of-thought
+
+Return your response in JSON format:
+{{
+    "claims": [
+        {{
+            "title": "Paper title",
+            "abstract": "Paper abstract...",
+            "keywords": ["keyword1", "keyword2", "keyword3", "keyword4"],
+            "claim": "The specific testable claim",
+            "confidence_score": 0.85,
+            "category": "one of the categories above"
+        }}
+    ]
+}}"""
+        
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.8,
+            'response_format': {"type": "json_object"}
+        }
+    
+    async def _generate_packed_async(self, client: LLMClient, semaphore: asyncio.Semaphore, categories: List[str]) -> List[Dict]:
+        """
+        Generate several claims with one request
+        Returned claims are matched to the requested categories in order; any slot left
+        empty or invalid is generated on its own (falling back to a template on error)
+        """
+        try:
+            async with semaphore:
+                content = await client.acomplete('claim_generation_packed', use_cache=False, **self._packed_request(categories))
+            items = json.loads(content).get('claims', [])
+        except Exception as e:
+            print(f"Error generating packed claims with OpenAI: {e}")
+            items = []
+        
+        # Group valid claims by category so slots are filled even if the model reorders them
+        by_category = {}
+        for item in items:
+            if isinstance(item, dict) and item.get('category') in categories:
+                try:
+                    by_category.setdefault(item['category'], []).append(self._validate_claim(item, item['category']))
+                except ValueError as e:
+                    print(f"Dropping invalid packed claim: {e}")
+        
+        slots = [by_category.get(category, []).pop(0) if by_category.get(category) else None for category in categories]
+        missing = [i for i, claim in enumerate(slots) if claim is None]
+        if missing:
+            retried = await asyncio.gather(*[
+                self._generate_claim_async(client, semaphore, categories[i]) for i in missing
+            ])
+            for i, claim in zip(missing, retried):
+                slots[i] = claim
+        return slots
+    
     def _generate_fallback_claim(self, category: str) -> Dict:
         """Fallback claim generation if OpenAI fails"""
         import random
@@ -152,18 +249,47 @@ Always respond with valid JSON."""
         claim_data['category'] = category
         return claim_data
     
-    def generate_batch(self, count: int = 5, categories: List[str] = None) -> List[Dict]:
-        """Generate multiple research claims"""
-        if categories is None:
+    def generate_batch(self, count: int = 5, categories: List[str] = None, progress_callback=None,
+                       packed: bool = False) -> List[Dict]:
+        """
+        Generate multiple research claims concurrently
+        Requests run with up to CLAIM_BATCH_CONCURRENCY in flight. packed=True asks for
+        up to CLAIM_BATCH_PACK_SIZE claims per request instead of one claim per request.
+        Claims come back in category round-robin order; failed items fall back individually.
+        """
+        if not categories:
             categories = self.CATEGORIES
         
-        claims = []
-        for i in range(count):
-            category = categories[i % len(categories)]
-            claim = self.generate_claim(category)
-            claims.append(claim)
+        if count <= 0:
+            return []
+        slots = [categories[i % len(categories)] for i in range(count)]
+        
+        client = self._get_client()
+        max_concurrency = current_app.config.get('CLAIM_BATCH_CONCURRENCY', 5)
+        pack_size = current_app.config.get('CLAIM_BATCH_PACK_SIZE', 10) if packed else 1
+        
+        return run_async(self._generate_batch_async(client, slots, max_concurrency, pack_size, progress_callback))
+    
+    async def _generate_batch_async(self, client: LLMClient, slots: List[str], max_concurrency: int, pack_size: int,
+                                    progress_callback=None) -> List[Dict]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        count = len(slots)
+        done = 0
+        
+        async def run_chunk(chunk: List[str]) -> List[Dict]:
+            nonlocal done
+            if pack_size > 1:
+                claims = await self._generate_packed_async(client, semaphore, chunk)
+            else:
+                claims = [await self._generate_claim_async(client, semaphore, chunk[0])]
+            done += len(claims)
+            if progress_callback:
+                progress_callback(done / count, f'Generated {done}/{count} claims')
+            return claims
         
-        return claims
+        chunks = [slots[i:i + pack_size] for i in range(0, count, pack_size)]
+        results = await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+        return [claim for claims in results for claim in claims]
 
 
 def get_claim_generator() -> ClaimGenerator:
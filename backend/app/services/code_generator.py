@@ -1,32 +1,35 @@
 """
 AI-powered code generation for rigorous hypothesis testing
-Uses OpenAI GPT-4 to generate Python test code
+Uses OpenAI GPT-4 to generate Python test code. The script and its explanation come back
+from one call; scripts for near-identical hypotheses are served from (or adapted from)
+the generated script library (app/services/script_library.py).
 """
-from openai import OpenAI
-import os
+from typing import Iterable, Iterator, Tuple
+from flask import current_app
+from app.services.llm_client import get_llm_client
+from app.services.script_library import LibraryMatch, ScriptLibrary
 
-def generate_test_code(investigation_data: dict) -> dict:
-    """
-    Generate Python code to test a research hypothesis using AI
-    
-    Args:
-        investigation_data: Dict containing:
-            - hypothesis: The research claim to test
-            - formalized_claim: Formalized version of the claim
-            - context: Additional context about the research
-            
-    Returns:
-        Dict with:
-            - main_py: Generated Python code for main.py
-            - additional_files: Dict of any additional files needed
-            - explanation: Explanation of the approach
-    """
-    api_key = os.environ.get('OPENAI_API_KEY', '')
-    if not api_key:
-        raise Exception("OpenAI API key not configured")
-    
-    client = OpenAI(api_key=api_key)
-    
+CODE_SYSTEM_PROMPT = "You are an expert research scientist and Python developer specializing in rigorous hypothesis testing and statistical analysis."
+
+# Separates the script from its explanation in the model output
+EXPLANATION_MARKER = '### EXPLANATION'
+
+OUTPUT_FORMAT = f"""Format your response as a complete, executable Python script. Start directly with the code, no markdown formatting.
+After the script, add a line containing only {EXPLANATION_MARKER} followed by 2-3 sentences explaining the testing approach."""
+
+
+def investigation_test_data(investigation) -> dict:
+    """generate_test_code input for an Investigation (with its idea loaded)"""
+    return {
+        'hypothesis': investigation.idea.extracted_claim or investigation.idea.title,
+        'formalized_claim': investigation.formalized_claim or investigation.idea.extracted_claim,
+        'context': investigation.idea.abstract or '',
+        'investigation_id': investigation.id
+    }
+
+
+def _code_request(investigation_data: dict) -> dict:
+    """Chat-completion arguments for the test script"""
     hypothesis = investigation_data.get('hypothesis', '')
     formalized_claim = investigation_data.get('formalized_claim', '')
     context = investigation_data.get('context', '')
@@ -57,64 +60,142 @@ REQUIREMENTS:
 - Include statistical significance testing where appropriate
 - Return a conclusion: "LIKELY TRUE", "LIKELY FALSE", or "INCONCLUSIVE"
 
-Format your response as a complete, executable Python script. Start directly with the code, no markdown formatting."""
+{OUTPUT_FORMAT}"""
+
+    return {
+        'model': "gpt-4o-mini",  # Using GPT-4o-mini for code generation
+        'messages': [
+            {"role": "system", "content": CODE_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.7,
+        'max_tokens': 2200
+    }
+
+
+def _adaptation_request(investigation_data: dict, script) -> dict:
+    """Chat-completion arguments for adapting a library script to a similar hypothesis"""
+    prompt = f"""The Python script below tests a research hypothesis closely related to a new one. Adapt it to the new hypothesis: change whatever differs (effect sizes, thresholds, compared methods, printed descriptions) and keep the rest of the methodology.
+
+PREVIOUS HYPOTHESIS: {script.hypothesis}
+
+PREVIOUS FORMALIZED CLAIM: {script.formalized_claim}
+
+PREVIOUS SCRIPT:
+{script.main_py}
+
+NEW HYPOTHESIS: {investigation_data.get('hypothesis', '')}
+
+NEW FORMALIZED CLAIM: {investigation_data.get('formalized_claim', '')}
+
+The same requirements apply: only numpy, pandas, scipy, sklearn, torch, matplotlib, seaborn; no network requests, file I/O or system calls; synthetic data only; print a conclusion of "LIKELY TRUE", "LIKELY FALSE", or "INCONCLUSIVE".
+
+{OUTPUT_FORMAT}"""
+
+    return {
+        'model': "gpt-4o-mini",
+        'messages': [
+            {"role": "system", "content": CODE_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.3,
+        'max_tokens': 2200
+    }
+
+
+def _split_output(content: str) -> Tuple[str, str]:
+    """(script, explanation) from model output; the explanation is empty if the marker is missing"""
+    code, _, explanation = content.partition(EXPLANATION_MARKER)
+    return _strip_markdown(code), explanation.strip()
+
+
+def _split_stream(pieces: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Route streamed output to ('code', piece) and ('explanation', piece)
+    The tail of the code buffer is held back until it can't be the start of the marker.
+    """
+    buffer = ''
+    in_code = True
+    explaining = False
+    hold = len(EXPLANATION_MARKER) - 1
+    for piece in pieces:
+        if not in_code:
+            # Whitespace after the marker is dropped until the explanation starts
+            piece = piece if explaining else piece.lstrip()
+            if piece:
+                explaining = True
+                yield 'explanation', piece
+            continue
+        buffer += piece
+        idx = buffer.find(EXPLANATION_MARKER)
+        if idx >= 0:
+            in_code = False
+            if buffer[:idx]:
+                yield 'code', buffer[:idx]
+            rest = buffer[idx + len(EXPLANATION_MARKER):].lstrip()
+            if rest:
+                explaining = True
+                yield 'explanation', rest
+        elif len(buffer) > hold:
+            yield 'code', buffer[:-hold]
+            buffer = buffer[-hold:]
+    if in_code and buffer:
+        yield 'code', buffer
+
+
+def _generation_call(match: LibraryMatch, investigation_data: dict) -> Tuple[str, dict]:
+    """(task, request) for a fresh script or an adaptation of the matched one"""
+    if match.mode == 'adapt':
+        return 'code_adaptation', _adaptation_request(investigation_data, match.script)
+    return 'code_generation', _code_request(investigation_data)
+
+
+def _library_result(match: LibraryMatch) -> dict:
+    """generate_test_code result for a script reused as is"""
+    return {
+        'main_py': match.script.main_py,
+        'additional_files': {},
+        'explanation': match.script.explanation or '',
+        'model_used': 'library',
+        'library': match.provenance
+    }
+
 
+def _store_result(library: ScriptLibrary, match: LibraryMatch, investigation_data: dict,
+                  generated_code: str, explanation: str) -> dict:
+    """Add a generated or adapted script to the library and build the result"""
+    library.mark_used(match)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Using GPT-4o-mini for code generation
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert research scientist and Python developer specializing in rigorous hypothesis testing and statistical analysis."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        generated_code = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if generated_code.startswith('```python'):
-            generated_code = generated_code[len('```python'):].strip()
-        if generated_code.startswith('```'):
-            generated_code = generated_code[3:].strip()
-        if generated_code.endswith('```'):
-            generated_code = generated_code[:-3].strip()
-        
-        # Generate explanation
-        explanation_prompt = f"""Briefly explain the testing approach used in this code in 2-3 sentences:
-
-{generated_code[:500]}..."""
-
-        explanation_response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": explanation_prompt
-                }
-            ],
-            temperature=0.5,
-            max_tokens=200
-        )
-        
-        explanation = explanation_response.choices[0].message.content.strip()
-        
-        return {
-            'main_py': generated_code,
-            'additional_files': {},
-            'explanation': explanation,
-            'model_used': 'gpt-4o-mini'
-        }
-        
+        library.add(investigation_data, generated_code, explanation, 'gpt-4o-mini', match)
     except Exception as e:
-        # Fallback to template if AI generation fails
-        fallback_code = f"""# AI Code Generation Failed: {str(e)}
+        print(f"Failed to store generated script: {e}")
+    return {
+        'main_py': generated_code,
+        'additional_files': {},
+        'explanation': explanation,
+        'model_used': 'gpt-4o-mini',
+        'library': match.provenance
+    }
+
+
+def _strip_markdown(generated_code: str) -> str:
+    """Remove markdown code blocks if present"""
+    generated_code = generated_code.strip()
+    if generated_code.startswith('```python'):
+        generated_code = generated_code[len('```python'):].strip()
+    if generated_code.startswith('```'):
+        generated_code = generated_code[3:].strip()
+    if generated_code.endswith('```'):
+        generated_code = generated_code[:-3].strip()
+    return generated_code
+
+
+def _fallback_result(investigation_data: dict, e: Exception) -> dict:
+    """Template script used when AI generation fails"""
+    hypothesis = investigation_data.get('hypothesis', '')
+    formalized_claim = investigation_data.get('formalized_claim', '')
+    
+    fallback_code = f"""# AI Code Generation Failed: {str(e)}
 # Fallback template for testing: {hypothesis}
 
 import numpy as np
@@ -167,11 +248,93 @@ def test_hypothesis():
 if __name__ == "__main__":
     test_hypothesis()
 """
+    
+    return {
+        'main_py': fallback_code,
+        'additional_files': {},
+        'explanation': f"AI generation failed: {str(e)}. Using fallback template.",
+        'model_used': 'fallback'
+    }
+
+
+def generate_test_code(investigation_data: dict, use_cache: bool = True, refresh_cache: bool = False) -> dict:
+    """
+    Generate Python code to test a research hypothesis using AI
+    
+    Args:
+        investigation_data: Dict containing:
+            - hypothesis: The research claim to test
+            - formalized_claim: Formalized version of the claim
+            - context: Additional context about the research
+            - investigation_id: Optional, recorded with the library entry
+        use_cache: Serve repeated requests from the LLM response cache
+        refresh_cache: Ignore cached responses and store fresh ones; library scripts
+            are adapted rather than reused as is
+            
+    Returns:
+        Dict with:
+            - main_py: Generated Python code for main.py
+            - additional_files: Dict of any additional files needed
+            - explanation: Explanation of the approach
+            - library: How the script was produced ({'mode': 'reuse'|'adapt'|'generate',
+              'script_id', 'similarity'}), absent for the fallback template
+    """
+    client = get_llm_client(current_app.config)
+    library = ScriptLibrary(current_app.config)
+    match = library.lookup(investigation_data, allow_reuse=not refresh_cache)
+    if match.mode == 'reuse':
+        library.mark_used(match)
+        return _library_result(match)
+    
+    task = 'code_generation'
+    try:
+        task, request = _generation_call(match, investigation_data)
+        generated_code, explanation = _split_output(client.complete(
+            task,
+            use_cache=use_cache,
+            refresh=refresh_cache,
+            **request
+        ))
+        return _store_result(library, match, investigation_data, generated_code, explanation)
         
-        return {
-            'main_py': fallback_code,
-            'additional_files': {},
-            'explanation': f"AI generation failed: {str(e)}. Using fallback template.",
-            'model_used': 'fallback'
-        }
+    except Exception as e:
+        # Fallback to template if AI generation fails
+        client.metrics.record_fallback(task)
+        return _fallback_result(investigation_data, e)
 
+
+def stream_test_code(investigation_data: dict, use_cache: bool = True,
+                     refresh_cache: bool = False) -> Iterator[Tuple[str, object]]:
+    """
+    Streaming generate_test_code
+    Yields ('code', text) pieces as the script arrives, then ('explanation', text) pieces,
+    and finally ('result', dict) with the same dict generate_test_code returns. Streamed
+    code is raw model output; the result holds the cleaned script (or the fallback).
+    A reused library script arrives as a single code piece.
+    """
+    client = get_llm_client(current_app.config)
+    library = ScriptLibrary(current_app.config)
+    match = library.lookup(investigation_data, allow_reuse=not refresh_cache)
+    if match.mode == 'reuse':
+        library.mark_used(match)
+        result = _library_result(match)
+        yield 'code', result['main_py']
+        yield 'explanation', result['explanation']
+        yield 'result', result
+        return
+    
+    task = 'code_generation'
+    try:
+        task, request = _generation_call(match, investigation_data)
+        pieces = {'code': [], 'explanation': []}
+        for kind, piece in _split_stream(client.stream(task, use_cache=use_cache, refresh=refresh_cache, **request)):
+            pieces[kind].append(piece)
+            yield kind, piece
+        
+        generated_code = _strip_markdown(''.join(pieces['code']))
+        explanation = ''.join(pieces['explanation']).strip()
+        yield 'result', _store_result(library, match, investigation_data, generated_code, explanation)
+        
+    except Exception as e:
+        client.metrics.record_fallback(task)
+        yield 'result', _fallback_result(investigation_data, e)
@@ -0,0 +1,130 @@
+"""
+Embedding codec
+Packs embedding vectors into compact binary blobs and decodes them with np.frombuffer
+
+Blob layout (little-endian):
+    byte 0      storage dtype code (1 = float32, 2 = float16, 3 = int8)
+    bytes 1-3   reserved
+    bytes 4-7   float32 scale (int8 only, 1.0 otherwise)
+    bytes 8-    packed vector
+The 8-byte header keeps the payload aligned, so float32 blobs decode without copying.
+"""
+import json
+import logging
+import struct
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<B3xf')
+HEADER_SIZE = HEADER.size
+
+STORAGE_DTYPES = {
+    'float32': (1, np.dtype('<f4')),
+    'float16': (2, np.dtype('<f2')),
+    'int8': (3, np.dtype('i1')),
+}
+_DTYPES_BY_CODE = {code: (name, dtype) for name, (code, dtype) in STORAGE_DTYPES.items()}
+
+DEFAULT_STORAGE_DTYPE = 'float32'
+
+
+def get_storage_dtype() -> str:
+    """Storage dtype configured for new embeddings (EMBEDDING_STORAGE_DTYPE)"""
+    if has_app_context():
+        dtype = current_app.config.get('EMBEDDING_STORAGE_DTYPE', DEFAULT_STORAGE_DTYPE)
+        if dtype in STORAGE_DTYPES:
+            return dtype
+    return DEFAULT_STORAGE_DTYPE
+
+
+def encode_embedding(vector, dtype: Optional[str] = None) -> Optional[bytes]:
+    """Pack a vector (list or ndarray) into a binary blob"""
+    if vector is None:
+        return None
+    
+    dtype = dtype or get_storage_dtype()
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    code, np_dtype = STORAGE_DTYPES[dtype]
+    
+    values = np.asarray(vector, dtype=np.float32).ravel()
+    scale = 1.0
+    
+    if dtype == 'int8':
+        # Symmetric per-vector quantization
+        max_abs = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        packed = np.clip(np.rint(values / scale), -127, 127).astype(np_dtype)
+    else:
+        packed = values.astype(np_dtype)
+    
+    return HEADER.pack(code, scale) + packed.tobytes()
+
+
+def decode_embedding(blob, as_float32: bool = True) -> Optional[np.ndarray]:
+    """
+    Decode a blob produced by encode_embedding
+    float32 blobs are returned as a read-only view over the blob (no copy).
+    float16/int8 blobs are widened to float32 unless as_float32 is False.
+    """
+    if blob is None:
+        return None
+    
+    code, scale = HEADER.unpack_from(blob)
+    if code not in _DTYPES_BY_CODE:
+        raise ValueError(f"Unknown embedding dtype code: {code}")
+    name, np_dtype = _DTYPES_BY_CODE[code]
+    
+    vector = np.frombuffer(blob, dtype=np_dtype, offset=HEADER_SIZE)
+    if not as_float32 or name == 'float32':
+        return vector
+    if name == 'int8':
+        return vector.astype(np.float32) * np.float32(scale)
+    return vector.astype(np.float32)
+
+
+def stack_embedding_rows(rows: Iterable[Sequence], dim: Optional[int] = None) -> Tuple[List, np.ndarray]:
+    """
+    Decode (key, blob) or (key, blob, legacy_json) rows into their keys and one
+    preallocated (n, dim) float32 matrix
+    Rows without a blob fall back to their legacy JSON embedding until
+    migrate_embeddings_to_binary.py has run. Vectors whose dimension differs from `dim`
+    (default: the most common dimension) are skipped and logged, e.g. rows embedded by a
+    previous model.
+    """
+    keys, vectors = [], []
+    for row in rows:
+        key, blob = row[0], row[1]
+        try:
+            if blob is None and len(row) > 2 and row[2]:
+                blob = legacy_json_to_blob(row[2], dtype='float32')
+            vector = decode_embedding(blob)
+        except (ValueError, TypeError, struct.error) as e:
+            logger.warning("Skipping undecodable embedding for %s: %s", key, e)
+            continue
+        if vector is not None:
+            keys.append(key)
+            vectors.append(vector)
+    
+    if dim is None and vectors:
+        dim = Counter(vector.shape[0] for vector in vectors).most_common(1)[0][0]
+    kept = [i for i, vector in enumerate(vectors) if vector.shape[0] == dim]
+    if len(kept) < len(vectors):
+        skipped = [keys[i] for i, vector in enumerate(vectors) if vector.shape[0] != dim]
+        logger.warning("Skipping %d embeddings without %s dimensions: %s", len(skipped), dim, skipped[:20])
+    
+    matrix = np.empty((len(kept), dim or 0), dtype=np.float32)
+    for row, i in enumerate(kept):
+        matrix[row] = vectors[i]
+    return [keys[i] for i in kept], matrix
+
+
+def legacy_json_to_blob(text: str, dtype: Optional[str] = None) -> Optional[bytes]:
+    """Convert a legacy JSON-text (or pgvector text) embedding into a blob"""
+    if not text:
+        return None
+    return encode_embedding(json.loads(text), dtype=dtype)
@@ -0,0 +1,121 @@
+"""
+Embedding Index
+Keeps one table's embedding column in memory as a row-normalized float32 matrix, shared
+by market similarity, the script library and the evidence library instead of each
+reloading and normalizing every vector per lookup.
+
+Before each use a single COUNT/MAX(id) query checks the table: rows with ids above the
+cached ones are decoded and appended, any other change (deletions, older rows that gained
+an embedding) reloads the matrix. Embeddings are assumed not to be rewritten in place.
+The cache is per process and per database engine.
+"""
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Collection, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, or_
+from app import db
+from app.services.embedding_codec import stack_embedding_rows
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale vectors (or one vector) to unit length, leaving zero vectors as they are"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def query_vector(value) -> np.ndarray:
+    """A caller-supplied embedding as a float32 vector; ValueError if it is not a flat list of numbers"""
+    try:
+        vector = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise ValueError("embedding must be a list of numbers")
+    if vector.ndim != 1 or not len(vector) or not np.isfinite(vector).all():
+        raise ValueError("embedding must be a non-empty list of finite numbers")
+    return vector
+
+
+@dataclass
+class _IndexState:
+    row_count: int = 0  # rows matching the index criteria, including skipped ones
+    max_id: Optional[int] = None
+    ids: List = field(default_factory=list)
+    matrix: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+
+
+class EmbeddingIndex:
+    """Cached normalized matrix over the rows of one table that have an embedding"""
+
+    def __init__(self, id_column, blob_column, *criteria, legacy_column=None):
+        """legacy_column: JSON-encoded embeddings read for rows without a blob"""
+        self.id_column = id_column
+        self.columns = (id_column, blob_column) + ((legacy_column,) if legacy_column is not None else ())
+        present = blob_column.isnot(None) if legacy_column is None else or_(blob_column.isnot(None), legacy_column.isnot(None))
+        self.criteria = (present,) + criteria
+        self._states = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _rows(self, after_id=None):
+        query = db.session.query(*self.columns).filter(*self.criteria)
+        if after_id is not None:
+            query = query.filter(self.id_column > after_id)
+        return query.order_by(self.id_column).all()
+
+    def load(self) -> Tuple[List, np.ndarray]:
+        """(ids, normalized matrix) for the current table contents"""
+        row_count, max_id = db.session.query(
+            func.count(self.id_column), func.max(self.id_column)
+        ).filter(*self.criteria).one()
+
+        with self._lock:
+            state = self._states.get(db.engine)
+            if state is not None and (state.row_count, state.max_id) == (row_count, max_id):
+                return state.ids, state.matrix
+
+            if state is not None and state.max_id is not None and state.ids:
+                rows = self._rows(after_id=state.max_id)
+                if state.row_count + len(rows) == row_count:
+                    ids, matrix = stack_embedding_rows(rows, dim=state.matrix.shape[1])
+                    state = _IndexState(
+                        row_count, max_id,
+                        state.ids + ids,
+                        np.concatenate([state.matrix, normalize_rows(matrix)])
+                    )
+                    self._states[db.engine] = state
+                    return state.ids, state.matrix
+
+            rows = self._rows()
+            ids, matrix = stack_embedding_rows(rows)
+            state = _IndexState(len(rows), rows[-1][0] if rows else None, ids, normalize_rows(matrix))
+            self._states[db.engine] = state
+            return state.ids, state.matrix
+
+    def nearest(self, vector) -> Tuple[Optional[Any], Optional[float]]:
+        """(id, cosine similarity) of the row closest to `vector`, or (None, None) if none is comparable"""
+        ids, matrix = self.load()
+        query = normalize_rows(np.asarray(vector, dtype=np.float32))
+        if not ids or matrix.shape[1] != query.shape[0]:
+            # Nothing stored yet, or stored with a different embedding model
+            return None, None
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        return ids[best], float(scores[best])
+
+    def rank(self, vector, limit: int, allowed: Optional[Collection] = None) -> List[Tuple[Any, float]]:
+        """
+        Up to `limit` (id, cosine similarity) pairs, most similar first, optionally only ids in `allowed`
+        Raises ValueError when the vector's dimension differs from the stored embeddings.
+        """
+        ids, matrix = self.load()
+        vector = query_vector(vector)
+        if not ids:
+            return []
+        if matrix.shape[1] != vector.shape[0]:
+            raise ValueError(f"query embedding must have {matrix.shape[1]} dimensions")
+        scores = matrix @ normalize_rows(vector)
+        if allowed is not None:
+            allowed = set(allowed)
+            scores = np.where([row_id in allowed for row_id in ids], scores, -np.inf)
+        top = [int(i) for i in np.argsort(-scores)[:limit] if np.isfinite(scores[i])]
+        return [(ids[i], float(scores[i])) for i in top]
@@ -0,0 +1,238 @@
+"""
+Embedding Server
+One process holds the sentence embedding model and serves every web worker, Celery
+worker and the scraper over a Unix socket (EMBEDDING_SERVER_SOCKET), instead of each
+process loading its own copy. Requests arriving within EMBEDDING_SERVER_MAX_WAIT_MS of
+each other are encoded together, up to EMBEDDING_SERVER_MAX_BATCH texts per batch.
+
+Wire format: each message is a 4-byte big-endian length followed by the payload. A
+request is JSON {"model": ..., "texts": [...]}; the reply is a JSON header
+{"shape": [n, dim]} followed by the float32 embeddings as raw bytes, or {"error": ...}.
+
+Clients (EmbeddingClient) time out after EMBEDDING_SERVER_TIMEOUT_SECONDS and return
+None when the server is unavailable, so IdeaExtractor embeds in-process instead; the
+server is not retried for EMBEDDING_SERVER_RETRY_SECONDS after a failure.
+
+Run it with: python run_embedding_server.py
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+_LENGTH = struct.Struct('>I')
+
+# Texts per request; larger inputs are sent in several requests so each stays under the timeout
+CLIENT_CHUNK_SIZE = 256
+
+
+class EmbeddingServerError(Exception):
+    """The server answered with an error"""
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    size, = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, size)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One client connection; serves requests until the client closes it"""
+
+    def handle(self):
+        server: EmbeddingServer = self.server.embedding_server
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request))
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                _send_frame(self.request, json.dumps({'error': f'Bad request: {e}'}).encode('utf-8'))
+                return
+            try:
+                if request.get('model') != server.model_name:
+                    raise EmbeddingServerError(f"Server embeds with {server.model_name}, not {request.get('model')}")
+                texts = request.get('texts') or []
+                # Rejected here rather than failing the batch it would share with other clients
+                if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                    raise EmbeddingServerError('texts must be a list of strings')
+                embeddings = server.submit(texts).result()
+                _send_frame(self.request, json.dumps({'shape': list(embeddings.shape)}).encode('utf-8'))
+                _send_frame(self.request, embeddings.tobytes())
+            except Exception as e:
+                _send_frame(self.request, json.dumps({'error': str(e) or type(e).__name__}).encode('utf-8'))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # every web and Celery worker thread may connect at once
+
+
+class EmbeddingServer:
+    """Model-holding process: dynamic batching over requests from many clients"""
+
+    def __init__(self, socket_path: str, model_name: str, encode: Callable[[List[str]], np.ndarray],
+                 max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._carried = None  # request held over for the next batch (batcher thread only)
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0, 'errors': 0}
+        self._server = None
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for the next batch; the future resolves to their (n, dim) embeddings"""
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def _next_batch(self) -> List:
+        """
+        Block for one request, then gather more until max_batch texts or max_wait passes
+        A request that would overflow the batch starts the next one; a single request
+        larger than max_batch is a batch of its own.
+        """
+        items = [self._carried or self._queue.get()]
+        self._carried = None
+        count = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if count + len(item[0]) > self.max_batch:
+                self._carried = item
+                break
+            items.append(item)
+            count += len(item[0])
+        return items
+
+    def _batch_loop(self):
+        while True:
+            items = self._next_batch()
+            texts = [text for item_texts, _ in items for text in item_texts]
+            self.stats['requests'] += len(items)
+            self.stats['texts'] += len(texts)
+            self.stats['batches'] += 1
+            try:
+                embeddings = self._encode(texts)
+            except Exception as e:
+                print(f"Embedding batch of {len(texts)} texts failed: {e}")
+                if len(items) == 1:
+                    self.stats['errors'] += 1
+                    items[0][1].set_exception(e)
+                    continue
+                # Encode request by request so the error only reaches the one that caused it
+                for item_texts, future in items:
+                    try:
+                        future.set_result(self._encode(item_texts))
+                    except Exception as item_error:
+                        self.stats['errors'] += 1
+                        future.set_exception(item_error)
+                continue
+            offset = 0
+            for item_texts, future in items:
+                future.set_result(embeddings[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.encode(texts), dtype=np.float32) if texts else np.zeros((0, 0), dtype=np.float32)
+
+    def serve_forever(self):
+        """Bind the socket (replacing a stale one) and serve until interrupted"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self._batch_loop, name='embedding-batcher', daemon=True).start()
+        self._server = _UnixServer(self.socket_path, _Handler)
+        self._server.embedding_server = self
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class EmbeddingClient:
+    """Per-process client for the embedding server"""
+
+    def __init__(self, socket_path: str, timeout: float = 10.0, retry_seconds: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._unavailable_until = 0.0
+
+    def embed(self, texts: List[str], model_name: str) -> Optional[np.ndarray]:
+        """(n, dim) float32 embeddings from the server, or None if it cannot serve them"""
+        if time.monotonic() < self._unavailable_until:
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                parts = []
+                for start in range(0, len(texts), CLIENT_CHUNK_SIZE):
+                    chunk = texts[start:start + CLIENT_CHUNK_SIZE]
+                    _send_frame(sock, json.dumps({'model': model_name, 'texts': chunk}).encode('utf-8'))
+                    header = json.loads(_recv_frame(sock))
+                    if 'error' in header:
+                        raise EmbeddingServerError(header['error'])
+                    parts.append(np.frombuffer(_recv_frame(sock), dtype=np.float32).reshape(header['shape']))
+        except (OSError, ValueError, EmbeddingServerError) as e:
+            print(f"Embedding server unavailable ({e}); embedding in-process")
+            self._unavailable_until = time.monotonic() + self.retry_seconds
+            return None
+        return np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+
+_clients: Dict[tuple, EmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(config) -> Optional[EmbeddingClient]:
+    """Process-wide client, or None when EMBEDDING_SERVER_SOCKET is not configured"""
+    socket_path = config.get('EMBEDDING_SERVER_SOCKET') or ''
+    if not socket_path:
+        return None
+    settings = (socket_path, float(config.get('EMBEDDING_SERVER_TIMEOUT_SECONDS', 10)),
+                float(config.get('EMBEDDING_SERVER_RETRY_SECONDS', 30)))
+    with _clients_lock:
+        client = _clients.get(settings)
+        if client is None:
+            client = EmbeddingClient(*settings)
+            _clients[settings] = client
+        return client
@@ -0,0 +1,28 @@
+"""
+Server-sent event helpers
+Streaming endpoints yield sse_event() strings from a generator and return
+sse_response(generator); EventSource clients receive each event as it is produced.
+"""
+import json
+from typing import Iterable, Optional
+from flask import Response, stream_with_context
+
+
+def sse_event(event: str, data, event_id: Optional[str] = None) -> str:
+    """One SSE frame with a JSON payload"""
+    frame = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{frame}event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def sse_comment(text: str = 'keepalive') -> str:
+    """Comment frame, ignored by clients; keeps idle connections open through proxies"""
+    return f': {text}\n\n'
+
+
+def sse_response(events: Iterable[str]) -> Response:
+    """Stream the frames inside the current request/app context, with proxy buffering off"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
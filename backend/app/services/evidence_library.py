@@ -0,0 +1,100 @@
+"""
+Evidence Library
+Completed investigations keep an embedding of their formalized claim. A new investigation
+whose formalized claim is close enough to one of them (EVIDENCE_REUSE_THRESHOLD) copies
+that investigation's per-step evidence instead of re-running the steps, and only the
+conclusion is synthesized again. Steps that ended in a fallback are always re-run.
+"""
+import copy
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app import db
+from app.models import Investigation
+from app.services.embedding_index import EmbeddingIndex
+from app.services.idea_extractor import IdeaExtractor
+
+DEFAULT_REUSE_STEPS = 'literature_search,reproducibility_analysis,statistical_evaluation,effect_size_assessment,expert_consensus'
+
+_claim_index = EmbeddingIndex(Investigation.id, Investigation.claim_embedding_blob, Investigation.status == 'completed')
+
+
+@dataclass
+class EvidenceMatch:
+    """Outcome of a lookup; steps maps a pipeline step id to its (reasoning_step, evidence_item)"""
+    embedding: Optional[np.ndarray] = None
+    investigation: Optional[Investigation] = None
+    similarity: Optional[float] = None
+    steps: Dict[str, Tuple[Dict, Dict]] = field(default_factory=dict)
+    
+    @property
+    def provenance(self) -> Optional[Dict]:
+        """Stored on the new investigation when any step was reused"""
+        if not self.steps:
+            return None
+        return {
+            'investigation_id': self.investigation.id,
+            'similarity': round(self.similarity, 4),
+            'reused_steps': list(self.steps)
+        }
+
+
+class EvidenceLibrary:
+    """Embedding index over completed investigations"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.extractor = IdeaExtractor(config)
+    
+    def embed(self, formalized_claims: List[str]) -> List[Optional[np.ndarray]]:
+        """Claim embeddings to store on investigations (None without an embedding model)"""
+        try:
+            return list(self.extractor.embed_texts(formalized_claims))
+        except Exception as e:
+            print(f"Evidence library unavailable: {e}")
+            return [None] * len(formalized_claims)
+    
+    def lookup(self, formalized_claim: str) -> EvidenceMatch:
+        """
+        Find the closest completed investigation and the steps that can be reused from it
+        The returned match always carries the claim embedding when one could be computed.
+        """
+        embedding = self.embed([formalized_claim])[0]
+        if embedding is None:
+            return EvidenceMatch()
+        if not self.config.get('EVIDENCE_REUSE_ENABLED', True):
+            return EvidenceMatch(embedding)
+        
+        investigation_id, similarity = _claim_index.nearest(embedding)
+        if investigation_id is None:
+            return EvidenceMatch(embedding)
+        if similarity < self.config.get('EVIDENCE_REUSE_THRESHOLD', 0.95):
+            return EvidenceMatch(embedding, similarity=similarity)
+        
+        investigation = db.session.get(Investigation, investigation_id)
+        return EvidenceMatch(embedding, investigation, similarity, self._reusable_steps(investigation))
+    
+    def _reusable_steps(self, investigation: Investigation) -> Dict[str, Tuple[Dict, Dict]]:
+        """Copies of the investigation's steps named in EVIDENCE_REUSE_STEPS that did not fall back"""
+        allowed = self.config.get('EVIDENCE_REUSE_STEPS', DEFAULT_REUSE_STEPS)
+        if isinstance(allowed, str):
+            allowed = [stage.strip() for stage in allowed.split(',') if stage.strip()]
+        
+        try:
+            reasoning_steps = json.loads(investigation.reasoning_steps or '[]')
+            evidence = json.loads(investigation.evidence or '[]')
+        except ValueError:
+            return {}
+        
+        steps = {}
+        for reasoning_step, evidence_item in zip(reasoning_steps, evidence):
+            stage = evidence_item.get('type')
+            if stage not in allowed or reasoning_step.get('fallback') or evidence_item.get('status') == 'limited_data':
+                continue
+            reasoning_step = copy.deepcopy(reasoning_step)
+            # No LLM call is made for a reused step; keep pointing at the original source
+            reasoning_step['llm'] = None
+            reasoning_step['reused_from'] = reasoning_step.get('reused_from') or investigation.id
+            steps[stage] = (reasoning_step, copy.deepcopy(evidence_item))
+        return steps
@@ -1,31 +1,125 @@
-import openai
 import re
-from sentence_transformers import SentenceTransformer
+import threading
+import numpy as np
+from app.services.claim_classifier import ClaimClassifier, split_sentences
+from app.services.embedding_server import get_embedding_client
+from app.services.llm_client import get_llm_client
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+_embedding_models = {}
+_embedding_model_lock = threading.Lock()
+
+def get_embedding_model(config=None):
+    """
+    Load the sentence embedding model once per process
+    EMBEDDING_BACKEND=onnx uses the int8 ONNX export (see app/services/onnx_embedding.py),
+    falling back to PyTorch when the export or onnxruntime is missing.
+    """
+    backend = (config or {}).get('EMBEDDING_BACKEND', 'torch')
+    if backend not in ('torch', 'onnx'):
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+    model = _embedding_models.get(backend)
+    if model is None:
+        with _embedding_model_lock:
+            model = _embedding_models.get(backend)
+            if model is None:
+                model = _load_embedding_model(backend, config)
+                _embedding_models[backend] = model
+    return model
+
+def _load_embedding_model(backend, config):
+    if backend == 'onnx':
+        try:
+            from app.services.onnx_embedding import OnnxEmbeddingModel
+            return OnnxEmbeddingModel(
+                config.get('EMBEDDING_ONNX_DIR', 'models/all-MiniLM-L6-v2-onnx'),
+                EMBEDDING_MODEL_NAME,
+                threads=config.get('EMBEDDING_ONNX_THREADS', 0)
+            )
+        except (ImportError, OSError, ValueError) as e:
+            print(f"ONNX embedding backend unavailable ({e}); using PyTorch")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
 
 class IdeaExtractor:
     """Extract testable claims from research ideas"""
     
     def __init__(self, config):
         self.config = config
-        openai.api_key = config.get('OPENAI_API_KEY')
-        self.embedding_model = None
+        self.classifier = ClaimClassifier(config)
     
     def extract(self, idea):
         """Extract claim, confidence, and embedding from an idea"""
-        # Extract claim using LLM
-        claim, confidence = self._extract_claim(idea.title, idea.abstract)
-        
-        # Generate embedding
-        embedding = self._generate_embedding(f"{idea.title} {idea.abstract}")
+        return self.extract_batch([idea])[0]
+    
+    def extract_batch(self, ideas):
+        """
+        Extract claims, confidences and embeddings for many ideas at once
+        Abstracts are segmented together and the claim classifier's confident picks skip
+        the LLM (tier 'local'); only the ambiguous ones are sent to it (tier 'llm').
+        Embeddings are computed in one batch.
+        """
+        local = self.local_claims([idea.abstract for idea in ideas])
+        embeddings = self._generate_embeddings([f"{idea.title} {idea.abstract}" for idea in ideas])
         
-        return {
-            'claim': claim,
-            'confidence': confidence,
-            'embedding': embedding
-        }
+        results = []
+        for idea, local_claim, embedding in zip(ideas, local, embeddings):
+            if local_claim is not None:
+                claim, confidence = local_claim
+                tier = 'local'
+            else:
+                claim, confidence = self._extract_claim(idea.title, idea.abstract)
+                tier = 'llm'
+            results.append({
+                'claim': claim,
+                'confidence': confidence,
+                'embedding': embedding,
+                'tier': tier
+            })
+        return results
+    
+    def local_claims(self, abstracts):
+        """
+        (claim, confidence) for each abstract the classifier is confident about, None for the rest
+        If segmenting the batch fails, abstracts are classified one at a time and those that
+        still fail go to the LLM.
+        """
+        if not self.config.get('CLAIM_TIER_ENABLED', True):
+            return [None] * len(abstracts)
+        accept_score = self.config.get('CLAIM_TIER_ACCEPT_SCORE', 0.75)
+        try:
+            candidates = self.classifier.best_claims(abstracts)
+        except Exception as e:
+            print(f"Failed to classify claim sentences in batch: {str(e)}")
+            candidates = [self._best_claim(abstract) for abstract in abstracts]
+        return [
+            (candidate.sentence, round(candidate.score, 2))
+            if candidate is not None and candidate.score >= accept_score else None
+            for candidate in candidates
+        ]
+    
+    def _best_claim(self, abstract):
+        try:
+            return self.classifier.best_claims([abstract])[0]
+            
+        except Exception as e:
+            print(f"Failed to classify claim sentences: {str(e)}")
+            return None
     
     def _extract_claim(self, title, abstract):
         """Use LLM to extract a testable claim"""
+        try:
+            content = get_llm_client(self.config).complete('claim_extraction', **self.claim_request(title, abstract))
+            return self.parse_claim(content)
+            
+        except Exception as e:
+            print(f"Failed to extract claim: {str(e)}")
+            # Fallback: use simple heuristics
+            return self._extract_claim_heuristic(title, abstract)
+    
+    def claim_request(self, title, abstract):
+        """Chat-completion arguments for claim extraction"""
         prompt = f"""
 Extract a specific, testable claim from this research paper.
 
@@ -44,33 +138,25 @@ Format your response as:
 CLAIM: [the extracted claim]
 CONFIDENCE: [0.0-1.0]
 """
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": "You are an expert at extracting testable claims from research papers."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': 200
+        }
+    
+    def parse_claim(self, content):
+        """Claim extraction response -> (claim, confidence)"""
+        claim_match = re.search(r'CLAIM:\s*(.+?)(?:\n|$)', content, re.IGNORECASE)
+        confidence_match = re.search(r'CONFIDENCE:\s*([\d.]+)', content, re.IGNORECASE)
         
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at extracting testable claims from research papers."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=200
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Parse response
-            claim_match = re.search(r'CLAIM:\s*(.+?)(?:\n|$)', content, re.IGNORECASE)
-            confidence_match = re.search(r'CONFIDENCE:\s*([\d.]+)', content, re.IGNORECASE)
-            
-            claim = claim_match.group(1).strip() if claim_match else None
-            confidence = float(confidence_match.group(1)) if confidence_match else 0.5
-            
-            return claim, confidence
-            
-        except Exception as e:
-            print(f"Failed to extract claim: {str(e)}")
-            # Fallback: use simple heuristics
-            return self._extract_claim_heuristic(title, abstract)
+        claim = claim_match.group(1).strip() if claim_match else None
+        confidence = float(confidence_match.group(1)) if confidence_match else 0.5
+        
+        return claim, confidence
     
     def _extract_claim_heuristic(self, title, abstract):
         """Fallback heuristic-based claim extraction"""
@@ -81,7 +167,10 @@ CONFIDENCE: [0.0-1.0]
         ]
         
         # Search abstract for sentences with claim indicators
-        sentences = abstract.split('.')
+        try:
+            sentences = self.classifier.sentences([abstract or ''])[0]
+        except Exception:
+            sentences = split_sentences(abstract)
         for sentence in sentences:
             for indicator in claim_indicators:
                 if indicator in sentence.lower():
@@ -90,20 +179,39 @@ CONFIDENCE: [0.0-1.0]
         # Fallback to title
         return f"Research explores: {title}", 0.2
     
+    def embed_texts(self, texts, batch_size=32):
+        """
+        Embed a list of texts in batches, returning an (n, dim) float32 array
+        Served by the shared embedding server when EMBEDDING_SERVER_SOCKET is set; the
+        model is loaded in this process only if the server is unavailable.
+        """
+        texts = list(texts)
+        client = get_embedding_client(self.config)
+        if client is not None:
+            embeddings = client.embed(texts, EMBEDDING_MODEL_NAME)
+            if embeddings is not None:
+                return embeddings
+        embeddings = get_embedding_model(self.config).encode(texts, batch_size=batch_size)
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def _generate_embeddings(self, texts):
+        """Embeddings for many texts in one batch; all None if embedding fails"""
+        if not texts:
+            return []
+        try:
+            return list(self.embed_texts(texts))
+            
+        except Exception as e:
+            print(f"Failed to generate embeddings: {str(e)}")
+            return [None] * len(texts)
+    
     def _generate_embedding(self, text):
         """Generate embedding for semantic search"""
         try:
-            if self.embedding_model is None:
-                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Generate embedding
-            embedding = self.embedding_model.encode(text)
-            
-            # Convert to list for JSON serialization
-            return embedding.tolist()
+            # Generate embedding (stored packed via Idea.embedding)
+            return self.embed_texts([text])[0]
             
         except Exception as e:
             print(f"Failed to generate embedding: {str(e)}")
             # Return None if embedding fails
             return None
-
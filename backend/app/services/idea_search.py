@@ -0,0 +1,215 @@
+"""
+Hybrid Idea Search Service
+Runs lexical (ILIKE) and vector (embedding) retrieval concurrently and fuses them
+with reciprocal rank fusion
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import case
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Idea
+from app.services.embedding_index import EmbeddingIndex
+from app.services.idea_extractor import IdeaExtractor
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+
+# Ideas with an embedding, including ones still stored as legacy JSON
+idea_index = EmbeddingIndex(Idea.id, Idea.embedding_blob, legacy_column=Idea._embedding_json)
+
+# Shared by all requests in this process; retrievals only hold it for one query
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='idea-search')
+
+
+class _SearchCache:
+    """Small thread-safe TTL cache with LRU eviction, storing ranked id lists"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl_seconds: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = _SearchCache()
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share a cache entry"""
+    return ' '.join((query or '').lower().split())
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so a term matches literally (pair with escape='\\')"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class IdeaSearchService:
+    """Hybrid lexical + vector search over ideas"""
+
+    def __init__(self, config):
+        self.config = config
+        self.candidate_pool = config.get('SEARCH_CANDIDATE_POOL', 100)
+        self.cache_ttl = config.get('SEARCH_CACHE_TTL_SECONDS', 300)
+
+    def search(self, query: str, limit: int = 20, filters: Optional[Dict] = None,
+               query_embedding: Optional[List[float]] = None) -> Dict:
+        """
+        Search ideas matching `query`
+        Returns: {'results': [(idea_id, score, lexical_rank, vector_rank)], 'cached': bool}
+        """
+        filters = filters or {}
+        normalized = normalize_query(query)
+        cache_key = (
+            normalized,
+            tuple(sorted((k, str(v)) for k, v in filters.items() if v is not None)),
+            limit
+        )
+
+        # Caller-supplied embeddings are not part of the key, so skip the cache for them
+        if query_embedding is None:
+            cached = _cache.get(cache_key, self.cache_ttl)
+            if cached is not None:
+                return {'results': cached, 'cached': True}
+
+        app = current_app._get_current_object()
+        lexical_future = _executor.submit(self._in_app_context, app, self._lexical_search, normalized, filters)
+        vector_future = _executor.submit(self._in_app_context, app, self._vector_search, normalized, filters, query_embedding)
+
+        lexical_ids = lexical_future.result()
+        try:
+            vector_ids = vector_future.result()
+        except (ImportError, OSError, RuntimeError, SQLAlchemyError) as e:
+            # Degrade to lexical-only results if the embedding model is unavailable;
+            # ValueError (a bad query embedding) reaches the caller
+            logger.warning("Vector search failed, using lexical results only: %s", e)
+            vector_ids = []
+
+        results = self._fuse([lexical_ids, vector_ids])[:limit]
+
+        if query_embedding is None:
+            _cache.set(cache_key, results)
+
+        return {'results': results, 'cached': False}
+
+    @staticmethod
+    def _in_app_context(app, fn, *args):
+        """Run a retrieval in a worker thread with its own app context and session"""
+        with app.app_context():
+            try:
+                return fn(*args)
+            finally:
+                db.session.remove()
+
+    def _apply_filters(self, query, filters: Dict):
+        """Apply source, confidence and date filters"""
+        if filters.get('source_id') is not None:
+            query = query.filter(Idea.source_id == filters['source_id'])
+        if filters.get('min_confidence') is not None:
+            query = query.filter(Idea.confidence_score >= filters['min_confidence'])
+        if filters.get('max_confidence') is not None:
+            query = query.filter(Idea.confidence_score <= filters['max_confidence'])
+        if filters.get('created_after') is not None:
+            query = query.filter(Idea.created_at >= filters['created_after'])
+        if filters.get('created_before') is not None:
+            query = query.filter(Idea.created_at <= filters['created_before'])
+        return query
+
+    def _lexical_search(self, normalized_query: str, filters: Dict) -> List[int]:
+        """Rank ideas by weighted term matches in title, claim and abstract"""
+        terms = normalized_query.split()
+        if not terms:
+            return []
+
+        score = None
+        matches = []
+        for term in terms:
+            pattern = f'%{escape_like(term)}%'
+            title_match = Idea.title.ilike(pattern, escape='\\')
+            claim_match = Idea.extracted_claim.ilike(pattern, escape='\\')
+            abstract_match = Idea.abstract.ilike(pattern, escape='\\')
+            term_score = (
+                case((title_match, 3), else_=0) +
+                case((claim_match, 2), else_=0) +
+                case((abstract_match, 1), else_=0)
+            )
+            score = term_score if score is None else score + term_score
+            matches.extend([title_match, abstract_match, claim_match])
+
+        query = db.session.query(Idea.id).filter(db.or_(*matches))
+        query = self._apply_filters(query, filters)
+        rows = query.order_by(
+            score.desc(),
+            Idea.confidence_score.desc(),
+            Idea.created_at.desc()
+        ).limit(self.candidate_pool).all()
+
+        return [row.id for row in rows]
+
+    def _vector_search(self, normalized_query: str, filters: Dict,
+                       query_embedding: Optional[List[float]] = None) -> List[int]:
+        """Rank ideas by cosine similarity to the query embedding"""
+        if query_embedding is None:
+            if not normalized_query:
+                return []
+            query_embedding = IdeaExtractor(self.config).embed_texts([normalized_query])[0]
+
+        # Only the ids of filtered searches are read; the vectors come from the shared index
+        allowed = None
+        if any(value is not None for value in filters.values()):
+            allowed = [idea_id for idea_id, in self._apply_filters(db.session.query(Idea.id), filters)]
+        return [idea_id for idea_id, _ in idea_index.rank(query_embedding, self.candidate_pool, allowed)]
+
+    def _fuse(self, rankings: List[List[int]]) -> List[Tuple[int, float, Optional[int], Optional[int]]]:
+        """
+        Reciprocal rank fusion: score(d) = sum over rankings of 1 / (RRF_K + rank(d))
+        Returns: list of (idea_id, score, lexical_rank, vector_rank), best first
+        """
+        scores = {}
+        ranks = {}
+        for source, ranking in enumerate(rankings):
+            for rank, idea_id in enumerate(ranking, 1):
+                scores[idea_id] = scores.get(idea_id, 0.0) + 1.0 / (RRF_K + rank)
+                ranks.setdefault(idea_id, [None] * len(rankings))[source] = rank
+
+        ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(idea_id, score, *ranks[idea_id]) for idea_id, score in ordered]
+
+
+def parse_search_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date/datetime query parameter"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def get_idea_search_service(config) -> IdeaSearchService:
+    """Factory function to get a hybrid search service"""
+    return IdeaSearchService(config)
@@ -0,0 +1,167 @@
+"""
+Investigation Pipeline
+The evidence-gathering steps of an investigation, declared as data and run as a DAG by
+InvestigationService. INVESTIGATION_PIPELINE may point at a JSON file with a list of steps:
+
+    [
+        {"id": "literature_search", "name": "Literature Search", "description": "...",
+         "prompt": "Search for papers related to: {formalized_claim}"},
+        {"id": "expert_consensus", "name": "Expert Consensus", "description": "...",
+         "prompt": "Given this literature: {literature_search}, what would experts say about {formalized_claim}?",
+         "depends_on": ["literature_search"], "model": "gpt-4o", "temperature": 0.3,
+         "timeout": 30, "fallback": {"result": "No consensus data", "evidence": {"status": "limited_data"}}}
+    ]
+
+Prompts are str.format templates over formalized_claim and the result text of the step's
+dependencies (by id); any other placeholder is rejected when the pipeline is loaded. Steps whose dependencies are done run concurrently. A step's input
+hash covers its id and the rendered request, so it changes whenever an upstream result does.
+"""
+import hashlib
+import json
+import re
+from string import Formatter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.services.llm_cache import cache_key
+
+DEFAULT_FALLBACK = {'result': 'Analysis completed with limited data', 'evidence': {'status': 'limited_data'}}
+
+DEFAULT_PIPELINE = [
+    {
+        "id": "literature_search",
+        "name": "Literature Search",
+        "description": "Search for existing research papers and studies related to this claim",
+        "prompt": "As an AI research investigator, search academic databases for papers related to: {formalized_claim}. Describe what papers you would find, their relevance, and key findings. Be realistic about what research exists in this area."
+    },
+    {
+        "id": "reproducibility_analysis",
+        "name": "Reproducibility Analysis",
+        "description": "Check if results have been independently replicated",
+        "prompt": "Analyze the reproducibility of the claim: {formalized_claim}. Have there been replication studies? What were their outcomes? Be realistic about replication rates in AI research."
+    },
+    {
+        "id": "statistical_evaluation",
+        "name": "Statistical Evaluation",
+        "description": "Evaluate statistical significance of reported results",
+        "prompt": "Evaluate the statistical evidence for: {formalized_claim}. What p-values, confidence intervals, and statistical tests would be relevant? Provide realistic estimates."
+    },
+    {
+        "id": "effect_size_assessment",
+        "name": "Effect Size Assessment",
+        "description": "Determine practical significance of improvements",
+        "prompt": "Assess the practical effect size for: {formalized_claim}. What would be a realistic Cohen's d or other effect size measure? Is the improvement practically meaningful?"
+    },
+    {
+        "id": "expert_consensus",
+        "name": "Expert Consensus",
+        "description": "Analyze expert opinion in the field",
+        "prompt": "What would be the expert consensus on: {formalized_claim}? What percentage of AI safety/ML researchers would agree? What are common counterarguments?"
+    }
+]
+
+
+@dataclass
+class PipelineStep:
+    """One investigation step; timeout is in seconds (None waits for the LLM client's own timeout)"""
+    id: str
+    name: str
+    description: str
+    prompt: str
+    depends_on: List[str] = field(default_factory=list)
+    model: str = "gpt-4o-mini"
+    temperature: float = 0.7
+    timeout: Optional[float] = None
+    fallback: Dict = field(default_factory=lambda: dict(DEFAULT_FALLBACK))
+    
+    def render(self, formalized_claim: str, results: Dict[str, str]) -> str:
+        """The step prompt with the claim and its dependencies' result text filled in"""
+        return self.prompt.format(formalized_claim=formalized_claim, **{dep: results.get(dep, '') for dep in self.depends_on})
+
+
+def step_input_hash(step: PipelineStep, request: Dict) -> str:
+    """Identifies a step run: same step, same rendered request"""
+    return hashlib.sha256(f"{step.id}:{cache_key(request)}".encode('utf-8')).hexdigest()
+
+
+class InvestigationPipeline:
+    """Validated step DAG"""
+    
+    def __init__(self, steps: List[PipelineStep]):
+        ids = [step.id for step in steps]
+        if not steps:
+            raise ValueError("Investigation pipeline has no steps")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Investigation pipeline step ids must be unique")
+        for step in steps:
+            unknown = [dep for dep in step.depends_on if dep not in ids]
+            if unknown:
+                raise ValueError(f"Step {step.id} depends on unknown steps: {', '.join(unknown)}")
+            self._validate_prompt(step)
+        self.steps = steps
+        self.by_id = {step.id: step for step in steps}
+        self._levels = self._topological_levels()
+    
+    @staticmethod
+    def _validate_prompt(step: PipelineStep):
+        """Placeholders must be formalized_claim or a declared dependency, so render() cannot fail mid-run"""
+        try:
+            fields = [field_name for _, field_name, _, _ in Formatter().parse(step.prompt) if field_name is not None]
+        except ValueError as e:
+            raise ValueError(f"Step {step.id} has a malformed prompt template: {e}")
+        allowed = {'formalized_claim', *step.depends_on}
+        unknown = sorted({name for name in (re.split(r'[.\[]', field_name, 1)[0] for field_name in fields) if name not in allowed})
+        if unknown:
+            raise ValueError(
+                f"Step {step.id} prompt uses {', '.join('{' + name + '}' for name in unknown)}; "
+                f"only {{formalized_claim}} and the step's depends_on are available"
+            )
+    
+    @classmethod
+    def from_definition(cls, definition: List[Dict]) -> 'InvestigationPipeline':
+        steps = []
+        for entry in definition:
+            entry = dict(entry)
+            entry.setdefault('id', entry.get('name', '').lower().replace(' ', '_'))
+            entry['fallback'] = {**DEFAULT_FALLBACK, **(entry.get('fallback') or {})}
+            try:
+                steps.append(PipelineStep(**entry))
+            except TypeError as e:
+                raise ValueError(f"Invalid investigation pipeline step {entry['id'] or '(unnamed)'}: {e}")
+        return cls(steps)
+    
+    def _topological_levels(self) -> List[List[PipelineStep]]:
+        levels, done = [], set()
+        remaining = list(self.steps)
+        while remaining:
+            ready = [step for step in remaining if all(dep in done for dep in step.depends_on)]
+            if not ready:
+                raise ValueError("Investigation pipeline has a dependency cycle: " + ', '.join(step.id for step in remaining))
+            levels.append(ready)
+            done.update(step.id for step in ready)
+            remaining = [step for step in remaining if step.id not in done]
+        return levels
+    
+    def levels(self) -> List[List[PipelineStep]]:
+        """Steps grouped so that each group depends only on earlier groups"""
+        return self._levels
+    
+    def topological_order(self) -> List[PipelineStep]:
+        return [step for level in self._levels for step in level]
+
+
+_pipelines: Dict[str, InvestigationPipeline] = {}
+
+
+def get_investigation_pipeline(config) -> InvestigationPipeline:
+    """Pipeline from the INVESTIGATION_PIPELINE JSON file, or the built-in five steps"""
+    path = config.get('INVESTIGATION_PIPELINE') or ''
+    pipeline = _pipelines.get(path)
+    if pipeline is None:
+        if path:
+            with open(path, encoding='utf-8') as f:
+                definition = json.load(f)
+        else:
+            definition = DEFAULT_PIPELINE
+        pipeline = InvestigationPipeline.from_definition(definition)
+        _pipelines[path] = pipeline
+    return pipeline
@@ -2,34 +2,21 @@
 Investigation Service
 Automates the process of formalizing and testing research claims using OpenAI
 """
+import asyncio
 import json
 import time
-from typing import Dict, List, Tuple
-from openai import OpenAI
+from typing import Callable, Dict, List, Optional, Tuple
 from flask import current_app
+from app.services.evidence_library import EvidenceLibrary
+from app.services.investigation_pipeline import (
+    InvestigationPipeline, PipelineStep, get_investigation_pipeline, step_input_hash
+)
+from app.services.llm_cache import LLMCache, get_llm_cache
+from app.services.llm_client import get_llm_client, LLMClient, run_async
+from app.services.llm_metrics import record_llm_calls, summarize_llm_calls
+from app.services.prompt_builder import BuiltPrompt, PromptBuilder
 
-class InvestigationService:
-    """Service for automated claim investigation using OpenAI"""
-    
-    def __init__(self):
-        self.client = None
-    
-    def _get_client(self):
-        """Lazy initialization of OpenAI client"""
-        if self.client is None:
-            api_key = current_app.config.get('OPENAI_API_KEY')
-            if not api_key:
-                raise ValueError("OpenAI API key not configured")
-            self.client = OpenAI(api_key=api_key)
-        return self.client
-    
-    def formalize_claim(self, title: str, abstract: str, claim: str) -> Dict:
-        """
-        Formalize a research claim into a testable hypothesis using OpenAI
-        """
-        client = self._get_client()
-        
-        prompt = f"""You are an AI research scientist specializing in formalizing research claims into testable hypotheses.
+FORMALIZE_PROMPT = """You are an AI research scientist specializing in formalizing research claims into testable hypotheses.
 
 Given the following research paper information:
 
@@ -55,131 +42,13 @@ Return your response in the following JSON format:
 
 Focus on making the hypothesis and criteria as specific and measurable as possible."""
 
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI research scientist who formalizes claims into testable hypotheses. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-            
-        except Exception as e:
-            print(f"Error in formalize_claim: {e}")
-            # Fallback to a basic formalization
-            return {
-                'formalized_claim': f"Testable Hypothesis: {claim}",
-                'test_criteria': [
-                    'Reproducibility: Can the experiment be replicated?',
-                    'Statistical Significance: Does the result meet p < 0.05?',
-                    'Effect Size: Is the improvement practically significant?',
-                    'Generalization: Does it work across different scenarios?'
-                ]
-            }
-    
-    def investigate_claim(self, formalized_claim: str, test_criteria: List[str]) -> Tuple[str, float, List[Dict], List[Dict], str]:
-        """
-        Investigate a formalized claim using OpenAI to simulate a research investigation
-        Returns: (conclusion, confidence, reasoning_steps, evidence, summary)
-        """
-        client = self._get_client()
-        
-        reasoning_steps = []
-        evidence = []
-        
-        # Define the 5-step investigation process
-        investigation_steps = [
-            {
-                "name": "Literature Search",
-                "description": "Search for existing research papers and studies related to this claim",
-                "prompt": f"As an AI research investigator, search academic databases for papers related to: {formalized_claim}. Describe what papers you would find, their relevance, and key findings. Be realistic about what research exists in this area."
-            },
-            {
-                "name": "Reproducibility Analysis",
-                "description": "Check if results have been independently replicated",
-                "prompt": f"Analyze the reproducibility of the claim: {formalized_claim}. Have there been replication studies? What were their outcomes? Be realistic about replication rates in AI research."
-            },
-            {
-                "name": "Statistical Evaluation",
-                "description": "Evaluate statistical significance of reported results",
-                "prompt": f"Evaluate the statistical evidence for: {formalized_claim}. What p-values, confidence intervals, and statistical tests would be relevant? Provide realistic estimates."
-            },
-            {
-                "name": "Effect Size Assessment",
-                "description": "Determine practical significance of improvements",
-                "prompt": f"Assess the practical effect size for: {formalized_claim}. What would be a realistic Cohen's d or other effect size measure? Is the improvement practically meaningful?"
-            },
-            {
-                "name": "Expert Consensus",
-                "description": "Analyze expert opinion in the field",
-                "prompt": f"What would be the expert consensus on: {formalized_claim}? What percentage of AI safety/ML researchers would agree? What are common counterarguments?"
-            }
-        ]
-        
-        # Run each investigation step
-        for i, step in enumerate(investigation_steps, 1):
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """You are an AI research investigator with expertise in AI safety and machine learning. 
-You provide realistic, evidence-based assessments of research claims. Be specific and quantitative when possible.
-Respond in JSON format with 'result' and 'evidence' fields."""
-                        },
-                        {
-                            "role": "user",
-                            "content": f"{step['prompt']}\n\nProvide your findings in JSON format:\n{{\n  \"result\": \"Brief summary of findings\",\n  \"evidence\": {{\"key\": \"value\", ...}}\n}}"
-                        }
-                    ],
-                    temperature=0.7,
-                    response_format={"type": "json_object"}
-                )
-                
-                step_result = json.loads(response.choices[0].message.content)
-                
-                reasoning_steps.append({
-                    'step': i,
-                    'action': step['name'],
-                    'description': step['description'],
-                    'result': step_result.get('result', 'Analysis completed'),
-                    'timestamp': time.time()
-                })
-                
-                evidence.append({
-                    'type': step['name'].lower().replace(' ', '_'),
-                    **step_result.get('evidence', {})
-                })
-                
-            except Exception as e:
-                print(f"Error in step {i}: {e}")
-                # Fallback for this step
-                reasoning_steps.append({
-                    'step': i,
-                    'action': step['name'],
-                    'description': step['description'],
-                    'result': 'Analysis completed with limited data',
-                    'timestamp': time.time()
-                })
-                evidence.append({
-                    'type': step['name'].lower().replace(' ', '_'),
-                    'status': 'limited_data'
-                })
-        
-        # Final conclusion synthesis
-        conclusion_prompt = f"""Based on the investigation of the claim: {formalized_claim}
+CONCLUSION_PROMPT = """Based on the investigation of the claim: {formalized_claim}
 
 Evidence collected:
-{json.dumps(evidence, indent=2)}
+{evidence}
 
 Test Criteria:
-{json.dumps(test_criteria, indent=2)}
+{test_criteria}
 
 Synthesize this evidence and provide:
 1. A conclusion: "true", "likely_true", "inconclusive", "likely_false", or "false"
@@ -193,48 +62,361 @@ Respond in JSON format:
     "summary": "Brief explanation of the conclusion based on evidence"
 }}"""
 
+# (conclusion, confidence, summary) when synthesis fails
+FALLBACK_CONCLUSION = ('inconclusive', 0.6, 'Evidence collected but unable to reach definitive conclusion')
+
+class InvestigationService:
+    """Service for automated claim investigation using OpenAI"""
+    
+    def __init__(self):
+        self.client = None
+    
+    def _get_client(self) -> LLMClient:
+        """Lazy initialization of the shared LLM client"""
+        if self.client is None:
+            self.client = get_llm_client(current_app.config)
+        return self.client
+    
+    def formalize_claim(self, title: str, abstract: str, claim: str, use_cache: bool = True, refresh_cache: bool = False) -> Dict:
+        """
+        Formalize a research claim into a testable hypothesis using OpenAI
+        """
+        client = self._get_client()
+        request, built = self.formalize_request(title, abstract, claim, current_app.config.get('LLM_PROMPT_MAX_TOKENS', 6000))
+        
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an AI research judge who synthesizes evidence to reach conclusions. Be balanced and realistic in your assessments."
-                    },
-                    {
-                        "role": "user",
-                        "content": conclusion_prompt
-                    }
-                ],
-                temperature=0.5,
-                response_format={"type": "json_object"}
+            content = client.complete(
+                'formalize_claim',
+                use_cache=use_cache,
+                refresh=refresh_cache,
+                prompt_report=built.report,
+                **request
             )
+            return self.parse_formalized(content)
             
-            final_result = json.loads(response.choices[0].message.content)
-            conclusion = final_result.get('conclusion', 'inconclusive')
-            confidence = float(final_result.get('confidence', 0.7))
-            summary = final_result.get('summary', 'Evidence analysis completed')
+        except Exception as e:
+            print(f"Error in formalize_claim: {e}")
+            client.metrics.record_fallback('formalize_claim')
+            return self.fallback_formalized(claim)
+    
+    def formalize_request(self, title: str, abstract: str, claim: str, prompt_max_tokens: int = 6000) -> Tuple[Dict, BuiltPrompt]:
+        """Chat-completion arguments for formalize_claim, and how the prompt was fitted"""
+        # Long abstracts are summarized down to their first and result-bearing sentences
+        built = (PromptBuilder(prompt_max_tokens, model="gpt-4o-mini")
+                 .add('title', title, budget=100)
+                 .add('abstract', abstract, budget=800, priority=1, strategy='summarize')
+                 .add('claim', claim, budget=300)
+                 .render(FORMALIZE_PROMPT))
+        request = {
+            'model': "gpt-4o-mini",
+            'messages': [
+                {"role": "system", "content": "You are a helpful AI research scientist who formalizes claims into testable hypotheses. Always respond with valid JSON."},
+                {"role": "user", "content": built.text}
+            ],
+            'temperature': 0.7,
+            'response_format': {"type": "json_object"}
+        }
+        return request, built
+    
+    def parse_formalized(self, content: str) -> Dict:
+        """formalize_claim response -> {'formalized_claim', 'test_criteria'}"""
+        return json.loads(content)
+    
+    def fallback_formalized(self, claim: str) -> Dict:
+        """Basic formalization used when the LLM call fails"""
+        return {
+            'formalized_claim': f"Testable Hypothesis: {claim}",
+            'test_criteria': [
+                'Reproducibility: Can the experiment be replicated?',
+                'Statistical Significance: Does the result meet p < 0.05?',
+                'Effect Size: Is the improvement practically significant?',
+                'Generalization: Does it work across different scenarios?'
+            ]
+        }
+    
+    @property
+    def pipeline(self) -> InvestigationPipeline:
+        """The investigation steps (see app/services/investigation_pipeline.py)"""
+        return get_investigation_pipeline(current_app.config)
+    
+    async def _run_pipeline(self, client: LLMClient, step_cache: LLMCache, max_concurrency: int, cache_options: Dict,
+                            formalized_claim: str, step_callback: Optional[Callable] = None,
+                            reused_steps: Optional[Dict] = None, resume_steps: Optional[Dict] = None) -> List[Tuple[Dict, Dict]]:
+        """
+        Run the pipeline as a DAG: every step starts as soon as its dependencies are done
+        reused_steps are taken as is; resume_steps (persisted by an earlier run) and step
+        cache entries are used when their input hash matches the step's rendered request.
+        Returns (reasoning_step, evidence_item) per step, in pipeline order.
+        """
+        pipeline = self.pipeline
+        semaphore = asyncio.Semaphore(max_concurrency)
+        reused_steps = reused_steps or {}
+        resume_steps = resume_steps or {}
+        numbers = {step.id: i for i, step in enumerate(pipeline.steps, 1)}
+        tasks: Dict[str, asyncio.Future] = {}
+        callback_lock = asyncio.Lock()
+        
+        async def run(step: PipelineStep) -> Tuple[Dict, Dict]:
+            outputs = await asyncio.gather(*[tasks[dep] for dep in step.depends_on])
+            i = numbers[step.id]
+            if step.id in reused_steps:
+                reasoning_step, evidence_item = reused_steps[step.id]
+                result = {**reasoning_step, 'step': i}, evidence_item
+            else:
+                results = {dep: output[0].get('result', '') for dep, output in zip(step.depends_on, outputs)}
+                request = self.step_request(step, step.render(formalized_claim, results))
+                input_hash = step_input_hash(step, request)
+                # The step cache is SQLite or Redis; keep its I/O off the event loop
+                result = await asyncio.to_thread(
+                    self._stored_step, i, input_hash, resume_steps.get(step.id), step_cache, cache_options
+                )
+                if result is None:
+                    result = await self._run_step(client, cache_options, semaphore, i, step, request)
+                    if cache_options['use_cache'] and not result[0].get('fallback'):
+                        await asyncio.to_thread(step_cache.set, f'step:{input_hash}', json.dumps(result))
+                result[0]['input_hash'] = input_hash
+            if step_callback:
+                # Callbacks commit to the database; run them off the event loop, one at a
+                # time since they share the job's session
+                async with callback_lock:
+                    await asyncio.to_thread(step_callback, *result)
+            return result
+        
+        # Created in topological order so every dependency's task exists before its dependents
+        for step in pipeline.topological_order():
+            tasks[step.id] = asyncio.ensure_future(run(step))
+        return await asyncio.gather(*[tasks[step.id] for step in pipeline.steps])
+    
+    def _stored_step(self, i: int, input_hash: str, prior: Optional[Tuple[Dict, Dict]], step_cache: LLMCache,
+                     cache_options: Dict) -> Optional[Tuple[Dict, Dict]]:
+        """A persisted or cached output of the same step run, if there is one"""
+        if prior and prior[0].get('input_hash') == input_hash and not prior[0].get('fallback'):
+            return {**prior[0], 'step': i}, prior[1]
+        if cache_options['use_cache'] and not cache_options['refresh']:
+            cached = step_cache.get(f'step:{input_hash}')
+            if cached:
+                reasoning_step, evidence_item = json.loads(cached)
+                return {**reasoning_step, 'step': i, 'timestamp': time.time(), 'llm': None, 'cached': True}, evidence_item
+        return None
+    
+    def persisted_steps(self, reasoning_steps: List[Dict], evidence: List[Dict]) -> Dict[str, Tuple[Dict, Dict]]:
+        """Stored reasoning steps and evidence -> {step id: (reasoning_step, evidence_item)}"""
+        return {
+            evidence_item['type']: (reasoning_step, evidence_item)
+            for reasoning_step, evidence_item in zip(reasoning_steps or [], evidence or [])
+            if evidence_item.get('type')
+        }
+    
+    async def _run_step(self, client: LLMClient, cache_options: Dict, semaphore: asyncio.Semaphore,
+                        i: int, step: PipelineStep, request: Dict) -> Tuple[Dict, Dict]:
+        """
+        Run one investigation step, falling back to the step's fallback result on error or timeout
+        The step's LLM call details (tokens, latency, retries, cache hit) are kept under 'llm'
+        """
+        with record_llm_calls() as calls:
+            reasoning_step, evidence_item = await self._run_step_call(client, cache_options, semaphore, i, step, request)
+        reasoning_step['llm'] = summarize_llm_calls(calls)
+        return reasoning_step, evidence_item
+    
+    async def _run_step_call(self, client: LLMClient, cache_options: Dict, semaphore: asyncio.Semaphore,
+                             i: int, step: PipelineStep, request: Dict) -> Tuple[Dict, Dict]:
+        try:
+            async with semaphore:
+                call = client.acomplete('investigation_step', stage=step.id, **cache_options, **request)
+                content = await asyncio.wait_for(call, step.timeout) if step.timeout else await call
+            return self.parse_step(i, step, content)
+            
+        except Exception as e:
+            print(f"Error in step {i} ({step.id}): {str(e) or type(e).__name__}")
+            client.metrics.record_fallback('investigation_step', step.id)
+            return self.fallback_step(i, step)
+    
+    def step_request(self, step: PipelineStep, prompt: str) -> Dict:
+        """Chat-completion arguments for one investigation step, given its rendered prompt"""
+        return {
+            'model': step.model,
+            'messages': [
+                {
+                    "role": "system",
+                    "content": """You are an AI research investigator with expertise in AI safety and machine learning. 
+You provide realistic, evidence-based assessments of research claims. Be specific and quantitative when possible.
+Respond in JSON format with 'result' and 'evidence' fields."""
+                },
+                {
+                    "role": "user",
+                    "content": f"{prompt}\n\nProvide your findings in JSON format:\n{{\n  \"result\": \"Brief summary of findings\",\n  \"evidence\": {{\"key\": \"value\", ...}}\n}}"
+                }
+            ],
+            'temperature': step.temperature,
+            'response_format': {"type": "json_object"}
+        }
+    
+    def parse_step(self, i: int, step: PipelineStep, content: str) -> Tuple[Dict, Dict]:
+        """Step response -> (reasoning_step, evidence_item)"""
+        step_result = json.loads(content)
+        reasoning_step = {
+            'step': i,
+            'action': step.name,
+            'description': step.description,
+            'result': step_result.get('result', 'Analysis completed'),
+            'timestamp': time.time()
+        }
+        evidence_item = {
+            'type': step.id,
+            **step_result.get('evidence', {})
+        }
+        return reasoning_step, evidence_item
+    
+    def fallback_step(self, i: int, step: PipelineStep) -> Tuple[Dict, Dict]:
+        """The step's fallback result, used when its LLM call fails or times out"""
+        reasoning_step = {
+            'step': i,
+            'action': step.name,
+            'description': step.description,
+            'result': step.fallback.get('result', 'Analysis completed with limited data'),
+            'timestamp': time.time(),
+            'fallback': True
+        }
+        evidence_item = {
+            'type': step.id,
+            **step.fallback.get('evidence', {})
+        }
+        return reasoning_step, evidence_item
+    
+    async def _synthesize_conclusion(self, client: LLMClient, cache_options: Dict, formalized_claim: str,
+                                     test_criteria: List[str], evidence: List[Dict],
+                                     prompt_max_tokens: int = 6000) -> Tuple[str, float, str]:
+        """Synthesize a conclusion from the collected evidence"""
+        request, built = self.conclusion_request(formalized_claim, test_criteria, evidence, prompt_max_tokens)
+        try:
+            content = await client.acomplete(
+                'investigation_conclusion',
+                **cache_options,
+                prompt_report=built.report,
+                **request
+            )
+            return self.parse_conclusion(content)
             
         except Exception as e:
             print(f"Error in conclusion synthesis: {e}")
-            # Fallback conclusion
-            conclusion = 'inconclusive'
-            confidence = 0.6
-            summary = 'Evidence collected but unable to reach definitive conclusion'
+            client.metrics.record_fallback('investigation_conclusion')
+            return FALLBACK_CONCLUSION
+    
+    def conclusion_request(self, formalized_claim: str, test_criteria: List[str], evidence: List[Dict],
+                           prompt_max_tokens: int = 6000) -> Tuple[Dict, BuiltPrompt]:
+        """
+        Chat-completion arguments for the conclusion, and how the prompt was fitted
+        Evidence and criteria are serialized compactly and fitted to their budgets; when the
+        prompt is still over prompt_max_tokens the criteria are cut before the evidence.
+        """
+        built = (PromptBuilder(prompt_max_tokens, model="gpt-4o-mini")
+                 .add('formalized_claim', formalized_claim, budget=300)
+                 .add('evidence', evidence, budget=2500, priority=1, strategy='summarize')
+                 .add('test_criteria', test_criteria, budget=600, priority=2)
+                 .render(CONCLUSION_PROMPT))
+        request = {
+            'model': "gpt-4o-mini",
+            'messages': [
+                {
+                    "role": "system",
+                    "content": "You are an AI research judge who synthesizes evidence to reach conclusions. Be balanced and realistic in your assessments."
+                },
+                {
+                    "role": "user",
+                    "content": built.text
+                }
+            ],
+            'temperature': 0.5,
+            'response_format': {"type": "json_object"}
+        }
+        return request, built
+    
+    def parse_conclusion(self, content: str) -> Tuple[str, float, str]:
+        """Conclusion response -> (conclusion, confidence, summary)"""
+        final_result = json.loads(content)
+        return (
+            final_result.get('conclusion', 'inconclusive'),
+            float(final_result.get('confidence', 0.7)),
+            final_result.get('summary', 'Evidence analysis completed')
+        )
+    
+    async def _investigate_claim_async(self, client: LLMClient, step_cache: LLMCache, max_concurrency: int,
+                                       cache_options: Dict, formalized_claim: str, test_criteria: List[str],
+                                       step_callback: Optional[Callable] = None, prompt_max_tokens: int = 6000,
+                                       reused_steps: Optional[Dict] = None, resume_steps: Optional[Dict] = None):
+        results = await self._run_pipeline(
+            client, step_cache, max_concurrency, cache_options, formalized_claim, step_callback, reused_steps, resume_steps
+        )
+        reasoning_steps = [reasoning_step for reasoning_step, _ in results]
+        evidence = [evidence_item for _, evidence_item in results]
+        
+        conclusion, confidence, summary = await self._synthesize_conclusion(
+            client, cache_options, formalized_claim, test_criteria, evidence, prompt_max_tokens
+        )
         
         return conclusion, confidence, reasoning_steps, evidence, summary
     
-    def run_investigation(self, title: str, abstract: str, claim: str) -> Dict:
+    def investigate_claim(self, formalized_claim: str, test_criteria: List[str], use_cache: bool = True,
+                          refresh_cache: bool = False, step_callback: Optional[Callable] = None,
+                          reused_steps: Optional[Dict] = None,
+                          resume_steps: Optional[Dict] = None) -> Tuple[str, float, List[Dict], List[Dict], str]:
+        """
+        Investigate a formalized claim using OpenAI to simulate a research investigation
+        The pipeline's evidence steps run as a DAG, then the conclusion is synthesized.
+        step_callback(reasoning_step, evidence_item) is called as each step finishes.
+        reused_steps ({step id: (reasoning_step, evidence_item)}, see evidence_library.py) are
+        taken as is instead of being run; resume_steps (same shape, see persisted_steps) only
+        when their input hash still matches.
+        Returns: (conclusion, confidence, reasoning_steps, evidence, summary)
+        """
+        client = self._get_client()
+        step_cache = get_llm_cache(current_app.config)
+        max_concurrency = current_app.config.get('INVESTIGATION_MAX_CONCURRENCY', 5)
+        cache_options = {'use_cache': use_cache, 'refresh': refresh_cache}
+        prompt_max_tokens = current_app.config.get('LLM_PROMPT_MAX_TOKENS', 6000)
+        
+        return run_async(self._investigate_claim_async(
+            client, step_cache, max_concurrency, cache_options, formalized_claim, test_criteria, step_callback,
+            prompt_max_tokens, reused_steps, resume_steps
+        ))
+    
+    def run_investigation(self, title: str, abstract: str, claim: str, progress_callback=None,
+                          use_cache: bool = True, refresh_cache: bool = False,
+                          formalized_callback=None, step_callback=None, reuse_evidence: bool = True,
+                          formalized: Optional[Dict] = None, resume_steps: Optional[Dict] = None) -> Dict:
         """
         Run complete investigation pipeline
+        progress_callback(fraction, message) is called between stages if given;
+        formalized_callback(formalized) and step_callback(reasoning_step, evidence_item)
+        receive partial results as they are produced;
+        use_cache/refresh_cache are passed to every LLM call (see app/services/llm_cache.py).
+        With reuse_evidence (and no refresh_cache), step evidence is copied from a completed
+        investigation of a near-identical formalized claim; the result's provenance says which.
+        A resumed run passes the formalized claim and steps persisted by the interrupted run.
         """
         # Formalize the claim
-        formalized = self.formalize_claim(title, abstract, claim)
+        if formalized is None:
+            if progress_callback:
+                progress_callback(0.05, 'Formalizing claim')
+            formalized = self.formalize_claim(title, abstract, claim, use_cache, refresh_cache)
+        if formalized_callback:
+            formalized_callback(formalized)
+        
+        # Look for evidence from investigations of the same claim
+        match = EvidenceLibrary(current_app.config).lookup(formalized['formalized_claim'])
+        reused_steps = match.steps if reuse_evidence and not refresh_cache else {}
         
         # Investigate
+        if progress_callback:
+            progress_callback(0.25, 'Investigating claim')
         conclusion, confidence, reasoning_steps, evidence, summary = self.investigate_claim(
             formalized['formalized_claim'],
-            formalized['test_criteria']
+            formalized['test_criteria'],
+            use_cache,
+            refresh_cache,
+            step_callback,
+            reused_steps,
+            resume_steps
         )
         
         return {
@@ -244,7 +426,9 @@ Respond in JSON format:
             'confidence': confidence,
             'reasoning_steps': reasoning_steps,
             'evidence': evidence,
-            'summary': summary
+            'summary': summary,
+            'claim_embedding': match.embedding,
+            'provenance': match.provenance if reused_steps else None
         }
 
 
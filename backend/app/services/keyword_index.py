@@ -0,0 +1,101 @@
+"""
+Keyword index service
+Related-idea lookups over the normalized idea_keywords table
+"""
+from typing import Dict, List, Tuple
+from sqlalchemy import func, insert
+from app import db
+from app.models import Idea, IdeaKeyword
+from app.models.idea import normalize_keywords
+
+
+def get_related_ideas(idea: Idea, limit: int = 10) -> List[Tuple[Idea, int]]:
+    """
+    Find ideas sharing keywords with `idea`
+    Ranked by number of shared keywords, then recency
+    Returns: list of (idea, shared_keyword_count)
+    """
+    keywords = [link.keyword for link in idea.keyword_links] or normalize_keywords(idea.keywords)
+    if not keywords:
+        return []
+    
+    shared = func.count(IdeaKeyword.keyword).label('shared')
+    matches = db.session.query(
+        IdeaKeyword.idea_id.label('idea_id'),
+        shared
+    ).filter(
+        IdeaKeyword.keyword.in_(keywords),
+        IdeaKeyword.idea_id != idea.id
+    ).group_by(IdeaKeyword.idea_id).subquery()
+    
+    rows = db.session.query(Idea, matches.c.shared).join(
+        matches, matches.c.idea_id == Idea.id
+    ).order_by(
+        matches.c.shared.desc(),
+        Idea.created_at.desc(),
+        Idea.id.desc()
+    ).limit(limit).all()
+    
+    return [(related, count) for related, count in rows]
+
+
+def bulk_insert_ideas(rows: List[Dict]) -> List[int]:
+    """
+    Insert many ideas and their keyword links with two multi-row INSERTs
+    rows are Idea column dicts; 'keywords' may be a list or comma-separated string.
+    Does not commit. Returns: new idea ids, in row order
+    """
+    if not rows:
+        return []
+    
+    keyword_lists = []
+    values = []
+    for row in rows:
+        row = dict(row)
+        keywords = row.get('keywords') or ''
+        if isinstance(keywords, (list, tuple)):
+            keywords = ', '.join(str(k).strip() for k in keywords if str(k).strip())
+        row['keywords'] = keywords
+        keyword_lists.append(normalize_keywords(keywords))
+        values.append(row)
+    
+    result = db.session.execute(
+        insert(Idea).returning(Idea.id, sort_by_parameter_order=True),
+        values
+    )
+    ids = [row.id for row in result]
+    
+    links = [
+        {'idea_id': idea_id, 'keyword': keyword}
+        for idea_id, keywords in zip(ids, keyword_lists)
+        for keyword in keywords
+    ]
+    if links:
+        db.session.execute(IdeaKeyword.__table__.insert(), links)
+    
+    return ids
+
+
+def backfill_idea_keywords(batch_size: int = 500) -> int:
+    """
+    Populate idea_keywords from the comma-separated Idea.keywords column
+    Safe to re-run: ideas are re-synced through the model validator
+    Returns: number of ideas processed
+    """
+    processed = 0
+    last_id = 0
+    
+    while True:
+        ideas = Idea.query.filter(Idea.id > last_id).order_by(Idea.id).limit(batch_size).all()
+        if not ideas:
+            break
+        
+        for idea in ideas:
+            # Re-assigning runs the validator, which rebuilds the association rows
+            idea.keywords = idea.keywords
+        
+        db.session.commit()
+        processed += len(ideas)
+        last_id = ideas[-1].id
+    
+    return processed
@@ -0,0 +1,226 @@
+"""
+LLM Batch Backends
+Bulk work is written as a JSONL file of chat-completion requests in the OpenAI Batch API
+format, submitted, polled until done and read back. Backends (LLM_BATCH_BACKEND):
+    openai  - the OpenAI Batch API (50% cheaper, results within the 24h window)
+    local   - processes the file in a background thread through the regular LLM client
+              (rate limiter, cache, fake backend); output is appended line by line, so an
+              interrupted file is resumed where it stopped
+Each line's custom_id is "<task>:<request hash>", so identical requests are sent once.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from app.services.llm_cache import cache_key
+from app.services.llm_client import get_llm_client, run_async
+from app.services.llm_rate_limiter import llm_priority
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+
+
+def batch_custom_id(task: str, request: Dict) -> str:
+    return f"{task}:{cache_key(request)}"
+
+
+def custom_id_task(custom_id: str) -> str:
+    return custom_id.split(':', 1)[0]
+
+
+def write_batch_file(path: str, requests: Iterable[Tuple[str, Dict]]) -> int:
+    """Write (custom_id, request) pairs as batch input lines; returns the line count"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for custom_id, request in requests:
+            f.write(json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': BATCH_ENDPOINT, 'body': request}) + '\n')
+            count += 1
+    return count
+
+
+def read_batch_output(path: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """Batch output file -> {custom_id: (content, error)}; exactly one of the two is set"""
+    results = {}
+    if not path or not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted local run
+            response = record.get('response') or {}
+            if record.get('error') or response.get('status_code', 200) != 200:
+                error = record.get('error') or response.get('body', {}).get('error') or {}
+                results[record['custom_id']] = (None, error.get('message', str(error)) if isinstance(error, dict) else str(error))
+                continue
+            try:
+                results[record['custom_id']] = (response['body']['choices'][0]['message']['content'], None)
+            except (KeyError, IndexError, TypeError):
+                results[record['custom_id']] = (None, 'Malformed batch response')
+    return results
+
+
+def _output_line(custom_id: str, request: Dict, content: Optional[str] = None, error: Optional[Exception] = None) -> str:
+    """An output line in the OpenAI batch format"""
+    if error is not None:
+        record = {'custom_id': custom_id, 'response': None, 'error': {'message': str(error)}}
+    else:
+        record = {
+            'custom_id': custom_id,
+            'response': {
+                'status_code': 200,
+                'body': {
+                    'object': 'chat.completion',
+                    'model': request.get('model'),
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]
+                }
+            },
+            'error': None
+        }
+    return json.dumps(record) + '\n'
+
+
+class BatchBackend:
+    """submit a batch input file, poll its status, download its output"""
+    name = None
+    
+    def submit(self, input_path: str) -> str:
+        raise NotImplementedError
+    
+    def status(self, remote_id: str) -> str:
+        """'in_progress', 'completed' or 'failed'"""
+        raise NotImplementedError
+    
+    def download(self, remote_id: str, output_path: str):
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API"""
+    name = 'openai'
+    
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        from openai import OpenAI
+        self._client = OpenAI(api_key=api_key, base_url=base_url or None)
+    
+    def submit(self, input_path):
+        with open(input_path, 'rb') as f:
+            input_file = self._client.files.create(file=f, purpose='batch')
+        batch = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window='24h'
+        )
+        return batch.id
+    
+    def status(self, remote_id):
+        batch = self._client.batches.retrieve(remote_id)
+        if batch.status in ('completed', 'expired', 'cancelled'):
+            # Expired and cancelled batches still return the requests that finished
+            return 'completed' if (batch.output_file_id or batch.error_file_id) else 'failed'
+        if batch.status == 'failed':
+            return 'failed'
+        return 'in_progress'
+    
+    def download(self, remote_id, output_path):
+        batch = self._client.batches.retrieve(remote_id)
+        with open(output_path, 'wb') as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(self._client.files.content(file_id).read())
+
+
+# Local batches being processed in this process, by input path
+_local_runs: Dict[str, threading.Thread] = {}
+_local_runs_lock = threading.Lock()
+
+
+class LocalBatchBackend(BatchBackend):
+    """Stand-in for the Batch API that runs the file through the regular LLM client"""
+    name = 'local'
+    
+    def __init__(self, config):
+        self.config = config
+    
+    @staticmethod
+    def _paths(remote_id: str) -> Tuple[str, str, str]:
+        input_path = remote_id.split(':', 1)[1]
+        return input_path, input_path + '.out', input_path + '.done'
+    
+    def submit(self, input_path):
+        remote_id = f'local:{input_path}'
+        self._ensure_running(remote_id)
+        return remote_id
+    
+    def status(self, remote_id):
+        input_path, _, done_path = self._paths(remote_id)
+        if os.path.exists(done_path):
+            return 'completed'
+        if not os.path.exists(input_path):
+            return 'failed'
+        # Resume a run whose process went away
+        self._ensure_running(remote_id)
+        return 'in_progress'
+    
+    def download(self, remote_id, output_path):
+        _, out_path, _ = self._paths(remote_id)
+        if os.path.abspath(out_path) != os.path.abspath(output_path):
+            with open(out_path, 'rb') as src, open(output_path, 'wb') as dst:
+                dst.write(src.read())
+    
+    def _ensure_running(self, remote_id: str):
+        input_path = self._paths(remote_id)[0]
+        with _local_runs_lock:
+            thread = _local_runs.get(input_path)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._process, args=(remote_id,), daemon=True,
+                                      name=f'llm-batch-{os.path.basename(input_path)}')
+            _local_runs[input_path] = thread
+            thread.start()
+    
+    def _process(self, remote_id: str):
+        input_path, out_path, done_path = self._paths(remote_id)
+        try:
+            done = set(read_batch_output(out_path))
+            with open(input_path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            pending = [line for line in lines if line['custom_id'] not in done]
+            with llm_priority('batch'):
+                run_async(self._process_async(pending, out_path))
+            open(done_path, 'w').close()
+        except Exception as e:
+            print(f"Local LLM batch {input_path} stopped: {e}")
+    
+    async def _process_async(self, lines, out_path: str):
+        client = get_llm_client(self.config)
+        semaphore = asyncio.Semaphore(self.config.get('LLM_BATCH_LOCAL_CONCURRENCY', 8))
+        
+        with open(out_path, 'a', encoding='utf-8') as out:
+            async def run(line):
+                async with semaphore:
+                    try:
+                        content = await client.acomplete(custom_id_task(line['custom_id']), **line['body'])
+                        out.write(_output_line(line['custom_id'], line['body'], content))
+                    except Exception as e:
+                        out.write(_output_line(line['custom_id'], line['body'], error=e))
+                    out.flush()
+            
+            await asyncio.gather(*[run(line) for line in lines])
+
+
+def get_batch_backend(config) -> BatchBackend:
+    """Batch backend for LLM_BATCH_BACKEND (openai or local)"""
+    backend = config.get('LLM_BATCH_BACKEND', 'local')
+    if backend == 'openai':
+        api_key = config.get('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OpenAI API key not configured")
+        return OpenAIBatchBackend(api_key, config.get('OPENAI_BASE_URL'))
+    if backend == 'local':
+        return LocalBatchBackend(config)
+    raise ValueError(f"Unknown LLM_BATCH_BACKEND: {backend}")
@@ -0,0 +1,278 @@
+"""
+LLM Response Cache
+Content-addressed cache in front of chat-completion calls. Entries are keyed by a hash
+of the request (model, messages, temperature, response format, ...) and stored in
+SQLite or Redis with a TTL and size-bounded LRU eviction.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# Request fields that change the completion; anything else (timeouts, headers) is ignored
+KEY_FIELDS = ('model', 'messages', 'temperature', 'response_format', 'max_tokens', 'top_p', 'seed')
+
+
+def cache_key(request: Dict) -> str:
+    """SHA-256 of the canonical JSON of the request's key fields"""
+    payload = {field: request.get(field) for field in KEY_FIELDS if request.get(field) is not None}
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Base cache: lookup()/store() around an LLM call, with hit/miss counters
+    Subclasses implement _get/_set/_clear/size against a store. Store failures are
+    logged and treated as misses so the cache can never break a call.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'bypassed': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self._get(key)
+        except Exception as e:
+            print(f"LLM cache read failed: {e}")
+            self._count('errors')
+            return None
+
+    def set(self, key: str, value: str):
+        try:
+            self._set(key, value)
+            self._count('writes')
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+            self._count('errors')
+
+    def lookup(self, request: Dict, use_cache: bool = True, refresh: bool = False):
+        """
+        Returns (key, cached content or None); key is None when the cache is bypassed
+        use_cache=False skips the cache entirely; refresh=True ignores any cached entry
+        but still returns a key so the fresh response gets stored.
+        """
+        if not use_cache:
+            self._count('bypassed')
+            return None, None
+        key = cache_key(request)
+        if refresh:
+            self._count('refreshes')
+            return key, None
+        content = self.get(key)
+        self._count('hits' if content is not None else 'misses')
+        return key, content
+
+    def store(self, key: Optional[str], content: Optional[str]):
+        """Store a fresh response under the key returned by lookup()"""
+        if key is not None and content is not None:
+            self.set(key, content)
+
+    async def alookup(self, request: Dict, use_cache: bool = True, refresh: bool = False):
+        """lookup() for coroutines; the store read runs on a worker thread so it cannot stall the event loop"""
+        if not use_cache or refresh:
+            return self.lookup(request, use_cache, refresh)
+        return await asyncio.to_thread(self.lookup, request, use_cache, refresh)
+
+    async def astore(self, key: Optional[str], content: Optional[str]):
+        """store() for coroutines, off the event loop"""
+        if key is not None and content is not None:
+            await asyncio.to_thread(self.store, key, content)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        try:
+            stats['entries'] = self.size()
+        except Exception as e:
+            print(f"LLM cache size failed: {e}")
+            stats['entries'] = None
+        stats['backend'] = self.backend
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['max_entries'] = self.max_entries
+        return stats
+
+    def clear(self):
+        self._clear()
+
+
+class NullLLMCache(LLMCache):
+    """Cache disabled: every call goes to the API"""
+    backend = 'none'
+
+    def lookup(self, request, use_cache=True, refresh=False):
+        self._count('bypassed')
+        return None, None
+
+    async def alookup(self, request, use_cache=True, refresh=False):
+        return self.lookup(request, use_cache, refresh)
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+    def _clear(self):
+        pass
+
+    def size(self):
+        return 0
+
+
+class SQLiteLLMCache(LLMCache):
+    """Single-file SQLite store, shared by all workers on the host"""
+    backend = 'sqlite'
+
+    # Eviction runs every few writes rather than on each one
+    EVICT_EVERY = 32
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)')
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                return None
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            return value
+
+    def _set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + self.ttl_seconds, now)
+            )
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.EVICT_EVERY:
+                self._writes_since_evict = 0
+                self._evict(now)
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        evicted = self._conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,)).rowcount
+        (count,) = self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()
+        if count > self.max_entries:
+            evicted += self._conn.execute(
+                'DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)',
+                (count - self.max_entries,)
+            ).rowcount
+        if evicted:
+            self._count('evictions', evicted)
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+
+    def size(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+
+class RedisLLMCache(LLMCache):
+    """
+    Redis store shared by all hosts
+    Values expire via Redis TTLs; a sorted set of access times drives LRU trimming.
+    """
+    backend = 'redis'
+    PREFIX = 'llmcache:'
+    LRU_KEY = 'llmcache:lru'
+
+    def __init__(self, url: str, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def _get(self, key):
+        value = self._redis.get(self.PREFIX + key)
+        if value is None:
+            self._redis.zrem(self.LRU_KEY, key)
+            return None
+        self._redis.zadd(self.LRU_KEY, {key: time.time()})
+        return value.decode('utf-8')
+
+    def _set(self, key, value):
+        pipe = self._redis.pipeline()
+        pipe.set(self.PREFIX + key, value, ex=self.ttl_seconds)
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.zcard(self.LRU_KEY)
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            excess = self._redis.zrange(self.LRU_KEY, 0, count - self.max_entries - 1)
+            if excess:
+                pipe = self._redis.pipeline()
+                pipe.delete(*[self.PREFIX + k.decode('utf-8') for k in excess])
+                pipe.zrem(self.LRU_KEY, *excess)
+                pipe.execute()
+                self._count('evictions', len(excess))
+
+    def _clear(self):
+        keys = self._redis.zrange(self.LRU_KEY, 0, -1)
+        if keys:
+            self._redis.delete(*[self.PREFIX + k.decode('utf-8') for k in keys])
+        self._redis.delete(self.LRU_KEY)
+
+    def size(self):
+        return self._redis.zcard(self.LRU_KEY)
+
+
+_caches: Dict[tuple, LLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(config) -> LLMCache:
+    """Process-wide LLM cache for the configured backend (sqlite, redis or none)"""
+    backend = config.get('LLM_CACHE_BACKEND', 'sqlite')
+    ttl_seconds = int(config.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    max_entries = int(config.get('LLM_CACHE_MAX_ENTRIES', 10000))
+    location = config.get('REDIS_URL') if backend == 'redis' else config.get('LLM_CACHE_PATH', 'llm_cache.db')
+    settings = (backend, location, ttl_seconds, max_entries)
+
+    with _caches_lock:
+        cache = _caches.get(settings)
+        if cache is None:
+            if backend == 'redis':
+                cache = RedisLLMCache(location, ttl_seconds, max_entries)
+            elif backend == 'sqlite':
+                cache = SQLiteLLMCache(location, ttl_seconds, max_entries)
+            elif backend == 'none':
+                cache = NullLLMCache(ttl_seconds, max_entries)
+            else:
+                raise ValueError(f"Unknown LLM_CACHE_BACKEND: {backend}")
+            _caches[settings] = cache
+        return cache
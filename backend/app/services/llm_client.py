@@ -0,0 +1,677 @@
+"""
+LLM Client
+Single chat-completion interface used by every service. The OpenAI backend shares one
+pooled HTTP client per process (with timeouts); the fake backend returns deterministic,
+schema-valid responses with configurable latency and error injection so the claim,
+investigation, code-generation and bettor pipelines can run offline. Every call is
+recorded in the LLM metrics (tokens, latency, retries, cache hits; see llm_metrics.py).
+Calls from call sites with a latency budget are hedged and cut off at their deadline
+(see llm_deadlines.py).
+"""
+import asyncio
+import contextvars
+import json
+import random
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from app.services.llm_cache import LLMCache, cache_key, get_llm_cache
+from app.services.llm_deadlines import LatencyBudget, LLMDeadlineExceeded, get_latency_budgets
+from app.services.llm_metrics import LLMMetrics, get_llm_metrics
+from app.services.llm_rate_limiter import (
+    LLMRateLimiter, get_rate_limiter, current_priority, estimate_tokens, is_retryable_error
+)
+
+
+class _CallAbandoned(Exception):
+    """A hedged request stopped because its caller has already returned"""
+
+
+class LLMError(Exception):
+    """Raised by the fake backend for injected failures (status_code 429 for simulated throttling)"""
+    retryable = True
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """Threads for budgeted sync calls; a request past its deadline finishes here unobserved"""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix='llm-hedge')
+        return _hedge_executor
+
+
+class LLMClient:
+    """
+    Chat-completion client returning the message content as a string
+    Every call carries a `task` label (e.g. 'formalize_claim') naming the call site;
+    backends may use it (the fake backend picks its response schema from it).
+    Calls are admitted by the shared rate limiter at the caller's priority (see
+    llm_priority) and retried with jittered backoff on 429s and transient errors.
+    An optional `stage` further labels the call in the metrics (e.g. which investigation step).
+    Tasks with a latency budget (not at batch priority) are hedged and raise
+    LLMDeadlineExceeded at the budget's deadline; stream() is not budgeted.
+    """
+    backend = None
+
+    def __init__(self, cache: LLMCache, limiter: LLMRateLimiter, metrics: Optional[LLMMetrics] = None):
+        self.cache = cache
+        self.limiter = limiter
+        self.metrics = metrics or LLMMetrics()
+        self.budgets: Dict[str, LatencyBudget] = {}
+
+    def complete(self, task: str, use_cache: bool = True, refresh: bool = False, stage: Optional[str] = None,
+                 prompt_report: Optional[Dict] = None, **request) -> str:
+        """
+        Run a chat completion through the response cache
+        request holds the usual chat.completions.create arguments (model, messages, ...);
+        prompt_report (from PromptBuilder) is kept with the call's metrics record
+        """
+        started = time.monotonic()
+        stats = {'attempts': 0, 'usage': None}
+        key, content = self.cache.lookup(request, use_cache, refresh)
+        if content is not None:
+            self._record(task, stage, request, started, stats, content, prompt_report, cache_hit=True)
+            return content
+        budget = self._budget(task)
+        try:
+            if budget is None:
+                content, winner = self._call(task, request, stats), request
+            else:
+                content, winner = self._hedged_call(task, request, stats, budget)
+        except Exception as e:
+            self._record(task, stage, request, started, stats, '', prompt_report, error=e)
+            raise
+        self.cache.store(self._winner_key(key, request, winner), content)
+        self._record(task, stage, winner, started, stats, content, prompt_report)
+        return content
+
+    def _budget(self, task: str) -> Optional[LatencyBudget]:
+        """The task's latency budget; batch-priority work has no one waiting on it"""
+        if current_priority() == 'batch':
+            return None
+        return self.budgets.get(task)
+
+    @staticmethod
+    def _winner_key(key: Optional[str], request: Dict, winner: Dict) -> Optional[str]:
+        """A hedge on another model is cached under its own request, not the primary's"""
+        if key is None or winner is request:
+            return key
+        return cache_key(winner)
+
+    def _hedged_call(self, task: str, request: Dict, stats: Dict, budget: LatencyBudget) -> Tuple[str, Dict]:
+        """
+        _call within a latency budget; returns (content, the request that produced it)
+        A hedge request starts once the first has run for budget.hedge_after seconds and the
+        first success wins. When the call returns, requests that have not started are
+        cancelled and the others are abandoned: a request already sent is left to finish,
+        but none takes another limiter slot or retries.
+        """
+        deadline = time.monotonic() + budget.total
+        hedge_at = time.monotonic() + budget.hedge_after if budget.hedge_after is not None else None
+        hedge = {**request, 'model': budget.hedge_model} if budget.hedge_model else request
+        executor = _get_hedge_executor()
+        attempts = {}
+        abandoned = threading.Event()
+
+        def submit(source: Dict):
+            attempt_stats = {'attempts': 0, 'usage': None}
+            # The budget doubles as the HTTP timeout; the copied context keeps the caller's priority
+            timed_request = {**source, 'timeout': budget.total}
+            future = executor.submit(contextvars.copy_context().run, self._call, task, timed_request, attempt_stats, abandoned)
+            attempts[future] = (source, attempt_stats)
+            return future
+
+        pending = {submit(request)}
+        error = None
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                wake = min(deadline, hedge_at) if hedge_at is not None else deadline
+                done, pending = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        source, attempt_stats = attempts[future]
+                        stats['usage'] = attempt_stats['usage']
+                        return future.result(), source
+                    error = future.exception()
+                if hedge_at is not None and pending and time.monotonic() >= hedge_at:
+                    stats['hedged'] = True
+                    pending.add(submit(hedge))
+                    hedge_at = None
+            if not pending and error is not None:
+                raise error
+            raise LLMDeadlineExceeded(f"{task} exceeded its {budget.total:g}s latency budget")
+        finally:
+            abandoned.set()
+            for future in attempts:
+                future.cancel()
+            stats['attempts'] += sum(attempt_stats['attempts'] for _, attempt_stats in attempts.values())
+
+    def _record(self, task: str, stage: Optional[str], request: Dict, started: float, stats: Dict, content: str,
+                prompt_report: Optional[Dict] = None, cache_hit: bool = False, error: Optional[Exception] = None):
+        """Report a finished call; token counts are estimated when the backend gave no usage"""
+        usage = stats['usage'] or {}
+        self.metrics.record(
+            task, stage, request.get('model'),
+            usage.get('prompt_tokens', sum(len(str(m.get('content', ''))) for m in request.get('messages', [])) // 4),
+            usage.get('completion_tokens', len(content) // 4),
+            time.monotonic() - started,
+            stats['attempts'],
+            cache_hit,
+            error,
+            prompt_report,
+            hedged=stats.get('hedged', False)
+        )
+
+    def stream(self, task: str, use_cache: bool = True, refresh: bool = False, stage: Optional[str] = None,
+               prompt_report: Optional[Dict] = None, **request) -> Iterator[str]:
+        """
+        Like complete() but yields the content in pieces as the backend produces them
+        A cache hit is yielded as a single piece. Failures are retried only until the first
+        piece has been yielded; the full content is cached once the stream finishes.
+        """
+        call_started = time.monotonic()
+        stats = {'attempts': 0, 'usage': None}
+        key, content = self.cache.lookup(request, use_cache, refresh)
+        if content is not None:
+            self._record(task, stage, request, call_started, stats, content, prompt_report, cache_hit=True)
+            yield content
+            return
+
+        limiter = self.limiter.for_model(request.get('model'))
+        tokens = estimate_tokens(request)
+        priority = current_priority()
+        attempt = 0
+        while True:
+            limiter.acquire(priority, tokens)
+            started = time.monotonic()
+            stats['attempts'] += 1
+            usage = {}
+            pieces = []
+            try:
+                for piece in self._create_stream(task, request, usage):
+                    pieces.append(piece)
+                    yield piece
+            except Exception as e:
+                limiter.release(time.monotonic() - started, e)
+                if pieces or attempt >= self.limiter.max_retries or not is_retryable_error(e):
+                    self._record(task, stage, request, call_started, stats, ''.join(pieces), prompt_report, error=e)
+                    raise
+                time.sleep(self.limiter.backoff_delay(attempt, e))
+                attempt += 1
+                continue
+            except BaseException:
+                # The consumer stopped reading (e.g. the SSE client disconnected)
+                limiter.cancel()
+                raise
+            limiter.release(time.monotonic() - started)
+            content = ''.join(pieces)
+            stats['usage'] = usage or None
+            self.cache.store(key, content)
+            self._record(task, stage, request, call_started, stats, content, prompt_report)
+            return
+
+    async def acomplete(self, task: str, use_cache: bool = True, refresh: bool = False, stage: Optional[str] = None,
+                        prompt_report: Optional[Dict] = None, **request) -> str:
+        """Async variant of complete(); cache reads and writes run off the event loop"""
+        started = time.monotonic()
+        stats = {'attempts': 0, 'usage': None}
+        key, content = await self.cache.alookup(request, use_cache, refresh)
+        if content is not None:
+            self._record(task, stage, request, started, stats, content, prompt_report, cache_hit=True)
+            return content
+        budget = self._budget(task)
+        try:
+            if budget is None:
+                content, winner = await self._acall(task, request, stats), request
+            else:
+                content, winner = await self._ahedged_call(task, request, stats, budget)
+        except Exception as e:
+            self._record(task, stage, request, started, stats, '', prompt_report, error=e)
+            raise
+        await self.cache.astore(self._winner_key(key, request, winner), content)
+        self._record(task, stage, winner, started, stats, content, prompt_report)
+        return content
+
+    async def _ahedged_call(self, task: str, request: Dict, stats: Dict, budget: LatencyBudget) -> Tuple[str, Dict]:
+        """Async variant of _hedged_call; the losing or overdue requests are cancelled"""
+        deadline = time.monotonic() + budget.total
+        hedge_at = time.monotonic() + budget.hedge_after if budget.hedge_after is not None else None
+        hedge = {**request, 'model': budget.hedge_model} if budget.hedge_model else request
+        attempts = {}
+
+        def launch(source: Dict):
+            attempt_stats = {'attempts': 0, 'usage': None}
+            future = asyncio.ensure_future(self._acall(task, {**source, 'timeout': budget.total}, attempt_stats))
+            attempts[future] = (source, attempt_stats)
+            return future
+
+        pending = {launch(request)}
+        error = None
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                wake = min(deadline, hedge_at) if hedge_at is not None else deadline
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, wake - now), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        source, attempt_stats = attempts[future]
+                        stats['usage'] = attempt_stats['usage']
+                        return future.result(), source
+                    error = future.exception()
+                if hedge_at is not None and pending and time.monotonic() >= hedge_at:
+                    stats['hedged'] = True
+                    pending.add(launch(hedge))
+                    hedge_at = None
+            if not pending and error is not None:
+                raise error
+            raise LLMDeadlineExceeded(f"{task} exceeded its {budget.total:g}s latency budget")
+        finally:
+            for future in attempts:
+                if not future.done():
+                    future.cancel()
+            stats['attempts'] += sum(attempt_stats['attempts'] for _, attempt_stats in attempts.values())
+
+    def _call(self, task: str, request: Dict, stats: Dict, abandoned: Optional[threading.Event] = None) -> str:
+        """
+        One request with retries; `abandoned` is set by a hedged caller that no longer waits
+        (a lost hedge or a passed deadline), which stops the call before it takes a limiter
+        slot or retries. A request already sent runs to completion.
+        """
+        limiter = self.limiter.for_model(request.get('model'))
+        tokens = estimate_tokens(request)
+        priority = current_priority()
+        attempt = 0
+        while True:
+            if abandoned is not None and abandoned.is_set():
+                raise _CallAbandoned(task)
+            limiter.acquire(priority, tokens)
+            if abandoned is not None and abandoned.is_set():
+                limiter.cancel()
+                raise _CallAbandoned(task)
+            started = time.monotonic()
+            stats['attempts'] += 1
+            try:
+                content, stats['usage'] = self._create(task, request)
+            except Exception as e:
+                limiter.release(time.monotonic() - started, e)
+                if attempt >= self.limiter.max_retries or not is_retryable_error(e):
+                    raise
+                delay = self.limiter.backoff_delay(attempt, e)
+                if abandoned is not None:
+                    abandoned.wait(delay)
+                else:
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            limiter.release(time.monotonic() - started)
+            return content
+
+    async def _acall(self, task: str, request: Dict, stats: Dict) -> str:
+        limiter = self.limiter.for_model(request.get('model'))
+        tokens = estimate_tokens(request)
+        priority = current_priority()
+        attempt = 0
+        while True:
+            await limiter.aacquire(priority, tokens)
+            started = time.monotonic()
+            stats['attempts'] += 1
+            try:
+                content, stats['usage'] = await self._acreate(task, request)
+            except asyncio.CancelledError:
+                # Abandoned by the caller (a lost hedge or a deadline): free the slot
+                limiter.cancel()
+                raise
+            except Exception as e:
+                limiter.release(time.monotonic() - started, e)
+                if attempt >= self.limiter.max_retries or not is_retryable_error(e):
+                    raise
+                await asyncio.sleep(self.limiter.backoff_delay(attempt, e))
+                attempt += 1
+                continue
+            limiter.release(time.monotonic() - started)
+            return content
+
+    async def aclose(self):
+        """Close the async resources bound to the running event loop (see run_async)"""
+
+    def _create(self, task: str, request: Dict) -> Tuple[str, Optional[Dict]]:
+        """Returns (content, usage) where usage has prompt_tokens/completion_tokens if known"""
+        raise NotImplementedError
+
+    async def _acreate(self, task: str, request: Dict) -> Tuple[str, Optional[Dict]]:
+        raise NotImplementedError
+
+    def _create_stream(self, task: str, request: Dict, usage: Dict) -> Iterator[str]:
+        """Yield content pieces, filling `usage` if the backend reports it; default is one piece"""
+        content, reported = self._create(task, request)
+        usage.update(reported or {})
+        yield content
+
+
+class OpenAILLMClient(LLMClient):
+    """OpenAI (or any OpenAI-compatible server via base_url) with pooled connections"""
+    backend = 'openai'
+
+    def __init__(self, cache: LLMCache, limiter: LLMRateLimiter, metrics: LLMMetrics, api_key: str,
+                 base_url: Optional[str] = None, timeout: float = 60.0, max_connections: int = 20):
+        super().__init__(cache, limiter, metrics)
+        import httpx
+        from openai import OpenAI
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # Retries are handled by LLMClient._call so they go back through the limiter
+        self._client = OpenAI(
+            api_key=api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=httpx.Client(limits=self._limits(), timeout=timeout)
+        )
+        # httpx async pools are bound to the event loop that created them
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _async_client(self):
+        import httpx
+        from openai import AsyncOpenAI
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,
+                    http_client=httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+                )
+                self._async_clients[loop] = client
+            return client
+
+    async def aclose(self):
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    @staticmethod
+    def _usage(usage) -> Optional[Dict]:
+        if usage is None:
+            return None
+        return {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+
+    def _create(self, task, request):
+        response = self._client.chat.completions.create(extra_headers={'X-LLM-Task': task}, **request)
+        return response.choices[0].message.content, self._usage(response.usage)
+
+    async def _acreate(self, task, request):
+        response = await self._async_client().chat.completions.create(extra_headers={'X-LLM-Task': task}, **request)
+        return response.choices[0].message.content, self._usage(response.usage)
+
+    def _create_stream(self, task, request, usage):
+        response = self._client.chat.completions.create(
+            extra_headers={'X-LLM-Task': task},
+            stream=True,
+            stream_options={'include_usage': True},
+            **request
+        )
+        try:
+            for chunk in response:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage.update(self._usage(chunk.usage))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            response.close()
+
+
+def _prompt_text(request: Dict) -> str:
+    return '\n'.join(str(message.get('content', '')) for message in request.get('messages', []))
+
+
+def _fake_claim_generation(rng, request):
+    match = re.search(r'category:\s*(\w+)', _prompt_text(request))
+    category = match.group(1) if match else 'alignment'
+    n = rng.randint(1, 10 ** 6)
+    return json.dumps({
+        'title': f'Synthetic study {n} on {category} in large language models',
+        'abstract': f'We report a synthetic result ({n}) about {category}. ' * 4,
+        'keywords': [category, 'language models', 'evaluation', f'topic-{n % 97}'],
+        'claim': f'Method {n} improves {category} benchmarks by {rng.randint(5, 40)}% over baseline',
+        'confidence_score': round(rng.uniform(0.65, 0.95), 2),
+        'category': category
+    })
+
+
+def _fake_claim_generation_packed(rng, request):
+    claims = []
+    for n, category in re.findall(r'- (\d+) claim\(s\) in category: (\w+)', _prompt_text(request)):
+        for _ in range(int(n)):
+            claims.append(json.loads(_fake_claim_generation(rng, {'messages': [{'content': f'category: {category}'}]})))
+    return json.dumps({'claims': claims})
+
+
+def _fake_formalize_claim(rng, request):
+    match = re.search(r'Extracted Claim:\s*(.+)', _prompt_text(request))
+    claim = match.group(1).strip() if match else 'the claim'
+    return json.dumps({
+        'formalized_claim': f'H1: {claim}',
+        'test_criteria': [f'Criterion {i}: measurable outcome {rng.randint(1, 99)}' for i in range(1, rng.randint(4, 6) + 1)]
+    })
+
+
+def _fake_investigation_step(rng, request):
+    return json.dumps({
+        'result': f'Synthetic finding with effect {rng.uniform(0.1, 0.9):.2f}',
+        'evidence': {'papers_found': rng.randint(0, 25), 'p_value': round(rng.uniform(0.001, 0.2), 3)}
+    })
+
+
+def _fake_investigation_conclusion(rng, request):
+    return json.dumps({
+        'conclusion': rng.choice(['true', 'likely_true', 'inconclusive', 'likely_false', 'false']),
+        'confidence': round(rng.uniform(0.5, 0.95), 2),
+        'summary': 'Synthetic conclusion from the fake LLM backend'
+    })
+
+
+def _fake_code_generation(rng, request):
+    return (
+        'import numpy as np\n'
+        'from scipy import stats\n\n'
+        f'np.random.seed({rng.randint(0, 9999)})\n'
+        'data = np.random.normal(0.1, 1, 200)\n'
+        't_stat, p_value = stats.ttest_1samp(data, 0)\n'
+        'print(f"T-statistic: {t_stat:.4f}")\n'
+        'print(f"P-value: {p_value:.4f}")\n'
+        'print("Conclusion:", "LIKELY TRUE" if p_value < 0.05 else "INCONCLUSIVE")\n'
+        '\n### EXPLANATION\n'
+        'Synthetic data is tested with a one-sample t-test against zero.'
+    )
+
+
+def _fake_agent_bet(rng, request):
+    match = re.search(r'Possible Outcomes:\s*(.+)', _prompt_text(request))
+    outcomes = [o.strip() for o in match.group(1).split(',')] if match else ['YES', 'NO']
+    weights = [rng.random() + 0.01 for _ in outcomes]
+    total = sum(weights)
+    return json.dumps({
+        'probabilities': {outcome: weight / total for outcome, weight in zip(outcomes, weights)},
+        'evidence': ['synthetic point 1', 'synthetic point 2', 'synthetic point 3'],
+        'stake_percentage': rng.randint(5, 50),
+        'rationale': 'Synthetic rationale from the fake LLM backend'
+    })
+
+
+def _fake_agent_bet_packed(rng, request):
+    bets = []
+    for market_id, outcomes in re.findall(r'Market ID: (\d+) ===.*?Possible Outcomes:\s*(.+?)\n', _prompt_text(request), re.S):
+        bet = json.loads(_fake_agent_bet(rng, {'messages': [{'content': f'Possible Outcomes: {outcomes}'}]}))
+        bets.append({'market_id': int(market_id), **bet})
+    return json.dumps({'bets': bets})
+
+
+def _fake_claim_extraction(rng, request):
+    return f'CLAIM: Synthetic testable claim {rng.randint(1, 10 ** 6)}\nCONFIDENCE: {rng.uniform(0.3, 0.9):.2f}'
+
+
+# Task label -> responder(rng, request) producing content the call site can parse
+FAKE_RESPONDERS: Dict[str, Callable] = {
+    'claim_generation': _fake_claim_generation,
+    'claim_generation_packed': _fake_claim_generation_packed,
+    'formalize_claim': _fake_formalize_claim,
+    'investigation_step': _fake_investigation_step,
+    'investigation_conclusion': _fake_investigation_conclusion,
+    'code_generation': _fake_code_generation,
+    'code_adaptation': _fake_code_generation,
+    'agent_bet': _fake_agent_bet,
+    'agent_bet_packed': _fake_agent_bet_packed,
+    'claim_extraction': _fake_claim_extraction,
+}
+
+
+def stream_pieces(content: str) -> List[str]:
+    """Split content into word-sized pieces (whitespace kept) to simulate token streaming"""
+    return re.findall(r'\s*\S+', content) + ([content[len(content.rstrip()):]] if content != content.rstrip() else [])
+
+
+def fake_usage(request: Dict, content: str) -> Dict:
+    """Word counts standing in for token usage on the fake backends"""
+    return {
+        'prompt_tokens': sum(len(str(m.get('content', '')).split()) for m in request.get('messages', [])),
+        'completion_tokens': len(content.split())
+    }
+
+
+def fake_completion(task: str, request: Dict) -> str:
+    """Deterministic response for a request: the same request always gets the same content"""
+    rng = random.Random(int(cache_key(request)[:16], 16))
+    responder = FAKE_RESPONDERS.get(task)
+    if responder is not None:
+        return responder(rng, request)
+    if (request.get('response_format') or {}).get('type') == 'json_object':
+        return '{}'
+    return 'OK'
+
+
+class FakeLLMClient(LLMClient):
+    """Offline stand-in with simulated latency and error rate"""
+    backend = 'fake'
+
+    def __init__(self, cache: LLMCache, limiter: LLMRateLimiter, metrics: LLMMetrics, latency_ms: float = 0.0,
+                 latency_jitter_ms: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0):
+        super().__init__(cache, limiter, metrics)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random()
+
+    def _delay(self) -> float:
+        jitter = self._rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms) if self.latency_jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def _maybe_fail(self, task):
+        if self.rate_limit_rate and self._rng.random() < self.rate_limit_rate:
+            raise LLMError(f'Injected fake rate limit ({task})', status_code=429)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise LLMError(f'Injected fake LLM failure ({task})')
+
+    def _create(self, task, request):
+        time.sleep(self._delay())
+        self._maybe_fail(task)
+        content = fake_completion(task, request)
+        return content, fake_usage(request, content)
+
+    async def _acreate(self, task, request):
+        await asyncio.sleep(self._delay())
+        self._maybe_fail(task)
+        content = fake_completion(task, request)
+        return content, fake_usage(request, content)
+
+    def _create_stream(self, task, request, usage):
+        # The simulated latency is spread over the pieces, so the first one arrives early
+        content = fake_completion(task, request)
+        pieces = stream_pieces(content)
+        delay = self._delay() / max(1, len(pieces))
+        self._maybe_fail(task)
+        for piece in pieces:
+            time.sleep(delay)
+            yield piece
+        usage.update(fake_usage(request, content))
+
+
+_clients: Dict[tuple, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def run_async(coro):
+    """
+    asyncio.run() for coroutines that make LLM calls
+    Async HTTP clients are bound to the loop that created them, so the ones created
+    during this run are closed before its loop is.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            with _clients_lock:
+                clients = list(_clients.values())
+            for client in clients:
+                await client.aclose()
+
+    return asyncio.run(main())
+
+
+def get_llm_client(config) -> LLMClient:
+    """Process-wide LLM client for the configured backend (openai or fake)"""
+    backend = config.get('LLM_BACKEND', 'openai')
+    cache = get_llm_cache(config)
+    limiter = get_rate_limiter(config)
+    metrics = get_llm_metrics(config)
+    budgets = get_latency_budgets(config)
+
+    if backend == 'openai':
+        api_key = config.get('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OpenAI API key not configured")
+        settings = (backend, id(cache), id(limiter), id(metrics), id(budgets), api_key, config.get('OPENAI_BASE_URL'),
+                    float(config.get('LLM_TIMEOUT_SECONDS', 60)), int(config.get('LLM_MAX_CONNECTIONS', 20)))
+    elif backend == 'fake':
+        settings = (backend, id(cache), id(limiter), id(metrics), id(budgets), float(config.get('FAKE_LLM_LATENCY_MS', 0)),
+                    float(config.get('FAKE_LLM_LATENCY_JITTER_MS', 0)), float(config.get('FAKE_LLM_ERROR_RATE', 0)),
+                    float(config.get('FAKE_LLM_RATE_LIMIT_RATE', 0)))
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+    with _clients_lock:
+        client = _clients.get(settings)
+        if client is None:
+            if backend == 'openai':
+                client = OpenAILLMClient(cache, limiter, metrics, *settings[5:])
+            else:
+                client = FakeLLMClient(cache, limiter, metrics, *settings[5:])
+            client.budgets = budgets
+            _clients[settings] = client
+        return client
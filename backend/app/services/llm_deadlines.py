@@ -0,0 +1,67 @@
+"""
+LLM Latency Budgets
+Each call site (task) declares how long its caller can wait for a completion. When the
+primary request has not returned after `hedge_after` seconds a second request is started
+(the same request, or `hedge_model` as a cheaper/faster stand-in) and the first to finish
+wins; once `total` seconds have passed the call raises LLMDeadlineExceeded so the call
+site returns its fallback right away. LLM_LATENCY_BUDGETS overrides or extends the table:
+
+    {"investigation_step": {"total": 20, "hedge_after": 6, "hedge_model": "gpt-4o-mini"}}
+
+Budgets apply to interactive and default priority calls; batch-priority work (bulk runs,
+sweeps, the scraper) has no user waiting on it and keeps waiting for the rate limiter.
+"""
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """A call ran past its latency budget; the caller should use its fallback"""
+
+
+@dataclass(frozen=True)
+class LatencyBudget:
+    """Seconds until the fallback is used, and until a hedge request is started (None = never)"""
+    total: float
+    hedge_after: Optional[float] = None
+    hedge_model: Optional[str] = None
+
+
+# Large packed outputs are not hedged: a duplicate would double the most expensive calls
+DEFAULT_LATENCY_BUDGETS = {
+    'claim_extraction': LatencyBudget(15, hedge_after=5),
+    'claim_generation': LatencyBudget(20, hedge_after=8),
+    'claim_generation_packed': LatencyBudget(90),
+    'formalize_claim': LatencyBudget(20, hedge_after=6),
+    'investigation_step': LatencyBudget(30, hedge_after=10),
+    'investigation_conclusion': LatencyBudget(30, hedge_after=10),
+    'code_generation': LatencyBudget(60, hedge_after=25),
+    'code_adaptation': LatencyBudget(45, hedge_after=20),
+    'agent_bet': LatencyBudget(15, hedge_after=5),
+    'agent_bet_packed': LatencyBudget(60),
+}
+
+_budgets: Dict[str, Dict[str, LatencyBudget]] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_latency_budgets(config) -> Dict[str, LatencyBudget]:
+    """Budget per task: the defaults plus LLM_LATENCY_BUDGETS; empty when LLM_DEADLINES_ENABLED is off"""
+    if not config.get('LLM_DEADLINES_ENABLED', True):
+        return {}
+    overrides = config.get('LLM_LATENCY_BUDGETS') or {}
+    if isinstance(overrides, str):
+        overrides = json.loads(overrides)
+    settings = json.dumps(overrides, sort_keys=True)
+
+    with _budgets_lock:
+        budgets = _budgets.get(settings)
+        if budgets is None:
+            budgets = {
+                **DEFAULT_LATENCY_BUDGETS,
+                **{task: LatencyBudget(**budget) for task, budget in overrides.items()}
+            }
+            _budgets[settings] = budgets
+        return budgets
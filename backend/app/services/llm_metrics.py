@@ -0,0 +1,268 @@
+"""
+LLM Call Metrics
+Every chat completion made through the LLM client produces a call record (model, prompt
+and completion tokens, latency, retries, cache hit, hedging, error, cost). Records feed per-process
+histograms keyed by task and stage (exported in Prometheus text format at
+/api/llm/metrics) and are collected by record_llm_calls() blocks, which is how callers
+attach per-call details to their own results (e.g. investigation reasoning steps).
+"""
+import bisect
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from app.services.llm_deadlines import LLMDeadlineExceeded
+
+# USD per million tokens: (prompt, completion); LLM_PRICES overrides or extends this
+DEFAULT_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+_recorders = contextvars.ContextVar('llm_call_recorders', default=())
+
+
+@contextmanager
+def record_llm_calls():
+    """Collect the records of LLM calls made inside the block (including its asyncio tasks)"""
+    calls: List[Dict] = []
+    token = _recorders.set(_recorders.get() + (calls,))
+    try:
+        yield calls
+    finally:
+        _recorders.reset(token)
+
+
+def summarize_llm_calls(calls: List[Dict]) -> Optional[Dict]:
+    """Totals over a block's call records, as stored alongside results"""
+    if not calls:
+        return None
+    return {
+        'model': calls[-1]['model'],
+        'calls': len(calls),
+        'prompt_tokens': sum(call['prompt_tokens'] for call in calls),
+        'completion_tokens': sum(call['completion_tokens'] for call in calls),
+        'latency_ms': round(sum(call['latency_ms'] for call in calls), 1),
+        'retries': sum(call['retries'] for call in calls),
+        'cache_hit': all(call['cache_hit'] for call in calls),
+        'cost_usd': round(sum(call['cost_usd'] for call in calls), 6),
+        'error': next((call['error'] for call in reversed(calls) if call['error']), None),
+        'fallback': any(call['fallback'] for call in calls)
+    }
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound containing the q-th observation (None when empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class _Series:
+    """Everything tracked for one (task, stage, model)"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self.hedges = 0
+        self.deadline_exceeded = 0
+        self.prompt_truncations = 0
+        self.cost_usd = 0.0
+
+
+class LLMMetrics:
+    """Process-wide LLM call metrics"""
+
+    def __init__(self, prices: Optional[Dict] = None):
+        self.prices = {**DEFAULT_PRICES, **{model: tuple(price) for model, price in (prices or {}).items()}}
+        self._series: Dict[tuple, _Series] = {}
+        self._lock = threading.Lock()
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+    def record(self, task: str, stage: Optional[str], model: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, attempts: int, cache_hit: bool, error: Optional[Exception] = None,
+               prompt: Optional[Dict] = None, hedged: bool = False) -> Dict:
+        """
+        Observe one call and hand its record to the enclosing record_llm_calls() blocks
+        prompt is the PromptBuilder report for the call, if it was built with one;
+        hedged is set when a second request was raced against a slow first one
+        """
+        cost = 0.0 if cache_hit else self.cost(model, prompt_tokens, completion_tokens)
+        record = {
+            'task': task,
+            'stage': stage,
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'latency_ms': round(latency * 1000, 1),
+            'retries': max(0, attempts - 1),
+            'cache_hit': cache_hit,
+            'hedged': hedged,
+            'cost_usd': round(cost, 6),
+            'error': str(error) if error is not None else None,
+            'fallback': False
+        }
+        if prompt is not None:
+            record['prompt'] = prompt
+
+        with self._lock:
+            series = self._series.setdefault((task, stage or '', model or ''), _Series())
+            series.calls += 1
+            series.latency.observe(latency)
+            series.retries += record['retries']
+            series.cost_usd += cost
+            if prompt is not None:
+                series.prompt_truncations += len(prompt.get('truncated', []))
+            if cache_hit:
+                series.cache_hits += 1
+            if hedged:
+                series.hedges += 1
+            if isinstance(error, LLMDeadlineExceeded):
+                series.deadline_exceeded += 1
+            if error is not None:
+                series.errors += 1
+            else:
+                series.prompt_tokens.observe(prompt_tokens)
+                series.completion_tokens.observe(completion_tokens)
+
+        for calls in _recorders.get():
+            calls.append(record)
+        return record
+
+    def record_fallback(self, task: str, stage: Optional[str] = None):
+        """A caller replaced the result of its latest `task` call with fallback content"""
+        model = ''
+        for calls in _recorders.get():
+            record = next((call for call in reversed(calls) if call['task'] == task), None)
+            if record is not None:
+                record['fallback'] = True
+                model = record['model'] or ''
+        with self._lock:
+            self._series.setdefault((task, stage or '', model), _Series()).fallbacks += 1
+
+    def summary(self) -> List[Dict]:
+        """Per task/stage/model totals and latency quantiles, slowest first"""
+        with self._lock:
+            rows = [
+                {
+                    'task': task,
+                    'stage': stage or None,
+                    'model': model or None,
+                    'calls': series.calls,
+                    'cache_hits': series.cache_hits,
+                    'errors': series.errors,
+                    'retries': series.retries,
+                    'fallbacks': series.fallbacks,
+                    'hedges': series.hedges,
+                    'deadline_exceeded': series.deadline_exceeded,
+                    'prompt_truncations': series.prompt_truncations,
+                    'latency_avg_seconds': series.latency.sum / series.latency.count if series.latency.count else None,
+                    'latency_p50_seconds': series.latency.quantile(0.5),
+                    'latency_p95_seconds': series.latency.quantile(0.95),
+                    'latency_total_seconds': series.latency.sum,
+                    'prompt_tokens': int(series.prompt_tokens.sum),
+                    'completion_tokens': int(series.completion_tokens.sum),
+                    'cost_usd': round(series.cost_usd, 6)
+                }
+                for (task, stage, model), series in self._series.items()
+            ]
+        return sorted(rows, key=lambda row: -row['latency_total_seconds'])
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+
+        def labels(key, **extra):
+            task, stage, model = key
+            pairs = {'task': task, 'stage': stage, 'model': model, **extra}
+            return '{' + ','.join(f'{name}={json.dumps(str(value))}' for name, value in pairs.items()) + '}'
+
+        def histogram(name, help_text, attr):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for key, series in items:
+                hist = getattr(series, attr)
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float('inf'),), hist.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{labels(key, le=le)} {cumulative}')
+                lines.append(f'{name}_sum{labels(key)} {hist.sum}')
+                lines.append(f'{name}_count{labels(key)} {hist.count}')
+
+        def counter(name, help_text, attr):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key, series in items:
+                lines.append(f'{name}{labels(key)} {getattr(series, attr)}')
+
+        with self._lock:
+            items = sorted(self._series.items())
+            histogram('llm_call_latency_seconds', 'Wall time per LLM call including queueing and retries', 'latency')
+            histogram('llm_prompt_tokens', 'Prompt tokens per LLM call', 'prompt_tokens')
+            histogram('llm_completion_tokens', 'Completion tokens per LLM call', 'completion_tokens')
+            counter('llm_calls_total', 'LLM calls', 'calls')
+            counter('llm_cache_hits_total', 'LLM calls served from the response cache', 'cache_hits')
+            counter('llm_errors_total', 'LLM calls that failed after retries', 'errors')
+            counter('llm_retries_total', 'LLM call retries', 'retries')
+            counter('llm_fallbacks_total', 'Results replaced by fallback content', 'fallbacks')
+            counter('llm_hedged_calls_total', 'LLM calls that started a hedge request', 'hedges')
+            counter('llm_deadline_exceeded_total', 'LLM calls that ran past their latency budget', 'deadline_exceeded')
+            counter('llm_prompt_truncations_total', 'Prompt sections cut to fit their token budget', 'prompt_truncations')
+            counter('llm_cost_usd_total', 'Estimated LLM spend in USD', 'cost_usd')
+        return '\n'.join(lines) + '\n'
+
+
+_metrics: Dict[str, LLMMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics(config) -> LLMMetrics:
+    """Process-wide metrics, priced with LLM_PRICES ({"model": [prompt, completion] USD per 1M tokens})"""
+    prices = config.get('LLM_PRICES') or {}
+    if isinstance(prices, str):
+        prices = json.loads(prices)
+    settings = json.dumps(prices, sort_keys=True)
+
+    with _metrics_lock:
+        metrics = _metrics.get(settings)
+        if metrics is None:
+            metrics = LLMMetrics(prices)
+            _metrics[settings] = metrics
+        return metrics
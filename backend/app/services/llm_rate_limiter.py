@@ -0,0 +1,357 @@
+"""
+LLM Rate Limiter
+Process-wide admission control for LLM calls, keyed by model: requests-per-minute and
+tokens-per-minute buckets (optionally shared across processes through Redis), an AIMD
+concurrency limit that backs off on 429s and latency spikes, priority classes so
+interactive calls are admitted ahead of batch work, and jittered retry backoff.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Lower value = admitted first
+PRIORITIES = {'interactive': 0, 'default': 1, 'batch': 2}
+
+_priority = contextvars.ContextVar('llm_priority', default='default')
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run the enclosed LLM calls (including asyncio tasks started inside) at `priority`"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def estimate_tokens(request: Dict) -> int:
+    """Rough prompt + completion token estimate (~4 characters per token)"""
+    chars = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+    return chars // 4 + int(request.get('max_tokens') or 512)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None and getattr(error, 'response', None) is not None:
+        status = getattr(error.response, 'status_code', None)
+    return status
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return _status_code(error) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """429s, server errors, timeouts and dropped connections are worth retrying"""
+    if is_rate_limit_error(error) or getattr(error, 'retryable', False):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status >= 500
+    return type(error).__name__ in ('APITimeoutError', 'APIConnectionError', 'TimeoutError', 'ConnectionError')
+
+
+class TokenBucket:
+    """Continuously refilling per-minute budget; a request larger than the budget waits for a full bucket"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        needed = min(amount, self.capacity) - self.available
+        return max(0.0, needed * 60.0 / self.capacity)
+
+    def take(self, amount: float):
+        self._refill()
+        self.available -= amount
+
+
+class RedisRateWindow:
+    """Fixed one-minute request/token windows shared by every process using the same Redis"""
+
+    def __init__(self, redis_client, model: str, rpm: int, tpm: int):
+        self.redis = redis_client
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens`; returns 0 on success, else seconds until the next window"""
+        now = time.time()
+        key = f'llmrl:{self.model}:{int(now // 60)}'
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hincrby(key, 'requests', 1)
+            pipe.hincrby(key, 'tokens', tokens)
+            pipe.expire(key, 120)
+            requests, used_tokens, _ = pipe.execute()
+            # The first request of a window always fits, however large
+            if requests > 1 and (requests > self.rpm or used_tokens > self.tpm):
+                pipe = self.redis.pipeline()
+                pipe.hincrby(key, 'requests', -1)
+                pipe.hincrby(key, 'tokens', -tokens)
+                pipe.execute()
+                return 60.0 - now % 60.0
+        except Exception as e:
+            # Fall back to the local buckets if Redis is unavailable
+            print(f"Redis rate window failed: {e}")
+        return 0.0
+
+
+class ModelLimiter:
+    """Admission control for one model"""
+
+    def __init__(self, model: str, rpm: int, tpm: int, max_concurrency: int, min_concurrency: int = 1,
+                 spike_factor: float = 3.0, redis_window: Optional[RedisRateWindow] = None):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.spike_factor = spike_factor
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._redis_window = redis_window
+        self._latency_ewma = None
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {'admitted': 0, 'rate_limited': 0, 'latency_spikes': 0, 'failures': 0, 'wait_seconds': 0.0}
+
+    def _ready(self, ticket, tokens: int) -> Optional[float]:
+        """
+        Called with the lock held. Returns 0 if `ticket` may be admitted, a number of
+        seconds to wait for budget, or None to wait for a slot or a higher-priority caller
+        """
+        if self._waiters[0] != ticket or self.in_flight >= max(1, int(self.limit)):
+            return None
+        return max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+
+    def _admit(self, tokens: int, started: float):
+        """Called with the lock held once the head ticket is ready: take its budget and a slot"""
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self.in_flight += 1
+        self._stats['admitted'] += 1
+        self._stats['wait_seconds'] += time.monotonic() - started
+        heapq.heappop(self._waiters)
+        self._cond.notify_all()
+
+    def _enqueue(self, priority: str):
+        ticket = (PRIORITIES.get(priority, PRIORITIES['default']), next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _abandon(self, ticket):
+        with self._cond:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def acquire(self, priority: str, tokens: int):
+        """
+        Block until a call of `tokens` estimated tokens may start
+        Once the caller is at the head of the queue and the local budget allows it, the
+        shared Redis window is reserved without holding the lock (it is a network round trip).
+        """
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        reserved = self._redis_window is None
+        try:
+            while True:
+                with self._cond:
+                    wait = self._ready(ticket, tokens)
+                    if wait == 0 and reserved:
+                        self._admit(tokens, started)
+                        return
+                    if wait != 0:
+                        self._cond.wait(timeout=min(wait, 1.0) if wait is not None else 1.0)
+                        continue
+                wait = self._redis_window.reserve(tokens)
+                if wait > 0:
+                    with self._cond:
+                        self._cond.wait(timeout=min(wait, 1.0))
+                else:
+                    reserved = True
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, priority: str, tokens: int):
+        """Async acquire: polls without blocking the event loop"""
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        reserved = self._redis_window is None
+        try:
+            while True:
+                with self._cond:
+                    wait = self._ready(ticket, tokens)
+                    if wait == 0 and reserved:
+                        self._admit(tokens, started)
+                        return
+                if wait != 0:
+                    await asyncio.sleep(min(wait, 1.0) if wait is not None else 0.02)
+                    continue
+                wait = await asyncio.to_thread(self._redis_window.reserve, tokens)
+                if wait > 0:
+                    await asyncio.sleep(min(wait, 1.0))
+                else:
+                    reserved = True
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def release(self, latency: float, error: Optional[Exception] = None):
+        """
+        Finish a call and adapt the concurrency limit (AIMD)
+        429 halves the limit and a latency spike cuts it by a quarter; every other
+        success adds roughly one slot per window of `limit` calls.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if error is not None and is_rate_limit_error(error):
+                self._stats['rate_limited'] += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            elif error is not None:
+                self._stats['failures'] += 1
+            elif self._latency_ewma is not None and latency > self.spike_factor * self._latency_ewma:
+                self._stats['latency_spikes'] += 1
+                self.limit = max(self.min_concurrency, self.limit * 0.75)
+                self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Free the slot of a call its caller abandoned (e.g. a lost hedge) without adapting the limit"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                **self._stats,
+                'model': self.model,
+                'concurrency_limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiters),
+                'latency_ewma': self._latency_ewma
+            }
+
+
+class LLMRateLimiter:
+    """Per-model limiters plus the retry policy shared by all LLM calls"""
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int, min_concurrency: int = 1,
+                 spike_factor: float = 3.0, model_limits: Optional[Dict] = None, redis_url: Optional[str] = None,
+                 max_retries: int = 3, retry_base_seconds: float = 0.5, retry_max_seconds: float = 20.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.spike_factor = spike_factor
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model: str) -> ModelLimiter:
+        model = model or 'default'
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                overrides = self.model_limits.get(model, {})
+                rpm = int(overrides.get('rpm', self.rpm))
+                tpm = int(overrides.get('tpm', self.tpm))
+                window = RedisRateWindow(self._redis, model, rpm, tpm) if self._redis is not None else None
+                limiter = ModelLimiter(
+                    model, rpm, tpm,
+                    int(overrides.get('max_concurrency', self.max_concurrency)),
+                    self.min_concurrency,
+                    self.spike_factor,
+                    window
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Retry-After when the server sends one, else full-jitter exponential backoff"""
+        response = getattr(error, 'response', None)
+        retry_after = getattr(response, 'headers', {}).get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.retry_max_seconds, float(retry_after)) + random.uniform(0, self.retry_base_seconds)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.model: limiter.stats() for limiter in limiters}
+
+
+_limiters: Dict[tuple, LLMRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config) -> LLMRateLimiter:
+    """Process-wide rate limiter built from LLM_* config"""
+    model_limits = config.get('LLM_MODEL_LIMITS') or {}
+    if isinstance(model_limits, str):
+        model_limits = json.loads(model_limits)
+    settings = (
+        int(config.get('LLM_RPM', 500)),
+        int(config.get('LLM_TPM', 200000)),
+        int(config.get('LLM_MAX_CONCURRENCY', 16)),
+        int(config.get('LLM_MIN_CONCURRENCY', 1)),
+        float(config.get('LLM_LATENCY_SPIKE_FACTOR', 3.0)),
+        json.dumps(model_limits, sort_keys=True),
+        config.get('REDIS_URL') if config.get('LLM_RATE_LIMIT_REDIS') else None,
+        int(config.get('LLM_MAX_RETRIES', 3)),
+        float(config.get('LLM_RETRY_BASE_SECONDS', 0.5)),
+        float(config.get('LLM_RETRY_MAX_SECONDS', 20))
+    )
+
+    with _limiters_lock:
+        limiter = _limiters.get(settings)
+        if limiter is None:
+            rpm, tpm, max_concurrency, min_concurrency, spike_factor, _, redis_url, max_retries, base, cap = settings
+            limiter = LLMRateLimiter(
+                rpm, tpm, max_concurrency, min_concurrency, spike_factor, model_limits, redis_url,
+                max_retries, base, cap
+            )
+            _limiters[settings] = limiter
+        return limiter
@@ -0,0 +1,234 @@
+"""
+Market autocomplete service
+In-memory prefix index over market question text and related idea keywords,
+returning the top-k matching markets ranked by betting volume. Status changes
+are not tracked by the sync watermarks, so suggestion status is read from the
+database at query time.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from app import db
+from app.models import Market, Idea, Bet
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Prefixes longer than this share the entry of their truncated prefix and are
+# filtered against the market's tokens at query time
+MAX_PREFIX_LENGTH = 12
+
+# Markets kept per prefix. Volume only ever grows (bets are never removed), so a
+# bounded top list per prefix stays exact as volumes change.
+TOP_PER_PREFIX = 50
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+class MarketPrefixIndex:
+    """
+    Prefix -> top markets by volume
+    Each prefix entry is a list of (-volume, market_id) kept sorted, so a lookup is a
+    dict hit plus a scan of at most top_per_prefix entries.
+    """
+
+    def __init__(self, top_per_prefix: int = TOP_PER_PREFIX):
+        self.top_per_prefix = top_per_prefix
+        self._prefixes: Dict[str, List] = {}
+        self._markets: Dict[int, Dict] = {}
+        self._lock = threading.RLock()
+
+        # Watermarks for incremental sync with the database
+        self._max_market_id = 0
+        self._max_bet_id = 0
+        self._last_sync = 0.0
+
+    def __len__(self):
+        return len(self._markets)
+
+    def add_market(self, market_id: int, question_text: str, keywords: str = '', volume: float = 0.0):
+        """Index a market under every prefix of its question and keyword tokens"""
+        with self._lock:
+            market = self._register(market_id, question_text, keywords, volume)
+            if market is None:
+                return
+            for prefix in self._market_prefixes(market):
+                self._insert(prefix, market_id, volume)
+
+    def add_markets(self, markets: Iterable[Tuple[int, str, str, float]]):
+        """
+        Bulk-index (market_id, question_text, keywords, volume) rows
+        Builds per-token postings, then fills prefix lists bottom-up (each prefix
+        merges its children's top lists), which avoids a sorted insert per market
+        and prefix.
+        """
+        with self._lock:
+            postings = defaultdict(list)
+            for market_id, question_text, keywords, volume in markets:
+                market = self._register(market_id, question_text, keywords, volume)
+                if market is None:
+                    continue
+                entry = (-volume, market_id)
+                for token in market['tokens']:
+                    postings[token[:MAX_PREFIX_LENGTH]].append(entry)
+            if not postings:
+                return
+            
+            # Longest prefixes first so every child is finished before its parent
+            pending = defaultdict(list)
+            for token, entries in postings.items():
+                pending[token].extend(entries)
+            for length in range(MAX_PREFIX_LENGTH, 0, -1):
+                for prefix in [p for p in pending if len(p) == length]:
+                    entries = pending.pop(prefix)
+                    existing = self._prefixes.get(prefix)
+                    if existing:
+                        entries.extend(existing)
+                    # A market can reach a prefix through several tokens
+                    top = sorted(set(entries))[:self.top_per_prefix]
+                    self._prefixes[prefix] = top
+                    if length > 1:
+                        pending[prefix[:-1]].extend(top)
+
+    def _register(self, market_id, question_text, keywords, volume):
+        if market_id in self._markets:
+            return None
+        tokens = set(tokenize(question_text)) | set(tokenize(keywords))
+        market = {
+            'id': market_id,
+            'question_text': question_text,
+            'volume': volume,
+            'tokens': tokens
+        }
+        self._markets[market_id] = market
+        return market
+
+    def add_volume(self, market_id: int, amount: float):
+        """Increase a market's volume and re-rank it under each of its prefixes"""
+        with self._lock:
+            market = self._markets.get(market_id)
+            if market is None or amount <= 0:
+                return
+            old_volume = market['volume']
+            market['volume'] = old_volume + amount
+            for prefix in self._market_prefixes(market):
+                entries = self._prefixes[prefix]
+                i = bisect.bisect_left(entries, (-old_volume, market_id))
+                if i < len(entries) and entries[i] == (-old_volume, market_id):
+                    del entries[i]
+                self._insert(prefix, market_id, market['volume'])
+
+    @staticmethod
+    def _market_prefixes(market):
+        return {
+            token[:length]
+            for token in market['tokens']
+            for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1)
+        }
+
+    def _insert(self, prefix: str, market_id: int, volume: float):
+        entries = self._prefixes.setdefault(prefix, [])
+        entry = (-volume, market_id)
+        if len(entries) >= self.top_per_prefix and entry >= entries[-1]:
+            return
+        bisect.insort(entries, entry)
+        if len(entries) > self.top_per_prefix:
+            entries.pop()
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Top markets whose tokens start with every query token, ranked by volume
+        Multi-token queries are answered from the most specific token's list, so they
+        only see that prefix's top markets.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        anchor = max(terms, key=len)
+        with self._lock:
+            entries = self._prefixes.get(anchor[:MAX_PREFIX_LENGTH], [])
+            results = []
+            for _, market_id in entries:
+                market = self._markets[market_id]
+                if all(any(token.startswith(term) for token in market['tokens']) for term in terms):
+                    results.append({
+                        'id': market_id,
+                        'question_text': market['question_text'],
+                        'volume': market['volume']
+                    })
+                    if len(results) >= limit:
+                        break
+        
+        # Any worker may have changed a status since this index last synced
+        if results:
+            statuses = dict(db.session.query(Market.id, Market.status).filter(
+                Market.id.in_([result['id'] for result in results])
+            ).all())
+            for result in results:
+                result['status'] = statuses.get(result['id'])
+        return results
+
+    def sync(self):
+        """Pull markets and bets created since the last sync (including by other workers)"""
+        with self._lock:
+            volumes = db.session.query(
+                Bet.market_id, func.sum(Bet.stake), func.max(Bet.id)
+            ).filter(Bet.id > self._max_bet_id).group_by(Bet.market_id).all()
+            
+            new_volume = {}
+            for market_id, stake, max_bet_id in volumes:
+                new_volume[market_id] = float(stake or 0.0)
+                self._max_bet_id = max(self._max_bet_id, max_bet_id)
+            
+            rows = db.session.query(
+                Market.id, Market.question_text, Idea.keywords
+            ).outerjoin(Idea, Idea.id == Market.idea_id).filter(
+                Market.id > self._max_market_id
+            ).order_by(Market.id).all()
+            
+            # New markets enter with their full volume; known markets get the delta
+            self.add_markets(
+                (market_id, question_text, keywords or '', new_volume.pop(market_id, 0.0))
+                for market_id, question_text, keywords in rows
+            )
+            if rows:
+                self._max_market_id = max(self._max_market_id, rows[-1][0])
+            
+            for market_id, amount in new_volume.items():
+                self.add_volume(market_id, amount)
+            
+            self._last_sync = time.time()
+
+    def sync_if_stale(self, max_age_seconds: float):
+        if time.time() - self._last_sync > max_age_seconds:
+            self.sync()
+
+
+_index: Optional[MarketPrefixIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_market_autocomplete(max_age_seconds: float = 5.0) -> MarketPrefixIndex:
+    """Process-wide autocomplete index, built on first use and refreshed incrementally"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = MarketPrefixIndex()
+                index.sync()
+                _index = index
+    _index.sync_if_stale(max_age_seconds)
+    return _index
+
+
+def notify_market_created():
+    """Pick up a newly committed market immediately in this worker"""
+    if _index is not None:
+        _index.sync()
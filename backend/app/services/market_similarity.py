@@ -0,0 +1,189 @@
+"""
+Market Similarity Service
+Builds and incrementally maintains a k-nearest-neighbour graph over market embeddings
+(question text combined with the underlying idea's embedding)
+"""
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import func, tuple_
+from app import db
+from app.models import Market, MarketNeighbor, Idea
+from app.services.embedding_index import EmbeddingIndex, normalize_rows
+from app.services.idea_extractor import IdeaExtractor
+
+_market_index = EmbeddingIndex(Market.id, Market.embedding_blob)
+
+
+def _upsert_edges(rows: List[Dict]):
+    """Insert neighbour edges, overwriting the score of any edge a concurrent insert already wrote"""
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.session.merge(MarketNeighbor(**row))
+        return
+    statement = insert(MarketNeighbor.__table__).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['market_id', 'neighbor_id'],
+        set_={'score': statement.excluded.score}
+    ))
+
+
+class MarketSimilarityService:
+    """Maintains the market_neighbors graph"""
+
+    def __init__(self, config):
+        self.config = config
+        self.k = config.get('SIMILAR_MARKETS_K', 10)
+        self.block_size = config.get('SIMILAR_MARKETS_BLOCK_SIZE', 256)
+        self.extractor = IdeaExtractor(config)
+
+    def embed_markets(self, markets: List[Market]) -> int:
+        """
+        Compute embeddings for markets that don't have one yet
+        The market vector is the normalized sum of the question embedding and the idea
+        embedding; missing idea embeddings are generated and stored along the way.
+        Returns: number of markets embedded
+        """
+        markets = [m for m in markets if m.embedding_blob is None]
+        if not markets:
+            return 0
+
+        ideas = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_({m.idea_id for m in markets})).all()}
+        missing_ideas = [idea for idea in ideas.values() if idea.embedding_blob is None and idea._embedding_json is None]
+        if missing_ideas:
+            idea_vectors = self.extractor.embed_texts([f"{idea.title} {idea.abstract}" for idea in missing_ideas])
+            for idea, vector in zip(missing_ideas, idea_vectors):
+                idea.embedding = vector
+
+        question_vectors = normalize_rows(self.extractor.embed_texts([m.question_text for m in markets]))
+        for market, question_vector in zip(markets, question_vectors):
+            idea = ideas.get(market.idea_id)
+            idea_vector = idea.embedding if idea is not None else None
+            if idea_vector is not None and idea_vector.shape == question_vector.shape:
+                market.embedding = normalize_rows(question_vector + normalize_rows(idea_vector))
+            else:
+                market.embedding = question_vector
+
+        db.session.commit()
+        return len(markets)
+
+    def _load_matrix(self) -> Tuple[List[int], np.ndarray]:
+        return _market_index.load()
+
+    def rebuild_graph(self) -> Dict:
+        """Embed any new markets and recompute every market's k nearest neighbours"""
+        self.embed_markets(Market.query.filter(Market.embedding_blob.is_(None)).all())
+
+        ids, matrix = self._load_matrix()
+        k = min(self.k, len(ids) - 1)
+
+        MarketNeighbor.query.delete()
+        if k <= 0:
+            db.session.commit()
+            return {'markets': len(ids), 'edges': 0}
+
+        edges = 0
+        # Blocked matrix products keep memory at block_size x N
+        for start in range(0, len(ids), self.block_size):
+            block = matrix[start:start + self.block_size]
+            scores = block @ matrix.T
+            scores[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            rows = []
+            for row, neighbors in enumerate(top):
+                for j in neighbors:
+                    rows.append({
+                        'market_id': ids[start + row],
+                        'neighbor_id': ids[j],
+                        'score': float(scores[row, j])
+                    })
+            _upsert_edges(rows)
+            edges += len(rows)
+
+        db.session.commit()
+        return {'markets': len(ids), 'edges': edges}
+
+    def add_market(self, market: Market) -> int:
+        """
+        Insert one market into the graph without a full rebuild
+        Writes its own k neighbours and splices it into the lists of existing markets it
+        now beats. The market matrix is cached and extended with new markets, and edges are
+        upserted, so concurrent inserts do not collide. Returns: number of edges written
+        """
+        self.embed_markets([market])
+
+        ids, matrix = self._load_matrix()
+        if market.id not in ids or len(ids) < 2:
+            return 0
+
+        index = ids.index(market.id)
+        scores = matrix @ matrix[index]
+        scores[index] = -np.inf
+        k = min(self.k, len(ids) - 1)
+
+        # Re-adding a market replaces its edges in both directions
+        MarketNeighbor.query.filter(db.or_(
+            MarketNeighbor.market_id == market.id,
+            MarketNeighbor.neighbor_id == market.id
+        )).delete(synchronize_session=False)
+        db.session.flush()
+        
+        top = np.argpartition(-scores, k - 1)[:k]
+        rows = [{'market_id': market.id, 'neighbor_id': ids[j], 'score': float(scores[j])} for j in top]
+
+        # Existing markets whose list is short or whose weakest edge loses to the new market
+        weakest = dict(
+            (market_id, (count, min_score))
+            for market_id, count, min_score in db.session.query(
+                MarketNeighbor.market_id, func.count(), func.min(MarketNeighbor.score)
+            ).group_by(MarketNeighbor.market_id)
+        )
+        full = []
+        for j, other_id in enumerate(ids):
+            if other_id == market.id:
+                continue
+            count, min_score = weakest.get(other_id, (0, -np.inf))
+            if count < k or scores[j] > min_score:
+                rows.append({'market_id': other_id, 'neighbor_id': market.id, 'score': float(scores[j])})
+                if count >= k:
+                    full.append(other_id)
+
+        # Drop the weakest edge of each full list to keep it at k
+        drop = {}
+        for start in range(0, len(full), self.block_size):
+            for market_id, neighbor_id, score in db.session.query(
+                MarketNeighbor.market_id, MarketNeighbor.neighbor_id, MarketNeighbor.score
+            ).filter(MarketNeighbor.market_id.in_(full[start:start + self.block_size])):
+                if market_id not in drop or score < drop[market_id][1]:
+                    drop[market_id] = (neighbor_id, score)
+        edges = [(market_id, neighbor_id) for market_id, (neighbor_id, _) in drop.items()]
+        for start in range(0, len(edges), self.block_size):
+            MarketNeighbor.query.filter(
+                tuple_(MarketNeighbor.market_id, MarketNeighbor.neighbor_id).in_(edges[start:start + self.block_size])
+            ).delete(synchronize_session=False)
+
+        _upsert_edges(rows)
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def get_similar(market_id: int, limit: int = 10) -> List[Tuple[Market, float]]:
+        """Read a market's precomputed neighbours, best first"""
+        rows = db.session.query(Market, MarketNeighbor.score).join(
+            MarketNeighbor, MarketNeighbor.neighbor_id == Market.id
+        ).filter(
+            MarketNeighbor.market_id == market_id
+        ).order_by(MarketNeighbor.score.desc()).limit(limit).all()
+        return [(market, score) for market, score in rows]
+
+
+def get_market_similarity_service(config) -> MarketSimilarityService:
+    """Factory function to get a market similarity service"""
+    return MarketSimilarityService(config)
@@ -0,0 +1,97 @@
+"""
+ONNX Embedding Backend
+CPU inference path for the sentence embedding model, selected with EMBEDDING_BACKEND=onnx.
+The transformer is exported to ONNX with dynamic int8 quantization by
+export_onnx_embedding.py and run with onnxruntime (intra-op threads from
+EMBEDDING_ONNX_THREADS, one inter-op thread, all graph optimizations). Texts are sorted
+by length before batching so every batch pads only to its own longest text; token
+embeddings are mean-pooled and normalized like the SentenceTransformer pipeline.
+
+The export writes a manifest with the cosine agreement it measured against the PyTorch
+model; an export that did not pass validation is refused.
+"""
+import json
+import os
+from typing import Dict, List, Sequence
+import numpy as np
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def load_manifest(model_dir: str) -> Dict:
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise ValueError(f"No ONNX embedding export in {model_dir}; run export_onnx_embedding.py")
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def validation_report(expected: np.ndarray, actual: np.ndarray, min_cosine: float) -> Dict:
+    """Per-text cosine agreement of the export with the reference model, as stored in the manifest"""
+    expected = np.asarray(expected, dtype=np.float32)
+    actual = np.asarray(actual, dtype=np.float32)
+    if expected.shape != actual.shape or not len(expected):
+        return {'samples': len(expected), 'threshold': min_cosine, 'passed': False,
+                'error': f"shape {list(actual.shape)} does not match the reference {list(expected.shape)}"}
+    cosine = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1) + 1e-12
+    )
+    if not np.isfinite(cosine).all():
+        return {'samples': len(expected), 'threshold': min_cosine, 'passed': False,
+                'error': "contains non-finite embeddings"}
+    return {
+        'samples': len(expected),
+        'min_cosine': round(float(cosine.min()), 5),
+        'mean_cosine': round(float(cosine.mean()), 5),
+        'threshold': min_cosine,
+        'passed': bool(cosine.min() >= min_cosine)
+    }
+
+
+class OnnxEmbeddingModel:
+    """Drop-in for SentenceTransformer.encode backed by the quantized ONNX export"""
+
+    def __init__(self, model_dir: str, model_name: str, threads: int = 0, require_validation: bool = True):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        manifest = load_manifest(model_dir)
+        if manifest.get('model') != model_name:
+            raise ValueError(f"ONNX export in {model_dir} is of {manifest.get('model')}, not {model_name}")
+        if require_validation and not (manifest.get('validation') or {}).get('passed'):
+            raise ValueError(f"ONNX export in {model_dir} did not pass cosine validation against {model_name}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, manifest['onnx_file']), options, providers=['CPUExecutionProvider']
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+        self.max_seq_length = manifest['max_seq_length']
+        self.normalize = manifest['normalize']
+        self.dimension = manifest['dimension']
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors='np')
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(['token_embeddings'], feeds)[0]
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """(n, dimension) float32 embeddings in input order"""
+        texts = list(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+        return embeddings
@@ -0,0 +1,240 @@
+"""
+Token-budgeted prompt builder
+Prompts are rendered from a template whose placeholders are filled by named sections.
+Each section is serialized compactly (JSON without indentation), fitted to its own token
+budget, and - if the whole prompt is still over the limit - cut further in priority order
+(highest priority number first). Sections without a priority are kept verbatim.
+Token counts use tiktoken when it is installed and a ~4 characters/token estimate otherwise.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+MIN_SECTION_TOKENS = 16
+TRUNCATION_MARK = ' …'
+
+_encoders: Dict[str, Any] = {}
+
+
+def _encoder(model: Optional[str]):
+    """tiktoken encoding for the model, or None when tiktoken is not installed"""
+    key = model or ''
+    if key not in _encoders:
+        try:
+            import tiktoken
+            try:
+                _encoders[key] = tiktoken.encoding_for_model(model or 'gpt-4o-mini')
+            except KeyError:
+                _encoders[key] = tiktoken.get_encoding('o200k_base')
+        except ImportError:
+            _encoders[key] = None
+    return _encoders[key]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count of text for the model"""
+    encoder = _encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (len(text) + 3) // 4
+
+
+def compact_json(data) -> str:
+    """JSON without indentation or padding"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def truncate_text(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text to max_tokens, at a sentence or word boundary where possible"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoder = _encoder(model)
+    budget = max(1, max_tokens - 1)
+    if encoder is not None:
+        cut = encoder.decode(encoder.encode(text)[:budget])
+    else:
+        cut = text[:budget * 4]
+    sentence_end = max(cut.rfind('. '), cut.rfind('.\n'))
+    if sentence_end > len(cut) * 0.6:
+        return cut[:sentence_end + 1] + TRUNCATION_MARK
+    word_end = cut.rfind(' ')
+    return (cut[:word_end] if word_end > len(cut) * 0.6 else cut).rstrip() + TRUNCATION_MARK
+
+
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def summarize_text(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Extractive summary within max_tokens
+    Keeps the first sentence, then sentences carrying numbers (results, effect sizes),
+    then the rest in order; the kept sentences are returned in their original order.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    sentences = [s.strip() for s in _SENTENCE_BREAK.split(text) if s.strip()]
+    if len(sentences) <= 1:
+        return truncate_text(text, max_tokens, model)
+
+    ranked = [0] + sorted(range(1, len(sentences)), key=lambda i: (not re.search(r'\d', sentences[i]), i))
+    kept, used = [], count_tokens(TRUNCATION_MARK, model)
+    for i in ranked:
+        tokens = count_tokens(sentences[i], model) + 1
+        if used + tokens > max_tokens:
+            continue
+        kept.append(i)
+        used += tokens
+    if not kept:
+        return truncate_text(sentences[0], max_tokens, model)
+    summary = ' '.join(sentences[i] for i in sorted(kept))
+    return summary + (TRUNCATION_MARK if len(kept) < len(sentences) else '')
+
+
+_SHORTEN = {'truncate': truncate_text, 'summarize': summarize_text}
+
+
+def fit_content(content, max_tokens: int, strategy: str = 'truncate', model: Optional[str] = None) -> str:
+    """
+    Serialize content into at most max_tokens
+    Strings are shortened with the strategy. For lists and dicts, long string values
+    inside them are shortened to a shrinking per-value limit first; lists then drop
+    trailing items, and whatever still does not fit is truncated as text.
+    """
+    shorten = _SHORTEN[strategy]
+    if isinstance(content, str):
+        return shorten(content, max_tokens, model)
+
+    text = compact_json(content)
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    # Shorten long string values until the whole fits
+    def shrink_strings(value, limit):
+        if isinstance(value, str) and count_tokens(value, model) > limit:
+            return shorten(value, limit, model)
+        if isinstance(value, dict):
+            return {k: shrink_strings(v, limit) for k, v in value.items()}
+        if isinstance(value, list):
+            return [shrink_strings(v, limit) for v in value]
+        return value
+
+    limit = max_tokens
+    shrunk = content
+    while limit > MIN_SECTION_TOKENS:
+        limit = int(limit * 0.75)
+        shrunk = shrink_strings(content, limit)
+        text = compact_json(shrunk)
+        if count_tokens(text, model) <= max_tokens:
+            return text
+    content = shrunk
+
+    if isinstance(content, list):
+        # Drop trailing items, noting how many were omitted
+        for keep in range(len(content) - 1, -1, -1):
+            omitted = len(content) - keep
+            text = compact_json(content[:keep] + [f'... {omitted} more omitted'])
+            if count_tokens(text, model) <= max_tokens:
+                return text
+
+    return truncate_text(text, max_tokens, model)
+
+
+@dataclass
+class _Section:
+    name: str
+    content: Any
+    budget: Optional[int]
+    priority: Optional[int]
+    strategy: str
+    text: str = ''
+    original_tokens: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class BuiltPrompt:
+    """A rendered prompt and how it was fitted"""
+    text: str
+    tokens: int
+    max_tokens: int
+    sections: Dict[str, Dict] = field(default_factory=dict)
+
+    @property
+    def report(self) -> Dict:
+        return {
+            'tokens': self.tokens,
+            'max_tokens': self.max_tokens,
+            'truncated': [name for name, section in self.sections.items() if section['truncated']],
+            'sections': self.sections
+        }
+
+
+class PromptBuilder:
+    """
+    Fill a template's {placeholders} from budgeted sections
+
+        builder = PromptBuilder(max_tokens=4000, model='gpt-4o-mini')
+        builder.add('claim', claim)                                   # verbatim
+        builder.add('evidence', evidence, budget=1500, priority=1, strategy='summarize')
+        prompt = builder.render(TEMPLATE)                             # BuiltPrompt
+
+    Templates use str.format syntax, so literal braces are written {{ }}.
+    """
+
+    def __init__(self, max_tokens: int, model: Optional[str] = None):
+        self.max_tokens = max_tokens
+        self.model = model
+        self._sections: List[_Section] = []
+
+    def add(self, name: str, content, budget: Optional[int] = None, priority: Optional[int] = None,
+            strategy: str = 'truncate') -> 'PromptBuilder':
+        """
+        Add a section; budget caps its tokens, priority (higher = cut first) lets it be cut
+        further when the prompt is over max_tokens. Non-string content is compact JSON.
+        """
+        if strategy not in _SHORTEN:
+            raise ValueError(f"Unknown prompt section strategy: {strategy}")
+        if content is None:
+            content = ''
+        self._sections.append(_Section(name, content, budget, priority, strategy))
+        return self
+
+    def _fit(self, section: _Section, budget: Optional[int]):
+        if budget is None:
+            section.text = section.content if isinstance(section.content, str) else compact_json(section.content)
+        else:
+            section.text = fit_content(section.content, max(MIN_SECTION_TOKENS, budget), section.strategy, self.model)
+        section.tokens = count_tokens(section.text, self.model)
+
+    def render(self, template: str) -> BuiltPrompt:
+        for section in self._sections:
+            full = section.content if isinstance(section.content, str) else compact_json(section.content)
+            section.original_tokens = count_tokens(full, self.model)
+            self._fit(section, section.budget)
+
+        fixed_tokens = count_tokens(template.format(**{s.name: '' for s in self._sections}), self.model)
+
+        # Over the limit: cut sections in priority order, each down to what the overflow needs
+        cuttable = sorted((s for s in self._sections if s.priority is not None), key=lambda s: -s.priority)
+        for section in cuttable:
+            overflow = fixed_tokens + sum(s.tokens for s in self._sections) - self.max_tokens
+            if overflow <= 0:
+                break
+            if section.tokens > MIN_SECTION_TOKENS:
+                self._fit(section, section.tokens - overflow)
+
+        text = template.format(**{s.name: s.text for s in self._sections})
+        return BuiltPrompt(
+            text=text,
+            tokens=count_tokens(text, self.model),
+            max_tokens=self.max_tokens,
+            sections={
+                s.name: {
+                    'tokens': s.tokens,
+                    'original_tokens': s.original_tokens,
+                    'truncated': s.tokens < s.original_tokens
+                }
+                for s in self._sections
+            }
+        )
@@ -0,0 +1,100 @@
+"""
+Generated Script Library
+Test scripts are stored with an embedding of the hypothesis and formalized claim they
+were generated for. When a new request's nearest stored script is similar enough it is
+returned as is (SCRIPT_REUSE_THRESHOLD) or handed to the model to adapt
+(SCRIPT_ADAPT_THRESHOLD) instead of generating a script from scratch.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+from app import db
+from app.models import GeneratedScript
+from app.services.embedding_index import EmbeddingIndex, normalize_rows
+from app.services.idea_extractor import IdeaExtractor
+
+_script_index = EmbeddingIndex(GeneratedScript.id, GeneratedScript.embedding_blob)
+
+
+def library_text(investigation_data: dict) -> str:
+    """Text embedded for a generate_test_code request"""
+    return f"{investigation_data.get('hypothesis', '')}\n{investigation_data.get('formalized_claim', '')}"
+
+
+@dataclass
+class LibraryMatch:
+    """Outcome of a library lookup: 'reuse', 'adapt' or 'generate'"""
+    mode: str
+    embedding: Optional[np.ndarray] = None
+    script: Optional[GeneratedScript] = None
+    similarity: Optional[float] = None
+    
+    @property
+    def provenance(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'script_id': self.script.id if self.script is not None else None,
+            'similarity': round(self.similarity, 4) if self.similarity is not None else None
+        }
+
+
+class ScriptLibrary:
+    """Embedding index over generated_scripts"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.extractor = IdeaExtractor(config)
+    
+    def lookup(self, investigation_data: dict, allow_reuse: bool = True) -> LibraryMatch:
+        """
+        Find the closest stored script for a request
+        allow_reuse=False caps the result at 'adapt' (e.g. when the caller asked for a
+        fresh script). Without an embedding model every request is a 'generate'.
+        """
+        if not self.config.get('SCRIPT_LIBRARY_ENABLED', True):
+            return LibraryMatch('generate')
+        
+        try:
+            embedding = normalize_rows(self.extractor.embed_texts([library_text(investigation_data)])[0])
+        except Exception as e:
+            print(f"Script library unavailable: {e}")
+            return LibraryMatch('generate')
+        
+        script_id, similarity = _script_index.nearest(embedding)
+        if script_id is None:
+            return LibraryMatch('generate', embedding)
+        if allow_reuse and similarity >= self.config.get('SCRIPT_REUSE_THRESHOLD', 0.97):
+            mode = 'reuse'
+        elif similarity >= self.config.get('SCRIPT_ADAPT_THRESHOLD', 0.85):
+            mode = 'adapt'
+        else:
+            return LibraryMatch('generate', embedding, similarity=similarity)
+        return LibraryMatch(mode, embedding, db.session.get(GeneratedScript, script_id), similarity)
+    
+    def mark_used(self, match: LibraryMatch):
+        """Count a reuse or adaptation of the matched script"""
+        if match.script is None:
+            return
+        match.script.use_count = (match.script.use_count or 0) + 1
+        match.script.last_used_at = datetime.utcnow()
+        db.session.commit()
+    
+    def add(self, investigation_data: dict, main_py: str, explanation: str, model_used: str,
+            match: LibraryMatch) -> Optional[GeneratedScript]:
+        """Store a generated or adapted script under the request's embedding"""
+        if match.embedding is None:
+            return None
+        script = GeneratedScript(
+            investigation_id=investigation_data.get('investigation_id'),
+            adapted_from_id=match.script.id if match.mode == 'adapt' and match.script is not None else None,
+            hypothesis=investigation_data.get('hypothesis', ''),
+            formalized_claim=investigation_data.get('formalized_claim', ''),
+            main_py=main_py,
+            explanation=explanation,
+            model_used=model_used
+        )
+        script.embedding = match.embedding
+        db.session.add(script)
+        db.session.commit()
+        return script
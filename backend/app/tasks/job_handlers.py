@@ -0,0 +1,246 @@
+"""
+Job handlers for LLM-bound endpoints
+Each handler runs inside an app context on a job executor (see app/tasks/jobs.py)
+"""
+import json
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Agent, Bet, Idea, Investigation, Market, Workspace
+from app.services.agent_bettor import AgentBettor, place_agent_bets
+from app.services.bulk_investigator import BulkInvestigator
+from app.services.bulk_llm import BulkProcessor
+from app.services.claim_generator import get_claim_generator
+from app.services.code_generator import generate_test_code, investigation_test_data
+from app.services.investigation_service import get_investigation_service
+from app.services.keyword_index import bulk_insert_ideas
+from app.services.market_similarity import get_market_similarity_service
+from app.tasks.jobs import job_handler, JobContext
+
+
+@job_handler('investigation', priority='interactive')
+def run_investigation_job(ctx: JobContext, investigation_id: int, refresh_cache: bool = False, resume: bool = False):
+    """
+    Run the investigation pipeline for an already-created Investigation row
+    With resume, the formalized claim and every step persisted by an earlier run are kept.
+    """
+    investigation = Investigation.query.get(investigation_id)
+    if not investigation:
+        raise ValueError(f'Investigation {investigation_id} not found')
+    idea = Idea.query.get(investigation.idea_id)
+    service = get_investigation_service()
+    step_count = len(service.pipeline.steps)
+    
+    formalized, resume_steps = None, None
+    if resume:
+        if investigation.formalized_claim:
+            formalized = {
+                'formalized_claim': investigation.formalized_claim,
+                'test_criteria': json.loads(investigation.test_criteria or '[]')
+            }
+        resume_steps = service.persisted_steps(
+            json.loads(investigation.reasoning_steps or '[]'),
+            json.loads(investigation.evidence or '[]')
+        )
+    
+    # Partial results are committed as they arrive so /api/investigations/<id>/stream can emit them
+    def save_formalized(formalized):
+        investigation.formalized_claim = formalized['formalized_claim']
+        investigation.test_criteria = json.dumps(formalized['test_criteria'])
+        db.session.commit()
+    
+    reasoning_steps, evidence = [], []
+    
+    def save_step(reasoning_step, evidence_item):
+        reasoning_steps.append(reasoning_step)
+        evidence.append(evidence_item)
+        investigation.reasoning_steps = json.dumps(reasoning_steps)
+        investigation.evidence = json.dumps(evidence)
+        db.session.commit()  # persisted steps are what a resumed run starts from
+        ctx.progress(0.25 + 0.6 * len(reasoning_steps) / step_count, f"Completed {reasoning_step['action']}")
+    
+    try:
+        result = service.run_investigation(
+            idea.title,
+            idea.abstract,
+            idea.extracted_claim or idea.title,
+            progress_callback=ctx.progress,
+            refresh_cache=refresh_cache,
+            formalized_callback=save_formalized,
+            step_callback=save_step,
+            formalized=formalized,
+            resume_steps=resume_steps
+        )
+        
+        # Update investigation with results
+        investigation.formalized_claim = result['formalized_claim']
+        investigation.test_criteria = json.dumps(result['test_criteria'])
+        investigation.reasoning_steps = json.dumps(result['reasoning_steps'])
+        investigation.evidence = json.dumps(result['evidence'])
+        investigation.conclusion = result['conclusion']
+        investigation.confidence = result['confidence']
+        investigation.summary = result['summary']
+        investigation.claim_embedding = result['claim_embedding']
+        investigation.provenance = json.dumps(result['provenance']) if result['provenance'] else None
+        investigation.status = 'completed'
+        investigation.completed_at = datetime.utcnow()
+        
+        db.session.commit()
+        
+    except Exception as e:
+        db.session.rollback()
+        investigation.status = 'failed'
+        investigation.summary = f'Investigation failed: {str(e)}'
+        db.session.commit()
+        raise
+    
+    return {
+        'success': True,
+        'investigation': investigation.to_dict()
+    }
+
+
+@job_handler('claim_generation', priority='batch')
+def generate_claims_job(ctx: JobContext, source_id: int, count: int, categories=None, packed: bool = False):
+    """Generate research claims and save them as ideas in one bulk insert"""
+    generator = get_claim_generator()
+    generated_claims = generator.generate_batch(
+        count=count,
+        categories=categories,
+        progress_callback=ctx.progress,
+        packed=packed
+    )
+    
+    # Save to database
+    now = datetime.utcnow()
+    idea_ids = bulk_insert_ideas([
+        {
+            'source_id': source_id,
+            'title': claim_data['title'],
+            'abstract': claim_data['abstract'],
+            'keywords': claim_data.get('keywords', ''),
+            'extracted_claim': claim_data['claim'],
+            'confidence_score': claim_data['confidence_score'],
+            'created_at': now
+        }
+        for claim_data in generated_claims
+    ])
+    db.session.commit()
+    
+    ideas_by_id = {idea.id: idea for idea in Idea.query.filter(Idea.id.in_(idea_ids)).all()}
+    ideas = [ideas_by_id[idea_id] for idea_id in idea_ids]
+    
+    return {
+        'success': True,
+        'generated_count': len(ideas),
+        'ideas': [idea.to_dict() for idea in ideas]
+    }
+
+
+@job_handler('agent_sweep', priority='batch')
+def agent_sweep_job(ctx: JobContext, agent_id: int, market_ids=None, skip_existing: bool = True,
+                    limit: int = None, packed: bool = False, refresh_cache: bool = False):
+    """Evaluate every active market (or the given ones) for an agent and place the bets in one write"""
+    agent = Agent.query.get(agent_id)
+    if not agent:
+        raise ValueError(f'Agent {agent_id} not found')
+    
+    query = Market.query.filter_by(status='active')
+    if market_ids:
+        query = query.filter(Market.id.in_(market_ids))
+    if skip_existing:
+        already_bet = db.session.query(Bet.market_id).filter(Bet.agent_id == agent_id)
+        query = query.filter(Market.id.not_in(already_bet))
+    query = query.order_by(Market.id)
+    if limit:
+        query = query.limit(limit)
+    markets = query.all()
+    
+    ctx.progress(0.05, f'Evaluating {len(markets)} markets')
+    bettor = AgentBettor(agent, current_app.config)
+    results = bettor.generate_bets(markets, packed=packed, progress_callback=ctx.progress, refresh_cache=refresh_cache)
+    
+    recommendations = [(market, recommendation) for market, recommendation, _ in results if recommendation]
+    failed = [{'market_id': market.id, 'reason': error} for market, recommendation, error in results if not recommendation]
+    
+    bets, skipped = place_agent_bets(agent_id, recommendations, current_app.config['AGENT_MAX_STAKE'])
+    db.session.commit()
+    
+    return {
+        'success': True,
+        'agent_id': agent_id,
+        'markets_evaluated': len(markets),
+        'bets_placed': len(bets),
+        'total_stake': sum(bet['stake'] for bet in bets),
+        'balance': Agent.query.get(agent_id).balance,
+        'bets': [{**bet, 'created_at': bet['created_at'].isoformat()} for bet in bets],
+        'skipped': skipped + failed
+    }
+
+
+@job_handler('workspace_code_generation', priority='interactive')
+def generate_workspace_code_job(ctx: JobContext, workspace_id: int, investigation_id: int, refresh_cache: bool = False):
+    """Generate AI test code for a workspace created from an investigation"""
+    workspace = Workspace.query.get(workspace_id)
+    investigation = Investigation.query.get(investigation_id)
+    if not workspace:
+        raise ValueError(f'Workspace {workspace_id} not found')
+    
+    explanation = None
+    library = None
+    if investigation and investigation.idea:
+        ctx.progress(0.1, 'Generating test code')
+        try:
+            result = generate_test_code(investigation_test_data(investigation), refresh_cache=refresh_cache)
+            workspace.files = {'main.py': result['main_py']}
+            workspace.updated_at = datetime.utcnow()
+            explanation = result['explanation']
+            library = result.get('library')
+            db.session.commit()
+            
+        except Exception as e:
+            # If AI generation fails, keep the template
+            print(f"AI code generation failed: {e}")
+            explanation = f"AI generation failed: {str(e)}. Using template."
+    
+    response_data = workspace.to_dict()
+    if explanation:
+        response_data['explanation'] = explanation
+    if library:
+        response_data['library'] = library
+    
+    return {'success': True, 'data': response_data}
+
+
+@job_handler('llm_bulk', priority='batch')
+def run_llm_bulk_job(ctx: JobContext, kind: str, limit: int = None, wait: bool = True):
+    """Claim extraction or investigation over the idea backlog through LLM batches (see app/services/bulk_llm.py)"""
+    ctx.progress(0.05, f'Preparing {kind} batches')
+    result = BulkProcessor(current_app.config).run(kind, limit=limit, wait=wait, progress_callback=ctx.progress)
+    return {'success': True, **result}
+
+
+@job_handler('investigation_bulk', priority='batch')
+def run_investigation_bulk_job(ctx: JobContext, limit: int = None, workers: int = None, rate_per_minute: float = None,
+                               retry_failed: bool = False, fresh: bool = False):
+    """Investigate ideas without a completed investigation on a worker pool (see app/services/bulk_investigator.py)"""
+    ctx.progress(0.0, 'Selecting ideas')
+    result = BulkInvestigator(current_app.config).run(
+        limit=limit,
+        workers=workers,
+        rate_per_minute=rate_per_minute,
+        retry_failed=retry_failed,
+        fresh=fresh,
+        progress_callback=ctx.progress
+    )
+    return {'success': True, **result}
+
+
+@job_handler('market_graph_add')
+def run_market_graph_add_job(ctx: JobContext, market_id: int):
+    """Embed a new market and splice it into the similar-markets graph"""
+    market = Market.query.get(market_id)
+    if not market:
+        raise ValueError(f'Market {market_id} not found')
+    edges = get_market_similarity_service(current_app.config).add_market(market)
+    return {'success': True, 'market_id': market_id, 'edges': edges}
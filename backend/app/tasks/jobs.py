@@ -0,0 +1,206 @@
+"""
+Background job framework
+Long-running (LLM-bound) work is recorded as a Job row and executed by a pluggable
+executor, so request handlers can return 202 immediately and clients poll
+/api/jobs/<id> for progress and the result.
+
+Executors (JOB_EXECUTOR config):
+    thread  - in-process thread pool (default; no extra services needed)
+    celery  - Celery worker via the configured broker
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+from flask import current_app
+from app import celery, db
+from app.models import Job
+from app.services.llm_rate_limiter import llm_priority
+from app.tasks.single_flight import single_flight_lock
+
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+# LLM priority class each job type's calls run at (see app/services/llm_rate_limiter.py)
+JOB_PRIORITIES: Dict[str, str] = {}
+
+
+def job_handler(job_type: str, priority: str = 'default'):
+    """Register a function as the handler for a job type: fn(ctx, **params) -> result dict"""
+    def decorator(fn):
+        JOB_HANDLERS[job_type] = fn
+        JOB_PRIORITIES[job_type] = priority
+        return fn
+    return decorator
+
+
+def _load_handlers():
+    """Import the built-in handlers so they are registered in every process"""
+    from app.tasks import job_handlers  # noqa: F401
+
+
+class JobContext:
+    """Handed to job handlers for progress reporting"""
+    
+    def __init__(self, job: Job):
+        self.job = job
+    
+    @property
+    def job_id(self) -> str:
+        return self.job.id
+    
+    def progress(self, fraction: float, message: Optional[str] = None):
+        """Record progress (0-1) and make it visible to pollers"""
+        self.job.progress = max(0.0, min(1.0, fraction))
+        if message is not None:
+            self.job.progress_message = message
+        db.session.commit()
+
+
+def execute_job(job_id: str):
+    """Run a queued job inside the current app context"""
+    _load_handlers()
+    job = Job.query.get(job_id)
+    if not job or job.status not in ('queued', 'running'):
+        return
+    
+    handler = JOB_HANDLERS.get(job.job_type)
+    if handler is None:
+        job.status = 'failed'
+        job.error = f'No handler registered for job type: {job.job_type}'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return
+    
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    
+    try:
+        with llm_priority(JOB_PRIORITIES.get(job.job_type, 'default')):
+            result = handler(JobContext(job), **job.params)
+        job.result = result
+        job.status = 'completed'
+        job.progress = 1.0
+    except Exception as e:
+        db.session.rollback()
+        print(f"Job {job_id} ({job.job_type}) failed: {e}")
+        traceback.print_exc()
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+@celery.task(name='jobs.run_job')
+def run_job(job_id: str):
+    """Celery entry point for the job framework"""
+    execute_job(job_id)
+
+
+class ThreadJobExecutor:
+    """Runs jobs on a process-local thread pool"""
+    
+    def __init__(self, max_workers: int = 4):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+    
+    def submit(self, app, job_id: str):
+        self.pool.submit(self._run, app, job_id)
+    
+    @staticmethod
+    def _run(app, job_id: str):
+        with app.app_context():
+            try:
+                execute_job(job_id)
+            finally:
+                db.session.remove()
+
+
+class CeleryJobExecutor:
+    """Hands jobs to Celery workers"""
+    
+    def submit(self, app, job_id: str):
+        run_job.apply_async(args=[job_id])
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """Process-wide executor chosen by JOB_EXECUTOR"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if current_app.config.get('JOB_EXECUTOR', 'thread') == 'celery':
+                    _executor = CeleryJobExecutor()
+                else:
+                    _executor = ThreadJobExecutor(current_app.config.get('JOB_THREAD_WORKERS', 4))
+    return _executor
+
+
+def submit_job(job_type: str, params: Dict, dedupe_key: Optional[str] = None) -> Job:
+    """Create a Job row and dispatch it; returns immediately"""
+    _load_handlers()
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job type: {job_type}')
+    
+    job = Job(job_type=job_type, status='queued', dedupe_key=dedupe_key, investigation_id=params.get('investigation_id'))
+    job.params = params
+    db.session.add(job)
+    db.session.commit()
+    
+    get_job_executor().submit(current_app._get_current_object(), job.id)
+    return job
+
+
+def _in_flight_jobs():
+    """Queued/running jobs, ignoring ones old enough to be presumed dead"""
+    stale_after = current_app.config.get('SINGLE_FLIGHT_STALE_SECONDS', 1800)
+    return Job.query.filter(
+        Job.status.in_(('queued', 'running')),
+        Job.created_at >= datetime.utcnow() - timedelta(seconds=stale_after)
+    ).order_by(Job.created_at.desc())
+
+
+def find_in_flight_job(dedupe_key: str) -> Optional[Job]:
+    """Newest queued/running job with this key, ignoring ones old enough to be presumed dead"""
+    return _in_flight_jobs().filter(Job.dedupe_key == dedupe_key).first()
+
+
+def find_in_flight_investigation_job(job_type: str, investigation_id: int) -> Optional[Job]:
+    """Newest queued/running job of this type on the investigation, whatever its dedupe key"""
+    return _in_flight_jobs().filter(Job.job_type == job_type, Job.investigation_id == investigation_id).first()
+
+
+def submit_single_flight_job(job_type: str, dedupe_key: str, build_params: Callable[[], Dict],
+                             investigation_id: Optional[int] = None) -> Tuple[Job, bool]:
+    """
+    Attach to an identical in-flight job, or create one
+    build_params() runs only when a new job is needed (e.g. to add the Investigation
+    row); it must flush rather than commit so the row and the job commit together
+    under the lock. With investigation_id, any in-flight job of the type on that
+    investigation counts as identical. Returns: (job, created)
+    """
+    _load_handlers()
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job type: {job_type}')
+    
+    with single_flight_lock(dedupe_key):
+        existing = find_in_flight_job(dedupe_key)
+        if existing is None and investigation_id is not None:
+            existing = find_in_flight_investigation_job(job_type, investigation_id)
+        if existing is not None:
+            db.session.commit()  # ends the transaction (and any advisory lock)
+            return existing, False
+        
+        params = build_params()
+        job = Job(job_type=job_type, status='queued', dedupe_key=dedupe_key, investigation_id=params.get('investigation_id'))
+        job.params = params
+        db.session.add(job)
+        db.session.commit()
+    
+    get_job_executor().submit(current_app._get_current_object(), job.id)
+    return job, True
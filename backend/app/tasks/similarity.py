@@ -0,0 +1,21 @@
+"""
+Background jobs for the similar-markets kNN graph
+New markets are added on the job executor (JOB_EXECUTOR, see app/tasks/jobs.py) so the
+embedding and graph update never run inside the request
+"""
+from flask import current_app
+from app import celery
+from app.services.market_similarity import get_market_similarity_service
+from app.tasks.jobs import submit_job
+
+
+@celery.task(name='similarity.rebuild_market_graph')
+def rebuild_market_graph():
+    """Recompute the full kNN graph"""
+    service = get_market_similarity_service(current_app.config)
+    return service.rebuild_graph()
+
+
+def schedule_add_market(market_id: int):
+    """Queue a graph update for a newly created market without blocking the request"""
+    return submit_job('market_graph_add', {'market_id': market_id})
@@ -0,0 +1,73 @@
+"""
+Single-flight coordination for background jobs
+Identical requests (same operation, subject id and input hash) attach to the job already
+in flight instead of starting another one. The check-and-create runs under a lock that
+spans gunicorn workers: a transaction-scoped advisory lock on PostgreSQL, a Redis lock
+when SINGLE_FLIGHT_BACKEND=redis, and a process-local lock otherwise (SQLite dev).
+"""
+import hashlib
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from flask import current_app
+from app import db
+
+logger = logging.getLogger(__name__)
+
+_local_lock = threading.Lock()
+_redis_client = None
+
+
+def single_flight_key(operation: str, subject_id, inputs=None) -> str:
+    """'<operation>:<subject id>:<hash of inputs>' - stored on Job.dedupe_key"""
+    canonical = json.dumps(inputs, sort_keys=True, default=str)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+    return f'{operation}:{subject_id}:{digest}'
+
+
+def _advisory_lock_id(key: str) -> int:
+    """Signed 64-bit id for pg_advisory_xact_lock"""
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(current_app.config['REDIS_URL'])
+    return _redis_client
+
+
+@contextmanager
+def single_flight_lock(key: str):
+    """
+    Hold the single-flight lock for `key` around a lookup-then-create
+    On PostgreSQL the lock lives until the current transaction ends, so the caller must
+    commit (and only commit once) inside the block.
+    """
+    backend = current_app.config.get('SINGLE_FLIGHT_BACKEND', 'db')
+    timeout = current_app.config.get('SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS', 30)
+
+    if backend == 'redis':
+        lock = _get_redis().lock(f'singleflight:{key}', timeout=timeout, blocking_timeout=timeout)
+        if not lock.acquire():
+            raise TimeoutError(f'Could not acquire single-flight lock for {key}')
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # The creation has already committed; if the lock expired while held, another
+                # worker may have created a duplicate job, so make that visible
+                logger.warning(
+                    "Single-flight lock for %s was lost before release (held longer than %ss?)", key, timeout,
+                    exc_info=True
+                )
+    elif db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': _advisory_lock_id(key)})
+        yield
+    else:
+        with _local_lock:
+            yield
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Build the similar-markets kNN graph from scratch
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.market_similarity import get_market_similarity_service
+
+def build_market_graph():
+    """Embed all markets and recompute their nearest neighbours"""
+    app = create_app()
+    
+    with app.app_context():
+        print("🔄 Building similar-markets graph...")
+        service = get_market_similarity_service(app.config)
+        result = service.rebuild_graph()
+        print(f"✅ Indexed {result['markets']} markets ({result['edges']} edges)")
+
+if __name__ == '__main__':
+    build_market_graph()
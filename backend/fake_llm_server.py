@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Deterministic OpenAI-compatible stand-in server for offline load tests
+Serves POST /v1/chat/completions using the fake LLM backend's responders. Point the
+app at it with LLM_BACKEND=openai and OPENAI_BASE_URL=http://localhost:8001/v1
+(any non-empty OPENAI_API_KEY works); the response schema is chosen from the
+X-LLM-Task header that the LLM client sends.
+
+Usage: python fake_llm_server.py [--port 8001] [--latency-ms 300] [--jitter-ms 100] [--error-rate 0.02]
+                                 [--rate-limit-rate 0.05]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, Response, request, jsonify
+from app.services.llm_client import fake_completion, fake_usage, stream_pieces
+
+def create_fake_llm_app(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit_rate=0.0):
+    """Flask app answering chat completions with simulated latency and failures"""
+    app = Flask(__name__)
+    rng = random.Random()
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        payload = request.get_json()
+        task = request.headers.get('X-LLM-Task', '')
+
+        delay = max(0.0, latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)) / 1000.0
+        if not payload.get('stream'):
+            time.sleep(delay)
+
+        if rate_limit_rate and rng.random() < rate_limit_rate:
+            return jsonify({'error': {'message': 'Injected fake rate limit', 'type': 'rate_limit_error'}}), 429, {'Retry-After': '1'}
+        if error_rate and rng.random() < error_rate:
+            return jsonify({'error': {'message': 'Injected fake LLM failure', 'type': 'server_error'}}), 500
+
+        content = fake_completion(task, payload)
+        if payload.get('stream'):
+            return _stream_response(payload, content, delay)
+        usage = fake_usage(payload, content)
+
+        return jsonify({
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {**usage, 'total_tokens': usage['prompt_tokens'] + usage['completion_tokens']}
+        }), 200
+
+    def _stream_response(payload, content, delay):
+        """chat.completion.chunk events with the latency spread over the pieces"""
+        completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+        pieces = stream_pieces(content)
+
+        def chunk(delta, finish_reason=None, **extra):
+            return 'data: ' + json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': payload.get('model', 'fake'),
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}] if delta is not None else [],
+                **extra
+            }) + '\n\n'
+
+        def generate():
+            yield chunk({'role': 'assistant', 'content': ''})
+            for piece in pieces:
+                time.sleep(delay / max(1, len(pieces)))
+                yield chunk({'content': piece})
+            yield chunk({}, 'stop')
+            if (payload.get('stream_options') or {}).get('include_usage'):
+                usage = fake_usage(payload, content)
+                yield chunk(None, usage={**usage, 'total_tokens': usage['prompt_tokens'] + usage['completion_tokens']})
+            yield 'data: [DONE]\n\n'
+
+        return Response(generate(), mimetype='text/event-stream')
+
+    @app.route('/health')
+    def health():
+        return {'status': 'healthy'}, 200
+
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the fake OpenAI-compatible LLM server')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency-ms', type=float, default=float(os.environ.get('FAKE_LLM_LATENCY_MS', 0)))
+    parser.add_argument('--jitter-ms', type=float, default=float(os.environ.get('FAKE_LLM_LATENCY_JITTER_MS', 0)))
+    parser.add_argument('--error-rate', type=float, default=float(os.environ.get('FAKE_LLM_ERROR_RATE', 0)))
+    parser.add_argument('--rate-limit-rate', type=float, default=float(os.environ.get('FAKE_LLM_RATE_LIMIT_RATE', 0)))
+    args = parser.parse_args()
+
+    print(f"🤖 Fake LLM server on http://localhost:{args.port}/v1 "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, error rate {args.error_rate})")
+    create_fake_llm_app(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate).run(
+        host='0.0.0.0', port=args.port, threaded=True
+    )
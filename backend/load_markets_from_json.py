@@ -15,7 +15,7 @@ os.environ['FLASK_ENV'] = 'development'
 os.environ['DATABASE_URL'] = 'sqlite:///prediction_market.db'
 
 from app import create_app, db
-from app.models import Market, Idea, Source, Bet
+from app.models import Market, MarketNeighbor, Idea, IdeaKeyword, Source, Bet
 
 def load_markets_from_json():
     """Load markets from markets.json file"""
@@ -34,7 +34,9 @@ def load_markets_from_json():
         
         # Clear existing markets (optional - comment out if you want to keep existing ones)
         print("🗑️  Clearing existing markets...")
+        MarketNeighbor.query.delete()
         Market.query.delete()
+        IdeaKeyword.query.delete()
         Idea.query.delete()
         Source.query.delete()
         db.session.commit()
@@ -143,6 +145,16 @@ def load_markets_from_json():
         print(f"✅ Successfully loaded {len(markets_data)} markets!")
         print("=" * 50)
         
+        # Rebuild the similar-markets graph for the new set of markets
+        try:
+            from app.services.market_similarity import get_market_similarity_service
+            print("\n🔄 Building similar-markets graph...")
+            graph = get_market_similarity_service(app.config).rebuild_graph()
+            print(f"✓ Indexed {graph['markets']} markets ({graph['edges']} edges)")
+        except Exception as e:
+            print(f"⚠ Could not build similar-markets graph: {e}")
+            print("  Run build_market_graph.py once the embedding model is available.")
+        
         # Display summary
         total_markets = Market.query.count()
         active_markets = Market.query.filter_by(status='active').count()
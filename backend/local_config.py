@@ -19,15 +19,133 @@ class LocalConfig:
     CELERY_BROKER_URL = ''
     CELERY_RESULT_BACKEND = ''
     
+    # Background jobs (no Celery locally)
+    JOB_EXECUTOR = 'thread'
+    JOB_THREAD_WORKERS = 4
+    
+    # Single-flight job coalescing (process-local lock on SQLite)
+    SINGLE_FLIGHT_BACKEND = 'db'
+    SINGLE_FLIGHT_STALE_SECONDS = 1800
+    SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS = 30
+    
+    # Server-sent event streams
+    SSE_POLL_INTERVAL_SECONDS = 0.5
+    SSE_HEARTBEAT_SECONDS = 15
+    SSE_MAX_STREAM_SECONDS = 900
+    
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
     
+    # LLM client (set LLM_BACKEND=fake to run without an API key)
+    LLM_BACKEND = os.environ.get('LLM_BACKEND', 'openai')
+    OPENAI_BASE_URL = ''
+    LLM_TIMEOUT_SECONDS = 60
+    LLM_MAX_CONNECTIONS = 20
+    FAKE_LLM_LATENCY_MS = 0
+    FAKE_LLM_LATENCY_JITTER_MS = 0
+    FAKE_LLM_ERROR_RATE = 0
+    FAKE_LLM_RATE_LIMIT_RATE = 0
+    
+    # LLM rate limiting (local buckets only)
+    LLM_RPM = 500
+    LLM_TPM = 200000
+    LLM_MODEL_LIMITS = ''
+    LLM_MAX_CONCURRENCY = 16
+    LLM_MIN_CONCURRENCY = 1
+    LLM_LATENCY_SPIKE_FACTOR = 3.0
+    LLM_RATE_LIMIT_REDIS = False
+    LLM_MAX_RETRIES = 3
+    LLM_RETRY_BASE_SECONDS = 0.5
+    LLM_RETRY_MAX_SECONDS = 20
+    
+    # Per-task latency budgets with hedged requests
+    LLM_DEADLINES_ENABLED = True
+    LLM_LATENCY_BUDGETS = ''
+    
+    # LLM cost accounting overrides (USD per 1M prompt/completion tokens)
+    LLM_PRICES = ''
+    
+    # Bulk LLM batches (processed in-process)
+    LLM_BATCH_BACKEND = 'local'
+    LLM_BATCH_DIR = 'llm_batches'
+    LLM_BATCH_MAX_ITEMS = 1000
+    LLM_BATCH_POLL_SECONDS = 5
+    LLM_BATCH_MAX_WAIT_SECONDS = 3600
+    LLM_BATCH_LOCAL_CONCURRENCY = 8
+    
+    # Prompt size limit (tokens) for budgeted prompts
+    LLM_PROMPT_MAX_TOKENS = 6000
+    
+    # LLM response cache
+    LLM_CACHE_BACKEND = 'sqlite'
+    LLM_CACHE_PATH = 'llm_cache.db'
+    LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES = 10000
+    
+    # Embedding storage
+    EMBEDDING_STORAGE_DTYPE = 'float32'
+    
+    # Embedding inference (torch or onnx)
+    EMBEDDING_BACKEND = 'torch'
+    EMBEDDING_ONNX_DIR = 'models/all-MiniLM-L6-v2-onnx'
+    EMBEDDING_ONNX_THREADS = 0
+    
+    # Shared embedding server (empty: embed in-process)
+    EMBEDDING_SERVER_SOCKET = ''
+    EMBEDDING_SERVER_TIMEOUT_SECONDS = 10
+    EMBEDDING_SERVER_RETRY_SECONDS = 30
+    EMBEDDING_SERVER_MAX_BATCH = 64
+    EMBEDDING_SERVER_MAX_WAIT_MS = 5
+    
+    # Idea search configuration
+    SEARCH_CANDIDATE_POOL = 100
+    SEARCH_CACHE_TTL_SECONDS = 300
+    
+    # Market autocomplete index refresh interval
+    AUTOCOMPLETE_REFRESH_SECONDS = 5
+    
+    # Similar markets (kNN graph)
+    SIMILAR_MARKETS_K = 10
+    SIMILAR_MARKETS_BLOCK_SIZE = 256
+    
+    # Claim generation batches
+    CLAIM_BATCH_CONCURRENCY = 5
+    CLAIM_BATCH_PACK_SIZE = 10
+    
+    # Investigation Configuration
+    INVESTIGATION_MAX_CONCURRENCY = 5
+    INVESTIGATION_PIPELINE = ''  # JSON step definitions; empty = built-in five steps
+    INVESTIGATION_BULK_WORKERS = 4
+    INVESTIGATION_BULK_RATE_PER_MINUTE = 30
+    INVESTIGATION_BULK_WRITE_BATCH = 20
+    INVESTIGATION_BULK_MAX_IDEAS = 1000
+    INVESTIGATION_BULK_CHECKPOINT = ''  # empty = bulk_investigation_checkpoint.json in the instance folder
+    
+    # Generated script library (cosine similarity thresholds)
+    SCRIPT_LIBRARY_ENABLED = True
+    SCRIPT_REUSE_THRESHOLD = 0.97
+    SCRIPT_ADAPT_THRESHOLD = 0.85
+    
+    # Evidence reuse across investigations of similar claims
+    EVIDENCE_REUSE_ENABLED = True
+    EVIDENCE_REUSE_THRESHOLD = 0.95
+    EVIDENCE_REUSE_STEPS = 'literature_search,reproducibility_analysis,statistical_evaluation,effect_size_assessment,expert_consensus'
+    
     # Scraper Configuration
     ARXIV_MAX_RESULTS = 50
     SCRAPER_INTERVAL_HOURS = 24
     
+    # Tiered claim extraction
+    CLAIM_TIER_ENABLED = True
+    CLAIM_TIER_ACCEPT_SCORE = 0.75
+    CLAIM_SPACY_MODEL = 'en_core_web_sm'
+    CLAIM_NLP_BATCH_SIZE = 64
+    
     # Agent Configuration
     AGENT_MAX_STAKE = 100
+    AGENT_BET_MODEL = 'gpt-4o-mini'
+    AGENT_SWEEP_CONCURRENCY = 5
+    AGENT_SWEEP_PACK_SIZE = 5
     AGENT_CONFIDENCE_THRESHOLD = 0.7
     
     # Experiment Configuration
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Migration script to create the idea_keywords table and backfill it from ideas.keywords
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set environment variables for local development
+os.environ['FLASK_ENV'] = 'development'
+os.environ['DATABASE_URL'] = 'sqlite:///prediction_market.db'
+
+from app import create_app, db
+
+def run_migration():
+    """Create idea_keywords and backfill it from existing ideas"""
+    app = create_app()
+    
+    with app.app_context():
+        print("🔄 Running migration: normalize idea keywords into idea_keywords")
+        
+        try:
+            from sqlalchemy import inspect
+            from app.models import IdeaKeyword
+            from app.services.keyword_index import backfill_idea_keywords
+            
+            inspector = inspect(db.engine)
+            if 'idea_keywords' not in inspector.get_table_names():
+                print("  Creating idea_keywords table...")
+                IdeaKeyword.__table__.create(db.engine)
+                print("  ✓ Created idea_keywords table")
+            else:
+                print("✓ Table already exists.")
+            
+            print("  Backfilling keywords from existing ideas...")
+            processed = backfill_idea_keywords()
+            print(f"  ✓ Indexed keywords for {processed} ideas")
+            
+            print("\n✅ Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"\n❌ Migration failed: {e}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
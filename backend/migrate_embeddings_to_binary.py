@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migration script to convert JSON-text idea embeddings into packed binary blobs
+"""
+import os
+import sys
+import argparse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set environment variables for local development
+os.environ['FLASK_ENV'] = 'development'
+os.environ['DATABASE_URL'] = 'sqlite:///prediction_market.db'
+
+from app import create_app, db
+
+def run_migration(dtype=None, batch_size=500):
+    """Add ideas.embedding_blob and move legacy JSON embeddings into it"""
+    app = create_app()
+    
+    with app.app_context():
+        print("🔄 Running migration: JSON embeddings -> packed binary")
+        
+        try:
+            from sqlalchemy import inspect
+            from app.models import Idea
+            from app.services.embedding_codec import legacy_json_to_blob, get_storage_dtype
+            
+            dtype = dtype or get_storage_dtype()
+            
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('ideas')]
+            
+            if 'embedding_blob' not in columns:
+                print("  Adding embedding_blob column...")
+                blob_type = db.LargeBinary().compile(dialect=db.engine.dialect)
+                with db.engine.connect() as conn:
+                    conn.execute(db.text(f"ALTER TABLE ideas ADD COLUMN embedding_blob {blob_type}"))
+                    conn.commit()
+                print("  ✓ Added embedding_blob column")
+            
+            print(f"  Converting embeddings to {dtype}...")
+            converted = 0
+            failed = 0
+            last_id = 0
+            while True:
+                ideas = Idea.query.filter(
+                    Idea.id > last_id,
+                    Idea._embedding_json.isnot(None)
+                ).order_by(Idea.id).limit(batch_size).all()
+                if not ideas:
+                    break
+                
+                for idea in ideas:
+                    try:
+                        idea.embedding_blob = legacy_json_to_blob(idea._embedding_json, dtype=dtype)
+                        idea._embedding_json = None
+                        converted += 1
+                    except (ValueError, TypeError) as e:
+                        print(f"  ⚠ Idea {idea.id}: could not parse embedding ({e})")
+                        failed += 1
+                
+                db.session.commit()
+                last_id = ideas[-1].id
+            
+            print(f"  ✓ Converted {converted} embeddings ({failed} skipped)")
+            print("\n✅ Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"\n❌ Migration failed: {e}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert JSON embeddings to packed binary')
+    parser.add_argument('--dtype', choices=['float32', 'float16', 'int8'], help='Storage dtype (default: EMBEDDING_STORAGE_DTYPE)')
+    args = parser.parse_args()
+    run_migration(dtype=args.dtype)
@@ -0,0 +1,8 @@
+-- Add packed binary embedding column to ideas table
+-- Run migrate_embeddings_to_binary.py afterwards to convert existing JSON embeddings
+
+-- For SQLite:
+ALTER TABLE ideas ADD COLUMN embedding_blob BLOB;
+
+-- For PostgreSQL (if needed):
+-- ALTER TABLE ideas ADD COLUMN IF NOT EXISTS embedding_blob BYTEA;
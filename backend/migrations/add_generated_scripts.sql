@@ -0,0 +1,19 @@
+-- Library of generated test scripts, reused for similar hypotheses
+-- (see app/services/script_library.py)
+
+CREATE TABLE IF NOT EXISTS generated_scripts (
+    id SERIAL PRIMARY KEY,
+    investigation_id INTEGER REFERENCES investigations(id) ON DELETE SET NULL,
+    adapted_from_id INTEGER REFERENCES generated_scripts(id) ON DELETE SET NULL,
+    hypothesis TEXT NOT NULL,
+    formalized_claim TEXT,
+    main_py TEXT NOT NULL,
+    explanation TEXT,
+    model_used VARCHAR(50),
+    embedding_blob BYTEA NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP
+);
+
+-- For SQLite, use INTEGER PRIMARY KEY AUTOINCREMENT for id and BLOB for embedding_blob
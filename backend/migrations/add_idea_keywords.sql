@@ -0,0 +1,11 @@
+-- Normalized idea/keyword association table
+-- Inverted index for "ideas sharing keywords with X" lookups
+-- Run migrate_add_idea_keywords.py afterwards to backfill from ideas.keywords
+
+CREATE TABLE IF NOT EXISTS idea_keywords (
+    idea_id INTEGER NOT NULL REFERENCES ideas(id) ON DELETE CASCADE,
+    keyword VARCHAR(128) NOT NULL,
+    PRIMARY KEY (idea_id, keyword)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idea_keywords_keyword ON idea_keywords(keyword, idea_id);
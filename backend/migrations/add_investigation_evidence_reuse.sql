@@ -0,0 +1,7 @@
+-- Evidence reuse across investigations of similar claims
+-- (see app/services/evidence_library.py)
+
+ALTER TABLE investigations ADD COLUMN IF NOT EXISTS claim_embedding_blob BYTEA;
+ALTER TABLE investigations ADD COLUMN IF NOT EXISTS provenance TEXT;
+
+-- For SQLite, drop IF NOT EXISTS and use BLOB for claim_embedding_blob
@@ -0,0 +1,4 @@
+-- Add single-flight dedupe key to jobs table
+
+ALTER TABLE jobs ADD COLUMN dedupe_key VARCHAR(128);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON jobs(dedupe_key, status);
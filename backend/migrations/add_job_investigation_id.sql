@@ -0,0 +1,4 @@
+-- Investigation a job works on, so resuming one finds its in-flight job by index
+
+ALTER TABLE jobs ADD COLUMN investigation_id INTEGER;
+CREATE INDEX IF NOT EXISTS idx_jobs_investigation ON jobs(investigation_id, status);
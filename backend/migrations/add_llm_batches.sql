@@ -0,0 +1,27 @@
+-- Bulk LLM batches (see app/services/bulk_llm.py)
+
+CREATE TABLE IF NOT EXISTS llm_batches (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    phase VARCHAR(20) NOT NULL,
+    parent_id INTEGER REFERENCES llm_batches(id),
+    status VARCHAR(20) NOT NULL DEFAULT 'prepared',
+    backend VARCHAR(20) NOT NULL,
+    remote_id VARCHAR(128),
+    input_path TEXT NOT NULL,
+    output_path TEXT,
+    request_count INTEGER DEFAULT 0,
+    items TEXT DEFAULT '{}',
+    cached TEXT DEFAULT '{}',
+    results TEXT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    submitted_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    applied_at TIMESTAMP
+);
+
+-- Tables created before cached responses were stored with the batch
+ALTER TABLE llm_batches ADD COLUMN IF NOT EXISTS cached TEXT DEFAULT '{}';
+
+CREATE INDEX IF NOT EXISTS idx_llm_batches_kind_status ON llm_batches(kind, status);
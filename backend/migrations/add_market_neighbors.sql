@@ -0,0 +1,17 @@
+-- Similar-markets kNN graph
+-- Run build_market_graph.py afterwards to populate it
+
+-- For SQLite:
+ALTER TABLE markets ADD COLUMN embedding_blob BLOB;
+
+-- For PostgreSQL (if needed):
+-- ALTER TABLE markets ADD COLUMN IF NOT EXISTS embedding_blob BYTEA;
+
+CREATE TABLE IF NOT EXISTS market_neighbors (
+    market_id INTEGER NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    neighbor_id INTEGER NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (market_id, neighbor_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_neighbors_score ON market_neighbors(market_id, score);
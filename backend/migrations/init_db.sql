@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS ideas (
     abstract TEXT NOT NULL,
     keywords TEXT[],
     embedding vector(1536),
+    embedding_blob BYTEA,
     extracted_claim TEXT,
     confidence_score FLOAT DEFAULT 0.0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -35,6 +36,13 @@ CREATE TABLE IF NOT EXISTS ideas (
 -- Create index for vector similarity search
 CREATE INDEX IF NOT EXISTS ideas_embedding_idx ON ideas USING ivfflat (embedding vector_cosine_ops);
 
+-- Idea keywords table (inverted index over ideas.keywords)
+CREATE TABLE IF NOT EXISTS idea_keywords (
+    idea_id INTEGER NOT NULL REFERENCES ideas(id) ON DELETE CASCADE,
+    keyword VARCHAR(128) NOT NULL,
+    PRIMARY KEY (idea_id, keyword)
+);
+
 -- Markets table
 CREATE TABLE IF NOT EXISTS markets (
     id SERIAL PRIMARY KEY,
@@ -48,7 +56,16 @@ CREATE TABLE IF NOT EXISTS markets (
     resolved_at TIMESTAMP,
     resolution_outcome VARCHAR(50),
     bid_price FLOAT,
-    ask_price FLOAT
+    ask_price FLOAT,
+    embedding_blob BYTEA
+);
+
+-- Similar-markets kNN graph
+CREATE TABLE IF NOT EXISTS market_neighbors (
+    market_id INTEGER NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    neighbor_id INTEGER NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (market_id, neighbor_id)
 );
 
 -- Agents table
@@ -89,13 +106,94 @@ CREATE TABLE IF NOT EXISTS experiments (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Investigations table
+CREATE TABLE IF NOT EXISTS investigations (
+    id SERIAL PRIMARY KEY,
+    idea_id INTEGER NOT NULL REFERENCES ideas(id),
+    agent_id INTEGER REFERENCES agents(id),
+    formalized_claim TEXT NOT NULL,
+    test_criteria TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    reasoning_steps TEXT,
+    evidence TEXT,
+    conclusion VARCHAR(20),
+    confidence FLOAT,
+    summary TEXT,
+    claim_embedding_blob BYTEA,
+    provenance TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+-- Library of generated test scripts, reused for similar hypotheses
+CREATE TABLE IF NOT EXISTS generated_scripts (
+    id SERIAL PRIMARY KEY,
+    investigation_id INTEGER REFERENCES investigations(id) ON DELETE SET NULL,
+    adapted_from_id INTEGER REFERENCES generated_scripts(id) ON DELETE SET NULL,
+    hypothesis TEXT NOT NULL,
+    formalized_claim TEXT,
+    main_py TEXT NOT NULL,
+    explanation TEXT,
+    model_used VARCHAR(50),
+    embedding_blob BYTEA NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP
+);
+
+-- Bulk LLM batches
+CREATE TABLE IF NOT EXISTS llm_batches (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    phase VARCHAR(20) NOT NULL,
+    parent_id INTEGER REFERENCES llm_batches(id),
+    status VARCHAR(20) NOT NULL DEFAULT 'prepared',
+    backend VARCHAR(20) NOT NULL,
+    remote_id VARCHAR(128),
+    input_path TEXT NOT NULL,
+    output_path TEXT,
+    request_count INTEGER DEFAULT 0,
+    items TEXT DEFAULT '{}',
+    cached TEXT DEFAULT '{}',
+    results TEXT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    submitted_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    applied_at TIMESTAMP
+);
+
+-- Background jobs table
+CREATE TABLE IF NOT EXISTS jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    dedupe_key VARCHAR(128),
+    investigation_id INTEGER,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress FLOAT DEFAULT 0.0,
+    progress_message TEXT,
+    params TEXT DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
 -- Create indexes
 CREATE INDEX IF NOT EXISTS idx_ideas_source ON ideas(source_id);
 CREATE INDEX IF NOT EXISTS idx_ideas_confidence ON ideas(confidence_score DESC);
+CREATE INDEX IF NOT EXISTS idx_idea_keywords_keyword ON idea_keywords(keyword, idea_id);
 CREATE INDEX IF NOT EXISTS idx_markets_status ON markets(status);
 CREATE INDEX IF NOT EXISTS idx_markets_idea ON markets(idea_id);
+CREATE INDEX IF NOT EXISTS idx_market_neighbors_score ON market_neighbors(market_id, score);
 CREATE INDEX IF NOT EXISTS idx_bets_market ON bets(market_id);
 CREATE INDEX IF NOT EXISTS idx_bets_agent ON bets(agent_id);
 CREATE INDEX IF NOT EXISTS idx_experiments_market ON experiments(market_id);
 CREATE INDEX IF NOT EXISTS idx_experiments_status ON experiments(status);
+CREATE INDEX IF NOT EXISTS idx_llm_batches_kind_status ON llm_batches(kind, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_type_status ON jobs(job_type, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON jobs(dedupe_key, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_investigation ON jobs(investigation_id, status);
 
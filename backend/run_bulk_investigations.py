@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Investigate the idea backlog on a worker pool
+Interrupting (Ctrl-C) writes the finished investigations; re-running continues from the
+checkpoint (see app/services/bulk_investigator.py)
+"""
+import os
+import sys
+import argparse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.bulk_investigator import BulkInvestigator
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk investigation of ideas without a completed investigation')
+    parser.add_argument('--limit', type=int, help='Maximum number of ideas in a new run')
+    parser.add_argument('--workers', type=int, help='Concurrent investigations')
+    parser.add_argument('--rate', type=float, help='Investigations started per minute')
+    parser.add_argument('--retry-failed', action='store_true', help='Retry the ideas that failed in the checkpointed run')
+    parser.add_argument('--fresh', action='store_true', help='Discard an unfinished checkpoint and select again')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        print("🔬 Investigating the idea backlog...")
+        result = BulkInvestigator(app.config).run(
+            limit=args.limit,
+            workers=args.workers,
+            rate_per_minute=args.rate,
+            retry_failed=args.retry_failed,
+            fresh=args.fresh,
+            progress_callback=lambda fraction, message: print(f"   {message}")
+        )
+        run = result['run']
+        totals = result['totals']
+        print(f"✅ {run['completed']} investigated, {run['failed']} failed, {run['skipped']} skipped "
+              f"in {run['elapsed_seconds']}s ({run['investigations_per_minute']}/min)")
+        print(f"   Run totals: {totals['completed']} completed, {totals['failed']} failed, "
+              f"{totals['llm_calls']} LLM calls, ${totals['cost_usd']:.4f}")
+        for idea_id, error in result['failures'].items():
+            print(f"   ❌ idea {idea_id}: {error}")
+        if not result['finished']:
+            print(f"⏸️  {result['remaining']} ideas remaining - run again to resume")
+
+if __name__ == '__main__':
+    main()
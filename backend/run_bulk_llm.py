@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Run claim extraction or investigation over the idea backlog through LLM batches
+Re-running resumes unfinished batches (see app/services/bulk_llm.py)
+"""
+import os
+import sys
+import argparse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.bulk_llm import BulkProcessor, PHASES
+from app.services.llm_rate_limiter import llm_priority
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk LLM processing of the idea backlog')
+    parser.add_argument('kind', choices=list(PHASES), help='What to run over the backlog')
+    parser.add_argument('--limit', type=int, help='Maximum number of new ideas to include')
+    parser.add_argument('--no-wait', action='store_true', help='Submit/advance batches and exit without polling')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        print(f"🔄 Running bulk {args.kind} ({app.config.get('LLM_BATCH_BACKEND', 'local')} batches)...")
+        with llm_priority('batch'):
+            result = BulkProcessor(app.config).run(
+                args.kind,
+                limit=args.limit,
+                wait=not args.no_wait,
+                progress_callback=lambda fraction, message: print(f"   {message}")
+            )
+        print(f"✅ Selected {result['selected']} ideas, applied {result['applied']} results "
+              f"({result['fallbacks']} fallbacks, {result['sent_requests']} requests sent, "
+              f"{result['skipped_requests']} cached or duplicate)")
+        for batch in result['batches']:
+            print(f"   #{batch['id']} {batch['phase']}: {batch['status']} ({batch['request_count']} requests)")
+        if result['pending']:
+            print(f"⏳ {result['pending']} batch(es) still pending - run again to resume")
+
+if __name__ == '__main__':
+    main()
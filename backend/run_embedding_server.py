@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Serve sentence embeddings to every worker from one process over a Unix socket
+Point the app at it with EMBEDDING_SERVER_SOCKET (see app/services/embedding_server.py)
+"""
+import os
+import sys
+import argparse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.embedding_server import EmbeddingServer
+from app.services.idea_extractor import EMBEDDING_MODEL_NAME, get_embedding_model
+
+def main():
+    app = create_app()
+    
+    parser = argparse.ArgumentParser(description='Shared sentence embedding server')
+    parser.add_argument('--socket', default=app.config.get('EMBEDDING_SERVER_SOCKET') or 'embedding.sock',
+                        help='Unix socket path to listen on')
+    parser.add_argument('--max-batch', type=int, default=app.config.get('EMBEDDING_SERVER_MAX_BATCH', 64),
+                        help='Maximum texts encoded together')
+    parser.add_argument('--max-wait-ms', type=float, default=app.config.get('EMBEDDING_SERVER_MAX_WAIT_MS', 5),
+                        help='How long a request waits for others to join its batch')
+    args = parser.parse_args()
+    
+    print(f"🔄 Loading {EMBEDDING_MODEL_NAME} ({app.config.get('EMBEDDING_BACKEND', 'torch')} backend)...")
+    model = get_embedding_model(app.config)
+    server = EmbeddingServer(
+        args.socket,
+        EMBEDDING_MODEL_NAME,
+        lambda texts: model.encode(texts, batch_size=args.max_batch),
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms
+    )
+    print(f"✅ Serving embeddings on {os.path.abspath(args.socket)} "
+          f"(batches of up to {args.max_batch} texts, {args.max_wait_ms:g} ms window)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        stats = server.stats
+        print(f"⏹  Stopped after {stats['requests']} requests, {stats['texts']} texts in {stats['batches']} batches")
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from app import db
 from app.models import Source, Idea
 from app.services.idea_extractor import IdeaExtractor
+from app.services.llm_rate_limiter import llm_priority
 
 class ArxivScraper:
     """Scraper for arXiv papers"""
@@ -12,9 +13,15 @@ class ArxivScraper:
         self.max_results = config.get('ARXIV_MAX_RESULTS', 50)
         self.idea_extractor = IdeaExtractor(config)
     
-    def scrape(self, categories=['cs.AI', 'cs.LG', 'stat.ML'], days_back=7):
-        """Scrape recent papers from arXiv"""
+    def scrape(self, categories=['cs.AI', 'cs.LG', 'stat.ML'], days_back=7, extract_claims=True):
+        """
+        Scrape recent papers from arXiv
+        With extract_claims=False only embeddings are computed; claims are left for a
+        bulk claim_extraction run (see app/services/bulk_llm.py). Claims are extracted for
+        all new papers together; only abstracts the claim classifier is unsure about reach the LLM.
+        """
         results = []
+        self.claim_tiers = {'local': 0, 'llm': 0}
         
         # Create or get source
         source = Source.query.filter_by(
@@ -67,18 +74,24 @@ class ArxivScraper:
                 keywords=keywords
             )
             
-            # Extract claim and embedding
-            try:
-                extracted = self.idea_extractor.extract(idea)
-                idea.extracted_claim = extracted.get('claim')
-                idea.confidence_score = extracted.get('confidence', 0.0)
-                idea.embedding = extracted.get('embedding')
-            except Exception as e:
-                print(f"Failed to extract from idea: {str(e)}")
-            
             db.session.add(idea)
             results.append(idea)
         
+        # Extract claims and embeddings
+        try:
+            if extract_claims:
+                for idea, extracted in zip(results, self.idea_extractor.extract_batch(results)):
+                    idea.extracted_claim = extracted.get('claim')
+                    idea.confidence_score = extracted.get('confidence', 0.0)
+                    idea.embedding = extracted.get('embedding')
+                    self.claim_tiers[extracted['tier']] += 1
+            else:
+                embeddings = self.idea_extractor._generate_embeddings([f"{idea.title} {idea.abstract}" for idea in results])
+                for idea, embedding in zip(results, embeddings):
+                    idea.embedding = embedding
+        except Exception as e:
+            print(f"Failed to extract from ideas: {str(e)}")
+        
         db.session.commit()
         
         # Update source last_scraped
@@ -87,12 +100,15 @@ class ArxivScraper:
         
         return results
 
-def run_scraper(config):
+def run_scraper(config, extract_claims=True):
     """Run the arXiv scraper"""
     scraper = ArxivScraper(config)
-    results = scraper.scrape()
+    # Backfill work: interactive LLM calls are admitted first
+    with llm_priority('batch'):
+        results = scraper.scrape(extract_claims=extract_claims)
     return {
         'count': len(results),
+        'claim_tiers': scraper.claim_tiers,
         'ideas': [idea.to_dict() for idea in results]
     }
 
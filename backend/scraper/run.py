@@ -13,6 +13,7 @@ import argparse
 def main():
     parser = argparse.ArgumentParser(description='Run the arXiv scraper')
     parser.add_argument('--seed', action='store_true', help='Seed initial data')
+    parser.add_argument('--bulk', action='store_true', help='Extract claims through LLM batches after scraping')
     args = parser.parse_args()
     
     app = create_app()
@@ -23,11 +24,20 @@ def main():
             seed_database()
         
         print("Running arXiv scraper...")
-        result = run_scraper(app.config)
+        result = run_scraper(app.config, extract_claims=not args.bulk)
         print(f"Scraped {result['count']} new papers")
+        if not args.bulk:
+            tiers = result['claim_tiers']
+            print(f"Claims: {tiers['local']} from the local classifier, {tiers['llm']} from the LLM")
         
         for idea in result['ideas']:
             print(f"  - {idea['title'][:80]}...")
+        
+        if args.bulk:
+            from app.services.bulk_llm import BulkProcessor
+            print("Extracting claims in bulk...")
+            bulk = BulkProcessor(app.config).run('claim_extraction')
+            print(f"Extracted {bulk['applied']} claims ({bulk['pending']} batch(es) still pending)")
 
 def seed_database():
     """Seed database with initial data"""
@@ -0,0 +1,70 @@
+"""
+Shared fixtures: a Flask app on a throwaway SQLite database with the fake LLM backend
+and no persistent LLM cache, so tests never reach the network
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_dir = tempfile.mkdtemp(prefix='prediction-market-tests-')
+os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('LLM_CACHE_BACKEND', 'none')
+os.environ.setdefault('JOB_EXECUTOR', 'thread')
+
+import pytest
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_idea(app):
+    """Factory for ideas attached to one shared source"""
+    from app.models import Idea, Source
+
+    source = Source(name='arXiv', url='https://arxiv.org', type='arxiv')
+    db.session.add(source)
+    db.session.commit()
+
+    def make(title='Sparse attention', abstract='Sparse attention improves accuracy', embedding=None, **fields):
+        idea = Idea(source_id=source.id, title=title, abstract=abstract, **fields)
+        if embedding is not None:
+            idea.embedding = embedding
+        db.session.add(idea)
+        db.session.commit()
+        return idea
+
+    return make
+
+
+@pytest.fixture
+def job_executor(monkeypatch):
+    """Record submitted job ids instead of running the jobs"""
+    from app.tasks import jobs
+
+    class RecordingExecutor:
+        def __init__(self):
+            self.submitted = []
+
+        def submit(self, app, job_id):
+            self.submitted.append(job_id)
+
+    executor = RecordingExecutor()
+    monkeypatch.setattr(jobs, '_executor', executor)
+    return executor
@@ -0,0 +1,55 @@
+import os
+from datetime import datetime
+import pytest
+from app.models import Investigation
+from app.services.bulk_investigator import CHECKPOINT_NAME, BulkInvestigator
+
+RESULT = {
+    'formalized_claim': 'H1: sparse attention improves accuracy',
+    'test_criteria': [],
+    'reasoning_steps': [],
+    'evidence': [],
+    'conclusion': 'supported',
+    'confidence': 0.8,
+    'summary': 'Supported',
+    'claim_embedding': None,
+    'provenance': None
+}
+
+
+@pytest.fixture
+def investigator(app, tmp_path):
+    app.config['INVESTIGATION_BULK_CHECKPOINT'] = str(tmp_path / 'checkpoint.json')
+    return BulkInvestigator(app.config)
+
+
+def test_checkpoint_defaults_to_the_instance_folder(app):
+    app.config['INVESTIGATION_BULK_CHECKPOINT'] = ''
+    assert BulkInvestigator(app.config).checkpoint_path == os.path.join(app.instance_path, CHECKPOINT_NAME)
+
+
+def test_run_stopped_by_an_error_writes_finished_results_and_checkpoint(investigator, make_idea, monkeypatch):
+    first = make_idea(title='First', confidence_score=0.9)
+    second = make_idea(title='Second', confidence_score=0.5)
+    first_id, second_id = first.id, second.id
+
+    def investigate(self, app, idea_id):
+        if idea_id == second_id:
+            raise RuntimeError('database went away')
+        now = datetime.utcnow()
+        return {'idea_id': idea_id, 'result': RESULT, 'error': None, 'started_at': now, 'completed_at': now, 'llm': None}
+
+    monkeypatch.setattr(BulkInvestigator, '_investigate', investigate)
+    with pytest.raises(RuntimeError):
+        investigator.run(workers=1, rate_per_minute=600)
+
+    checkpoint = investigator.load_checkpoint()
+    assert checkpoint['idea_ids'] == [first_id, second_id]
+    assert checkpoint['done'] == [first_id] and not checkpoint['finished']
+    assert [i.idea_id for i in Investigation.query.all()] == [first_id]
+
+    # The next run continues with the idea that was not written
+    monkeypatch.setattr(BulkInvestigator, '_investigate', lambda self, app, idea_id: investigate(self, app, first_id) | {'idea_id': idea_id})
+    result = investigator.run(workers=1, rate_per_minute=600)
+    assert result['finished'] and result['run']['completed'] == 1
+    assert investigator.load_checkpoint()['done'] == [first_id, second_id]
@@ -0,0 +1,147 @@
+import json
+import types
+import pytest
+from app import db
+from app.models import Idea, Investigation, LLMBatch
+from app.services.bulk_investigator import select_backlog
+from app.services.bulk_llm import BulkProcessor
+from app.services.llm_batch import BATCH_ENDPOINT, OpenAIBatchBackend, _output_line
+from app.services.llm_cache import LLMCache, cache_key
+
+
+class DictCache(LLMCache):
+    backend = 'memory'
+
+    def __init__(self):
+        super().__init__(ttl_seconds=3600, max_entries=100)
+        self.entries = {}
+
+    def _get(self, key):
+        return self.entries.get(key)
+
+    def _set(self, key, value):
+        self.entries[key] = value
+
+    def _clear(self):
+        self.entries.clear()
+
+    def size(self):
+        return len(self.entries)
+
+
+@pytest.fixture
+def processor(app, tmp_path):
+    app.config['CLAIM_TIER_ENABLED'] = False
+    app.config['LLM_BATCH_DIR'] = str(tmp_path)
+    processor = BulkProcessor(app.config)
+    processor.cache = DictCache()
+    return processor
+
+
+def _stats(kind):
+    return {'kind': kind, 'selected': 0, 'applied': 0, 'fallbacks': 0, 'sent_requests': 0, 'skipped_requests': 0, 'batch_ids': []}
+
+
+def test_cached_response_survives_eviction_before_apply(processor, make_idea):
+    idea = make_idea(title='Sparse attention', abstract='We study sparse attention.')
+    request = processor.extractor.claim_request(idea.title, idea.abstract)
+    processor.cache.set(cache_key(request), 'CLAIM: Sparse attention halves latency\nCONFIDENCE: 0.8')
+    stats = _stats('claim_extraction')
+
+    processor._start('claim_extraction', 10, stats)
+    batch = db.session.get(LLMBatch, stats['batch_ids'][0])
+    assert batch.request_count == 0 and batch.status == 'completed'
+    processor.cache.clear()
+    processor._advance('claim_extraction', stats)
+
+    assert db.session.get(Idea, idea.id).extracted_claim == 'Sparse attention halves latency'
+    assert stats['fallbacks'] == 0
+    assert db.session.get(LLMBatch, batch.id).status == 'applied'
+
+
+def test_investigation_kind_selects_the_bulk_investigation_backlog(processor, make_idea):
+    completed = make_idea(title='Done', confidence_score=0.9)
+    retried = make_idea(title='Failed before', confidence_score=0.8)
+    fresh = make_idea(title='New', confidence_score=0.5)
+    db.session.add_all([
+        Investigation(idea_id=completed.id, formalized_claim='c', status='completed'),
+        Investigation(idea_id=retried.id, formalized_claim='c', status='failed'),
+    ])
+    db.session.commit()
+    stats = _stats('investigation')
+
+    processor._start('investigation', 10, stats)
+
+    batch = db.session.get(LLMBatch, stats['batch_ids'][0])
+    assert [int(idea_id) for idea_id in batch.items] == select_backlog(processor.config, 10) == [retried.id, fresh.id]
+    # Ideas in unfinished batches are not selected by the next run
+    processor._start('investigation', 10, stats)
+    assert stats['selected'] == 0
+
+
+class StubOpenAI:
+    """files and batches endpoints of the OpenAI client; a batch completes on its second retrieve"""
+
+    def __init__(self, final_status='completed', content='CLAIM: Sparse attention halves latency\nCONFIDENCE: 0.8'):
+        self.final_status = final_status
+        self.content = content
+        self.uploads, self.created, self.retrieves = [], [], 0
+        self.files = types.SimpleNamespace(create=self._upload, content=self._download)
+        self.batches = types.SimpleNamespace(create=self._create, retrieve=self._retrieve)
+
+    def _upload(self, file, purpose):
+        self.uploads.append((purpose, file.read().decode()))
+        return types.SimpleNamespace(id=f'file-in-{len(self.uploads)}')
+
+    def _create(self, **kwargs):
+        self.created.append(kwargs)
+        return types.SimpleNamespace(id='batch_1')
+
+    def _retrieve(self, remote_id):
+        self.retrieves += 1
+        if self.retrieves == 1:
+            return types.SimpleNamespace(status='in_progress', output_file_id=None, error_file_id=None)
+        has_output = self.final_status == 'completed'
+        return types.SimpleNamespace(status=self.final_status, output_file_id='file-out' if has_output else None,
+                                     error_file_id=None)
+
+    def _download(self, file_id):
+        lines = [json.loads(line) for line in self.uploads[-1][1].splitlines()]
+        output = ''.join(_output_line(line['custom_id'], line['body'], self.content) for line in lines)
+        return types.SimpleNamespace(read=lambda: output.encode())
+
+
+@pytest.fixture
+def openai_processor(processor):
+    processor.backend = OpenAIBatchBackend('test-key')
+    processor.backend._client = StubOpenAI()
+    return processor
+
+
+def test_claims_round_trip_through_the_openai_batch_api(openai_processor, make_idea):
+    idea = make_idea(title='Sparse attention', abstract='We study sparse attention.')
+    stub = openai_processor.backend._client
+
+    stats = _stats('claim_extraction')
+    openai_processor._start('claim_extraction', 10, stats)
+    assert len(openai_processor._advance('claim_extraction', stats)) == 1  # submitted, still running
+    assert openai_processor._advance('claim_extraction', stats) == []
+
+    purpose, uploaded = stub.uploads[0]
+    assert purpose == 'batch' and json.loads(uploaded)['url'] == BATCH_ENDPOINT
+    assert stub.created == [{'input_file_id': 'file-in-1', 'endpoint': BATCH_ENDPOINT, 'completion_window': '24h'}]
+    assert db.session.get(Idea, idea.id).extracted_claim == 'Sparse attention halves latency'
+    assert db.session.get(LLMBatch, stats['batch_ids'][0]).status == 'applied'
+
+
+@pytest.mark.parametrize('final_status', ['failed', 'expired'])
+def test_openai_batches_without_output_fail(openai_processor, make_idea, final_status):
+    make_idea()
+    openai_processor.backend._client = StubOpenAI(final_status)
+
+    stats = _stats('claim_extraction')
+    openai_processor._start('claim_extraction', 10, stats)
+    for _ in range(2):
+        openai_processor._advance('claim_extraction', stats)
+
+    assert db.session.get(LLMBatch, stats['batch_ids'][0]).status == 'failed'
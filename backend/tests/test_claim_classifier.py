@@ -0,0 +1,60 @@
+import types
+import pytest
+from app.services import claim_classifier
+from app.services.claim_classifier import ClaimClassifier
+from app.services.idea_extractor import IdeaExtractor
+
+RESULT = 'Our experiments show that sparse attention improves accuracy by 12% over the baseline.'
+STRONG = f'Large language models are recently popular. We propose sparse attention for long documents. {RESULT}'
+MODERATE = 'We show that sparse attention improves long document accuracy.'  # scores ~0.67
+WEAK = 'We study attention in transformers. It may be useful for some tasks.'
+
+
+@pytest.fixture(autouse=True)
+def regex_sentences(monkeypatch):
+    # Same segmentation whether or not spaCy is installed
+    monkeypatch.setattr(claim_classifier, 'get_nlp', lambda model_name: None)
+
+
+def test_best_claims_picks_the_result_sentence_of_each_abstract():
+    strong, weak, empty = ClaimClassifier({}).best_claims([STRONG, WEAK, ''])
+
+    assert strong.sentence == RESULT and strong.score > 0.9
+    assert weak.score < 0.2
+    assert empty is None
+
+
+@pytest.mark.parametrize('accept_score, accepted', [(0.75, [True, False, False]), (0.6, [True, True, False])])
+def test_only_claims_scoring_at_the_accept_threshold_skip_the_llm(accept_score, accepted):
+    extractor = IdeaExtractor({'CLAIM_TIER_ACCEPT_SCORE': accept_score})
+
+    claims = extractor.local_claims([STRONG, MODERATE, WEAK])
+
+    assert [claim is not None for claim in claims] == accepted
+    assert claims[0] == (RESULT, 0.98)
+
+
+def test_disabled_tier_sends_everything_to_the_llm():
+    assert IdeaExtractor({'CLAIM_TIER_ENABLED': False}).local_claims([STRONG]) == [None]
+
+
+def test_classifier_failure_falls_back_per_abstract(app, monkeypatch):
+    original = ClaimClassifier.sentences
+
+    def sentences(self, texts):
+        if any(text.startswith('BROKEN') for text in texts):
+            raise ValueError('segmenter failed')
+        return original(self, texts)
+
+    monkeypatch.setattr(ClaimClassifier, 'sentences', sentences)
+    monkeypatch.setattr(IdeaExtractor, 'embed_texts', lambda self, texts, batch_size=32: [[1.0, 0.0]] * len(texts))
+    broken = 'BROKEN. Sparse attention improves accuracy.'
+
+    assert IdeaExtractor(app.config).local_claims([STRONG, broken]) == [(RESULT, 0.98), None]
+
+    # The abstract the classifier failed on goes to the LLM tier; the rest of the batch is unaffected
+    ideas = [types.SimpleNamespace(title='Strong', abstract=STRONG), types.SimpleNamespace(title='Broken', abstract=broken)]
+    results = IdeaExtractor(app.config).extract_batch(ideas)
+    assert [result['tier'] for result in results] == ['local', 'llm']
+    assert results[0]['claim'] == RESULT and results[1]['claim']
+    assert IdeaExtractor(app.config)._extract_claim_heuristic('Broken', broken) == ('Sparse attention improves accuracy.', 0.4)
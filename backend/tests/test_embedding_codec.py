@@ -0,0 +1,54 @@
+import json
+import numpy as np
+import pytest
+from app.services.embedding_codec import (
+    HEADER_SIZE, decode_embedding, encode_embedding, legacy_json_to_blob, stack_embedding_rows
+)
+
+
+@pytest.mark.parametrize('dtype, tolerance', [('float32', 0), ('float16', 1e-3), ('int8', 1e-2)])
+def test_round_trip(dtype, tolerance):
+    vector = np.linspace(-1, 1, 384, dtype=np.float32)
+    blob = encode_embedding(vector, dtype=dtype)
+    decoded = decode_embedding(blob)
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, vector, atol=tolerance)
+
+
+def test_float32_decode_is_a_view():
+    blob = encode_embedding([1.0, 2.0, 3.0], dtype='float32')
+    assert len(blob) == HEADER_SIZE + 3 * 4
+    assert not decode_embedding(blob).flags.owndata
+
+
+def test_stack_rows_skips_mismatched_dimensions():
+    rows = [
+        (1, encode_embedding([1.0, 0.0, 0.0])),
+        (2, encode_embedding([1.0, 0.0])),
+        (3, encode_embedding([0.0, 1.0, 0.0])),
+    ]
+    ids, matrix = stack_embedding_rows(rows)
+    assert ids == [1, 3]
+    assert matrix.shape == (2, 3)
+
+    ids, matrix = stack_embedding_rows(rows, dim=2)
+    assert ids == [2]
+    assert matrix.shape == (1, 2)
+
+
+def test_stack_rows_decodes_legacy_json():
+    rows = [
+        (1, encode_embedding([1.0, 0.0]), None),
+        (2, None, json.dumps([0.0, 1.0])),
+        (3, None, None),
+    ]
+    ids, matrix = stack_embedding_rows(rows)
+    assert ids == [1, 2]
+    assert np.allclose(matrix[1], [0.0, 1.0])
+    assert legacy_json_to_blob('') is None
+
+
+def test_stack_rows_empty():
+    ids, matrix = stack_embedding_rows([], dim=4)
+    assert ids == []
+    assert matrix.shape == (0, 4)
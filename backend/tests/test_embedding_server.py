@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pytest
+from app.services.embedding_server import EmbeddingClient, EmbeddingServer
+
+MODEL = 'all-MiniLM-L6-v2'
+
+
+def encode(texts):
+    return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+def _start_batcher(server):
+    threading.Thread(target=server._batch_loop, daemon=True).start()
+
+
+def test_requests_within_the_window_share_one_batch():
+    batches = []
+    server = EmbeddingServer('unused.sock', MODEL, lambda texts: batches.append(list(texts)) or encode(texts),
+                             max_batch=64, max_wait_ms=100)
+    first = server.submit(['a', 'bb'])
+    second = server.submit(['ccc'])
+    _start_batcher(server)
+
+    # Each request gets its own rows of the shared batch, in order
+    assert first.result(timeout=2).tolist() == [[1, 0], [2, 1]]
+    assert second.result(timeout=2).tolist() == [[3, 2]]
+    assert batches == [['a', 'bb', 'ccc']]
+    assert server.stats == {'requests': 2, 'texts': 3, 'batches': 1, 'errors': 0}
+
+
+def test_batches_never_exceed_max_batch():
+    batches = []
+    server = EmbeddingServer('unused.sock', MODEL, lambda texts: batches.append(len(texts)) or encode(texts),
+                             max_batch=3, max_wait_ms=100)
+    futures = [server.submit(['x', 'y']) for _ in range(3)]
+    _start_batcher(server)
+
+    assert [future.result(timeout=2).shape for future in futures] == [(2, 2)] * 3
+    assert batches == [2, 2, 2]
+
+
+def test_encoder_failure_only_fails_the_request_that_caused_it():
+    def failing(texts):
+        if 'bad' in texts:
+            raise RuntimeError('cannot encode')
+        return encode(texts)
+
+    server = EmbeddingServer('unused.sock', MODEL, failing, max_wait_ms=50)
+    first, bad, last = server.submit(['a']), server.submit(['bad']), server.submit(['ccc'])
+    _start_batcher(server)
+
+    assert first.result(timeout=2).tolist() == [[1, 0]]
+    assert last.result(timeout=2).tolist() == [[3, 0]]
+    with pytest.raises(RuntimeError, match='cannot encode'):
+        bad.result(timeout=2)
+    assert server.stats['errors'] == 1
+
+
+@pytest.fixture
+def served():
+    # Unix socket paths are limited to ~100 bytes, so not under pytest's tmp_path
+    socket_path = os.path.join(tempfile.mkdtemp(prefix='emb-'), 'e.sock')
+    server = EmbeddingServer(socket_path, MODEL, encode, max_wait_ms=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield server
+    server.shutdown()
+    thread.join(timeout=2)
+
+
+def test_client_round_trip_over_the_socket(served, monkeypatch):
+    monkeypatch.setattr('app.services.embedding_server.CLIENT_CHUNK_SIZE', 2)
+    client = EmbeddingClient(served.socket_path)
+
+    embeddings = client.embed(['a', 'bb', 'ccc'], MODEL)
+
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == [1, 2, 3]
+
+
+def test_client_falls_back_when_the_server_uses_another_model(served):
+    client = EmbeddingClient(served.socket_path, retry_seconds=60)
+
+    assert client.embed(['a'], 'other-model') is None
+    # Not retried until retry_seconds have passed
+    assert client.embed(['a'], MODEL) is None
+
+
+def test_malformed_texts_are_rejected_before_batching(served):
+    batches = []
+    served.encode = lambda texts: batches.append(list(texts)) or encode(texts)
+
+    assert EmbeddingClient(served.socket_path).embed(['a', None], MODEL) is None
+    assert EmbeddingClient(served.socket_path).embed(['a'], MODEL).tolist() == [[1, 0]]
+    assert batches == [['a']]
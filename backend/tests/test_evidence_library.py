@@ -0,0 +1,80 @@
+import json
+import numpy as np
+import pytest
+from app import db
+from app.models import Investigation
+from app.services import embedding_index
+from app.services.embedding_codec import encode_embedding
+from app.services.evidence_library import EvidenceLibrary
+from app.services.idea_extractor import IdeaExtractor
+
+CLAIM = 'H1: sparse attention improves accuracy'
+STEPS = [{'step': 1, 'result': 'Found 3 papers', 'llm': {'calls': 1}}, {'step': 2, 'result': 'Guessed', 'fallback': True}]
+EVIDENCE = [{'type': 'literature_search', 'status': 'ok'}, {'type': 'reproducibility_analysis', 'status': 'ok'}]
+
+
+@pytest.fixture
+def library(app, monkeypatch):
+    vectors = {}
+    monkeypatch.setattr(IdeaExtractor, 'embed_texts',
+                        lambda self, texts, batch_size=32: np.array([vectors[t] for t in texts], dtype=np.float32))
+    library = EvidenceLibrary(app.config)
+    library.vectors = vectors
+    return library
+
+
+def _store(make_idea, vector, status='completed'):
+    investigation = Investigation(
+        idea_id=make_idea().id,
+        formalized_claim='c',
+        status=status,
+        reasoning_steps=json.dumps(STEPS),
+        evidence=json.dumps(EVIDENCE),
+        claim_embedding_blob=encode_embedding(vector)
+    )
+    db.session.add(investigation)
+    db.session.commit()
+    return investigation
+
+
+def test_lookup_reuses_steps_of_a_similar_completed_investigation(library, make_idea):
+    _store(make_idea, [1.0, 0.0], status='investigating')
+    completed = _store(make_idea, [0.8, 0.6])
+    library.vectors[CLAIM] = [0.8, 0.6]
+
+    match = library.lookup(CLAIM)
+
+    assert match.investigation is completed
+    assert match.similarity == pytest.approx(1.0)
+    # The fallback step is re-run; the reused one keeps pointing at its source
+    assert list(match.steps) == ['literature_search']
+    assert match.steps['literature_search'][0]['reused_from'] == completed.id
+    assert match.steps['literature_search'][0]['llm'] is None
+
+
+def test_lookup_below_threshold_or_other_model_reuses_nothing(library, make_idea):
+    _store(make_idea, [1.0, 0.0])
+    library.vectors[CLAIM] = [0.0, 1.0]
+    assert library.lookup(CLAIM).investigation is None
+
+    library.vectors[CLAIM] = [1.0, 0.0, 0.0]
+    match = library.lookup(CLAIM)
+    assert match.investigation is None and match.similarity is None
+    assert match.embedding is not None
+
+
+def test_claim_matrix_is_cached_between_lookups(library, make_idea, monkeypatch):
+    _store(make_idea, [1.0, 0.0])
+    library.vectors[CLAIM] = [0.0, 1.0]
+    library.lookup(CLAIM)
+
+    loads = []
+    original = embedding_index.EmbeddingIndex._rows
+    monkeypatch.setattr(embedding_index.EmbeddingIndex, '_rows',
+                        lambda self, after_id=None: loads.append(after_id) or original(self, after_id))
+    library.lookup(CLAIM)
+    new = _store(make_idea, [0.0, 1.0])
+    match = library.lookup(CLAIM)
+
+    assert loads == [new.id - 1]
+    assert match.investigation is new
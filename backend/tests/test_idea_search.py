@@ -0,0 +1,111 @@
+import json
+import pytest
+from app.services import idea_search
+from app.services.idea_extractor import IdeaExtractor
+
+
+def test_semantic_search_skips_other_dimensions_and_reads_legacy_rows(client, make_idea):
+    match = make_idea(title='Match', embedding=[1.0, 0.0, 0.0])
+    legacy = make_idea(title='Legacy', _embedding_json=json.dumps([0.6, 0.8, 0.0]))
+    make_idea(title='Old model', embedding=[1.0, 0.0])
+
+    response = client.post('/api/ideas/search/semantic', json={'embedding': [1.0, 0.0, 0.0]})
+
+    assert response.status_code == 200
+    assert [idea['id'] for idea in response.get_json()['ideas']] == [match.id, legacy.id]
+
+
+def test_semantic_search_rejects_wrong_dimension_query(client, make_idea):
+    make_idea(embedding=[1.0, 0.0, 0.0])
+
+    response = client.post('/api/ideas/search/semantic', json={'embedding': [1.0, 0.0]})
+
+    assert response.status_code == 400
+
+
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    idea_search._cache._entries.clear()
+
+
+@pytest.fixture
+def no_embedding_model(monkeypatch):
+    def unavailable(self, texts, batch_size=32):
+        raise OSError('model not downloaded')
+    monkeypatch.setattr(IdeaExtractor, 'embed_texts', unavailable)
+
+
+def test_hybrid_search_fuses_lexical_and_vector_ranks(client, make_idea):
+    both = make_idea(title='Sparse attention', embedding=[1.0, 0.0])
+    vector_only = make_idea(title='Mixture of experts', abstract='Routing', embedding=[0.9, 0.1])
+    make_idea(title='Unrelated', abstract='Nothing', embedding=[0.0, 1.0])
+
+    response = client.post('/api/ideas/search', json={'q': 'sparse', 'embedding': [1.0, 0.0]})
+
+    assert response.status_code == 200
+    ideas = response.get_json()['ideas']
+    assert ideas[0]['id'] == both.id
+    assert ideas[0]['lexical_rank'] == 1 and ideas[0]['vector_rank'] == 1
+    assert next(i for i in ideas if i['id'] == vector_only.id)['lexical_rank'] is None
+
+
+def test_hybrid_search_wrong_dimension_embedding_is_a_400(client, make_idea):
+    make_idea(embedding=[1.0, 0.0, 0.0])
+
+    response = client.post('/api/ideas/search', json={'q': 'sparse', 'embedding': [1.0, 0.0]})
+
+    assert response.status_code == 400
+    assert '3 dimensions' in response.get_json()['error']
+
+
+def test_hybrid_search_degrades_to_lexical_without_embedding_model(client, make_idea, no_embedding_model):
+    idea = make_idea(embedding=[1.0, 0.0])
+
+    response = client.get('/api/ideas/search?q=sparse')
+
+    assert response.status_code == 200
+    assert [(i['id'], i['vector_rank']) for i in response.get_json()['ideas']] == [(idea.id, None)]
+
+
+@pytest.mark.parametrize('query, expected', [('100%', '100% recall'), ('a_b', 'a_b testing'), ('c\\d', 'c\\d paths')])
+def test_lexical_search_matches_wildcards_literally(client, make_idea, no_embedding_model, query, expected):
+    for title in ('100% recall', '1000 recall', 'a_b testing', 'axb testing', 'c\\d paths', 'cd paths'):
+        make_idea(title=title, abstract='-')
+
+    response = client.get('/api/ideas/search', query_string={'q': query})
+
+    assert [i['title'] for i in response.get_json()['ideas']] == [expected]
+
+
+@pytest.mark.parametrize('embedding', [['a', 'b', 'c'], [[1.0, 0.0], [1.0]], [1.0, None, 0.0], {'x': 1}])
+def test_semantic_search_rejects_malformed_embeddings(client, make_idea, embedding):
+    make_idea(embedding=[1.0, 0.0, 0.0])
+
+    response = client.post('/api/ideas/search/semantic', json={'embedding': embedding})
+
+    assert response.status_code == 400
+
+
+def test_semantic_search_reads_the_shared_index(client, make_idea, monkeypatch):
+    from app.services.embedding_index import EmbeddingIndex
+    first = make_idea(title='First', embedding=[1.0, 0.0])
+    client.post('/api/ideas/search/semantic', json={'embedding': [1.0, 0.0]})
+
+    loads = []
+    original = EmbeddingIndex._rows
+    monkeypatch.setattr(EmbeddingIndex, '_rows', lambda self, after_id=None: loads.append(after_id) or original(self, after_id))
+    client.post('/api/ideas/search/semantic', json={'embedding': [1.0, 0.0]})
+    second = make_idea(title='Second', embedding=[0.0, 1.0])
+    response = client.post('/api/ideas/search/semantic', json={'embedding': [0.0, 1.0]})
+
+    assert loads == [first.id]
+    assert [idea['id'] for idea in response.get_json()['ideas']] == [second.id, first.id]
+
+
+def test_filtered_vector_search_only_ranks_matching_ideas(client, make_idea):
+    make_idea(title='Unrelated', embedding=[1.0, 0.0], confidence_score=0.1)
+    kept = make_idea(title='Other', embedding=[0.0, 1.0], confidence_score=0.9)
+
+    response = client.post('/api/ideas/search', json={'query': 'zzz', 'embedding': [1.0, 0.0], 'min_confidence': 0.5})
+
+    assert [idea['id'] for idea in response.get_json()['ideas']] == [kept.id]
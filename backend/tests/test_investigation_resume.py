@@ -0,0 +1,54 @@
+import json
+import pytest
+from app import db
+from app.models import Job
+from app.services.investigation_pipeline import DEFAULT_PIPELINE, InvestigationPipeline, get_investigation_pipeline
+
+
+def _step(step_id, prompt, **fields):
+    return {'id': step_id, 'name': step_id, 'description': '', 'prompt': prompt, **fields}
+
+
+def test_resume_attaches_to_the_original_job_until_it_ends(client, make_idea, job_executor):
+    idea = make_idea()
+    started = client.post(f'/api/ideas/{idea.id}/investigate').get_json()
+    investigation_id = started['investigation_id']
+
+    attached = client.post(f'/api/investigations/{investigation_id}/resume').get_json()
+    assert attached['deduplicated'] is True and attached['job_id'] == started['job_id']
+
+    db.session.get(Job, started['job_id']).status = 'failed'
+    db.session.commit()
+    resumed = client.post(f'/api/investigations/{investigation_id}/resume').get_json()
+    again = client.post(f'/api/investigations/{investigation_id}/resume').get_json()
+
+    assert resumed['deduplicated'] is False
+    assert db.session.get(Job, resumed['job_id']).investigation_id == investigation_id
+    assert again['deduplicated'] is True and again['job_id'] == resumed['job_id']
+    assert job_executor.submitted == [started['job_id'], resumed['job_id']]
+
+
+def test_default_pipeline_templates_are_valid():
+    assert len(InvestigationPipeline.from_definition(DEFAULT_PIPELINE).steps) == 5
+
+
+@pytest.mark.parametrize('steps, message', [
+    ([_step('a', 'Look up {formalized_claim} in {b}')], 'uses {b}'),
+    ([_step('a', 'Look up {formalized_claim')], 'malformed prompt template'),
+    ([_step('a', 'x'), _step('b', 'Given {a}: {formalized_claim}')], 'uses {a}'),
+    ([_step('a', 'x', retries=3)], 'Invalid investigation pipeline step a'),
+])
+def test_invalid_pipeline_templates_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        InvestigationPipeline.from_definition(steps)
+
+
+def test_pipeline_file_is_validated_on_load(tmp_path):
+    path = tmp_path / 'pipeline.json'
+    path.write_text(json.dumps([_step('a', 'x'), _step('b', 'Given {a}', depends_on=['a'])]))
+    assert [step.id for step in get_investigation_pipeline({'INVESTIGATION_PIPELINE': str(path)}).steps] == ['a', 'b']
+
+    path = tmp_path / 'broken.json'
+    path.write_text(json.dumps([_step('a', 'Given {results}')]))
+    with pytest.raises(ValueError, match='uses {results}'):
+        get_investigation_pipeline({'INVESTIGATION_PIPELINE': str(path)})
@@ -0,0 +1,39 @@
+import json
+import threading
+from app import db
+from app.models import Investigation, Job
+from app.services.investigation_service import get_investigation_service
+from app.tasks.jobs import execute_job
+
+
+def test_step_callbacks_run_off_the_event_loop_one_at_a_time(app):
+    service = get_investigation_service()
+    loop_thread = threading.get_ident()
+    active, calls = [], []
+
+    def step_callback(reasoning_step, evidence_item):
+        active.append(reasoning_step['step'])
+        calls.append((threading.get_ident(), len(active)))
+        active.remove(reasoning_step['step'])
+
+    service.investigate_claim('H1: sparse attention improves accuracy', ['accuracy'], step_callback=step_callback)
+
+    assert len(calls) == len(service.pipeline.steps)
+    assert all(thread != loop_thread and overlapping == 1 for thread, overlapping in calls)
+
+
+def test_investigation_job_persists_steps_from_the_callback_threads(app, make_idea, job_executor):
+    investigation = Investigation(idea_id=make_idea().id, formalized_claim='', status='investigating')
+    db.session.add(investigation)
+    db.session.commit()
+    job = Job(job_type='investigation', investigation_id=investigation.id)
+    job.params = {'investigation_id': investigation.id}
+    db.session.add(job)
+    db.session.commit()
+
+    execute_job(job.id)
+
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == 'completed'
+    steps = json.loads(db.session.get(Investigation, investigation.id).reasoning_steps)
+    assert len(steps) == len(get_investigation_service().pipeline.steps)
@@ -0,0 +1,80 @@
+import json
+import pytest
+from app import db
+from app.models import Investigation
+
+
+def _steps(numbers):
+    reasoning = [{'step': n, 'action': f'step_{n}', 'result': f'result {n}'} for n in numbers]
+    evidence = [{'type': f'step_{n}', 'status': 'ok'} for n in numbers]
+    return json.dumps(reasoning), json.dumps(evidence)
+
+
+@pytest.fixture
+def make_investigation(make_idea):
+    idea = make_idea()
+
+    def make(status, numbers):
+        reasoning_steps, evidence = _steps(numbers)
+        investigation = Investigation(
+            idea_id=idea.id, formalized_claim='H1: claim', status=status,
+            reasoning_steps=reasoning_steps, evidence=evidence
+        )
+        db.session.add(investigation)
+        db.session.commit()
+        return investigation
+
+    return make
+
+
+def _events(response):
+    """(event, id, data) for each SSE frame"""
+    events = []
+    for frame in response.get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return events
+
+
+def _stream(client, investigation, last_event_id=None):
+    headers = {'Last-Event-ID': last_event_id} if last_event_id is not None else {}
+    return _events(client.get(f'/api/investigations/{investigation.id}/stream', headers=headers))
+
+
+def test_stream_sends_every_step_then_the_result(client, make_investigation):
+    investigation = make_investigation('completed', [1, 2, 3])
+
+    events = _stream(client, investigation)
+
+    assert [(event, event_id) for event, event_id, _ in events] == [
+        ('formalized', None), ('step', '1'), ('step', '1,2'), ('step', '1,2,3'), ('completed', None)
+    ]
+
+
+def test_reconnect_after_completion_sends_only_missing_steps(client, make_investigation):
+    investigation = make_investigation('completed', [1, 2, 3, 4, 5])
+
+    events = _stream(client, investigation, last_event_id='2,1,3')
+
+    assert [(event, event_id) for event, event_id, _ in events] == [
+        ('step', '2,1,3,4'), ('step', '2,1,3,4,5'), ('completed', None)
+    ]
+
+
+def test_reconnect_while_running_resumes_out_of_order_steps(app, client, make_investigation):
+    app.config['SSE_MAX_STREAM_SECONDS'] = 0
+    investigation = make_investigation('investigating', [2, 1, 4])
+
+    events = _stream(client, investigation, last_event_id='2')
+
+    assert [data['reasoning_step']['step'] for event, _, data in events if event == 'step'] == [1, 4]
+    assert events[-1][0] == 'timeout'
+
+
+def test_malformed_last_event_id_replays_everything(client, make_investigation):
+    investigation = make_investigation('completed', [1, 2])
+
+    events = _stream(client, investigation, last_event_id='abc')
+
+    assert [event for event, _, _ in events] == ['formalized', 'step', 'step', 'completed']
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import types
+import pytest
+from app.services.llm_cache import NullLLMCache, SQLiteLLMCache
+from app.services.llm_client import FakeLLMClient, LLMError, get_llm_client, run_async
+from app.services.llm_deadlines import LatencyBudget, LLMDeadlineExceeded
+from app.services.llm_metrics import LLMMetrics
+from app.services.llm_rate_limiter import LLMRateLimiter
+
+REQUEST = {'model': 'gpt-4', 'messages': [{'role': 'user', 'content': 'Is the sky blue?'}]}
+
+
+def make_limiter(**kwargs):
+    settings = {'rpm': 10000, 'tpm': 10 ** 8, 'max_concurrency': 8, 'max_retries': 2, 'retry_base_seconds': 0.01}
+    return LLMRateLimiter(**{**settings, **kwargs})
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    return SQLiteLLMCache(str(tmp_path / 'llm_cache.db'), ttl_seconds=3600, max_entries=100)
+
+
+def test_acomplete_reads_and_writes_the_cache_off_the_event_loop(sqlite_cache):
+    client = FakeLLMClient(sqlite_cache, make_limiter(), LLMMetrics())
+    threads = []
+    for name in ('_get', '_set'):
+        original = getattr(sqlite_cache, name)
+        def recording(*args, _original=original):
+            threads.append(threading.current_thread())
+            return _original(*args)
+        setattr(sqlite_cache, name, recording)
+
+    async def run():
+        first = await client.acomplete('claim_extraction', **REQUEST)
+        second = await client.acomplete('claim_extraction', **REQUEST)
+        return threading.current_thread(), first, second
+
+    loop_thread, first, second = asyncio.run(run())
+
+    assert first == second
+    assert len(threads) == 3  # miss, write, hit
+    assert loop_thread not in threads
+    assert sqlite_cache.stats()['hits'] == 1
+
+
+def test_run_async_closes_the_loops_openai_client():
+    config = {'LLM_BACKEND': 'openai', 'OPENAI_API_KEY': 'test-key', 'LLM_CACHE_BACKEND': 'none'}
+    client = get_llm_client(config)
+
+    async def use_client():
+        return client._async_client()
+
+    async_client = run_async(use_client())
+
+    assert async_client.is_closed()
+    assert len(client._async_clients) == 0
+
+
+def test_openai_stream_reads_usage_from_the_final_chunk():
+    client = get_llm_client({'LLM_BACKEND': 'openai', 'OPENAI_API_KEY': 'test-key', 'LLM_CACHE_BACKEND': 'none'})
+    calls = []
+
+    def chunk(content=None, usage=None):
+        choices = [types.SimpleNamespace(delta=types.SimpleNamespace(content=content))] if content else []
+        return types.SimpleNamespace(choices=choices, usage=usage)
+
+    class Stream(list):
+        closed = False
+
+        def close(self):
+            Stream.closed = True
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return Stream([chunk('Yes, '), chunk('mostly.'), chunk(usage=types.SimpleNamespace(prompt_tokens=12, completion_tokens=3))])
+
+    client._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    usage = {}
+
+    assert ''.join(client._create_stream('claim_extraction', REQUEST, usage)) == 'Yes, mostly.'
+    assert usage == {'prompt_tokens': 12, 'completion_tokens': 3}
+    assert calls[0]['stream'] and calls[0]['stream_options'] == {'include_usage': True}
+    assert Stream.closed
+
+
+class ScriptedClient(FakeLLMClient):
+    """Fake client whose 'slow' model fails with a retryable error after a delay"""
+
+    def __init__(self, limiter, slow_seconds=0.2):
+        super().__init__(NullLLMCache(3600, 100), limiter, LLMMetrics())
+        self.slow_seconds = slow_seconds
+        self.created = []
+
+    def _create(self, task, request):
+        self.created.append(request['model'])
+        if request['model'] == 'slow':
+            time.sleep(self.slow_seconds)
+            raise LLMError('Upstream overloaded', status_code=503)
+        return super()._create(task, request)
+
+
+def _wait_for(condition, timeout=2.0):
+    stop = time.monotonic() + timeout
+    while not condition() and time.monotonic() < stop:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_losing_hedge_is_not_retried_and_frees_its_slot():
+    limiter = make_limiter()
+    client = ScriptedClient(limiter)
+    client.budgets = {'claim_extraction': LatencyBudget(5, hedge_after=0.02, hedge_model='fast')}
+
+    content = client.complete('claim_extraction', **{**REQUEST, 'model': 'slow'})
+
+    assert content
+    assert _wait_for(lambda: limiter.for_model('slow').stats()['in_flight'] == 0)
+    time.sleep(0.1)  # past the first backoff delay
+    assert client.created == ['slow', 'fast']
+    assert limiter.for_model('slow').stats()['admitted'] == 1
+
+
+def test_request_abandoned_at_the_deadline_never_takes_a_slot():
+    limiter = make_limiter(max_concurrency=1)
+    client = ScriptedClient(limiter)
+    client.budgets = {'claim_extraction': LatencyBudget(0.05)}
+    model_limiter = limiter.for_model('fast')
+    model_limiter.acquire('default', 1)  # the only slot is busy
+
+    with pytest.raises(LLMDeadlineExceeded):
+        client.complete('claim_extraction', **{**REQUEST, 'model': 'fast'})
+    model_limiter.release(0.01)
+
+    assert _wait_for(lambda: model_limiter.stats()['waiting'] == 0)
+    assert _wait_for(lambda: model_limiter.stats()['in_flight'] == 0)
+    assert client.created == []
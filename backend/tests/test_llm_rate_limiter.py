@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from app.services.llm_client import LLMError
+from app.services.llm_rate_limiter import ModelLimiter, llm_priority, current_priority
+
+
+def make_limiter(**kwargs):
+    settings = {'rpm': 10000, 'tpm': 10 ** 8, 'max_concurrency': 8}
+    return ModelLimiter('gpt-4', **{**settings, **kwargs})
+
+
+def test_aimd_backs_off_on_rate_limits_and_latency_spikes():
+    limiter = make_limiter()
+    limiter.acquire('default', 10)
+    limiter.release(0.1, LLMError('throttled', status_code=429))
+    assert limiter.limit == 4
+
+    limiter.acquire('default', 10)
+    limiter.release(0.1)
+    assert limiter.limit == 4.25
+
+    limiter.acquire('default', 10)
+    limiter.release(1.0)  # more than 3x the 0.1s average
+    assert limiter.limit == 4.25 * 0.75
+    assert limiter.stats()['rate_limited'] == 1 and limiter.stats()['latency_spikes'] == 1
+
+
+def test_cancelled_calls_free_their_slot_without_counting_as_failures():
+    limiter = make_limiter()
+    limiter.acquire('default', 10)
+    limiter.cancel()
+
+    stats = limiter.stats()
+    assert stats['in_flight'] == 0
+    assert stats['failures'] == 0
+    assert stats['concurrency_limit'] == 8
+
+
+def test_higher_priority_waiters_are_admitted_first():
+    limiter = make_limiter(max_concurrency=1)
+    limiter.acquire('default', 10)
+    admitted = []
+
+    def call(priority):
+        limiter.acquire(priority, 10)
+        admitted.append(priority)
+        limiter.release(0.01)
+
+    threads = [threading.Thread(target=call, args=('batch',))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=call, args=('interactive',)))
+    threads[1].start()
+    time.sleep(0.05)
+    limiter.release(0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert admitted == ['interactive', 'batch']
+
+
+class FakeRedisWindow:
+    """Records whether the limiter's lock was free during each reservation"""
+
+    def __init__(self, limiter, waits):
+        self.limiter = limiter
+        self.waits = list(waits)
+        self.lock_was_free = []
+        self.threads = []
+
+    def reserve(self, tokens):
+        self.threads.append(threading.current_thread())
+        probe = []
+        def try_lock():
+            if self.limiter._cond.acquire(timeout=0.5):
+                probe.append(True)
+                self.limiter._cond.release()
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        self.lock_was_free.append(bool(probe))
+        return self.waits.pop(0) if self.waits else 0.0
+
+
+def test_redis_window_is_reserved_outside_the_lock():
+    limiter = make_limiter()
+    limiter._redis_window = window = FakeRedisWindow(limiter, [0.05])
+
+    limiter.acquire('default', 10)
+
+    assert window.lock_was_free == [True, True]
+    assert limiter.stats()['in_flight'] == 1
+
+
+def test_async_acquire_reserves_redis_window_off_the_loop():
+    limiter = make_limiter()
+    limiter._redis_window = window = FakeRedisWindow(limiter, [])
+
+    asyncio.run(limiter.aacquire('default', 10))
+
+    assert window.lock_was_free == [True]
+    assert window.threads[0] is not threading.current_thread()
+    assert limiter.stats()['in_flight'] == 1
+
+
+def test_llm_priority_is_scoped():
+    with llm_priority('batch'):
+        assert current_priority() == 'batch'
+    assert current_priority() == 'default'
@@ -0,0 +1,41 @@
+import pytest
+from app import db
+from app.models import Market
+from app.services import market_autocomplete
+from app.services.market_autocomplete import MarketPrefixIndex
+
+
+@pytest.fixture
+def make_market(make_idea):
+    idea = make_idea(keywords='transformers')
+
+    def make(question_text, status='active'):
+        market = Market(idea_id=idea.id, question_text=question_text, outcomes='["Yes", "No"]', status=status)
+        db.session.add(market)
+        db.session.commit()
+        return market
+
+    return make
+
+
+def test_suggestions_match_question_and_idea_keywords(app, make_market):
+    market = make_market('Will sparse attention win?')
+    index = MarketPrefixIndex()
+    index.sync()
+
+    assert [s['id'] for s in index.search('spa att')] == [market.id]
+    assert [s['id'] for s in index.search('transf')] == [market.id]
+    assert index.search('dense') == []
+
+
+def test_status_changed_by_another_worker_is_shown(app, client, make_market, monkeypatch):
+    monkeypatch.setattr(market_autocomplete, '_index', None)
+    market = make_market('Will sparse attention win?')
+    assert client.get('/api/markets/autocomplete?q=sparse').get_json()['suggestions'][0]['status'] == 'active'
+
+    # Committed elsewhere, so this worker's index is never told about it
+    db.session.execute(db.update(Market).where(Market.id == market.id).values(status='resolved'))
+    db.session.commit()
+
+    suggestion = client.get('/api/markets/autocomplete?q=sparse').get_json()['suggestions'][0]
+    assert suggestion['id'] == market.id and suggestion['status'] == 'resolved'
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from app import db
+from app.models import Job, Market, MarketNeighbor
+from app.services import embedding_index, market_similarity
+from app.services.idea_extractor import IdeaExtractor
+from app.services.market_similarity import MarketSimilarityService, _upsert_edges
+
+
+@pytest.fixture
+def service(app, monkeypatch):
+    # Question text "x,y" embeds as the vector (x, y)
+    def embed_texts(self, texts, batch_size=32):
+        return np.array([[float(v) for v in text.split(',')] for text in texts], dtype=np.float32)
+    monkeypatch.setattr(IdeaExtractor, 'embed_texts', embed_texts)
+    app.config['SIMILAR_MARKETS_K'] = 2
+    return MarketSimilarityService(app.config)
+
+
+@pytest.fixture
+def make_market(make_idea):
+    idea = make_idea(embedding=[1.0, 0.0])
+
+    def make(question_text):
+        market = Market(idea_id=idea.id, question_text=question_text, outcomes='["Yes", "No"]')
+        db.session.add(market)
+        db.session.commit()
+        return market
+
+    return make
+
+
+def _edges():
+    return {(e.market_id, e.neighbor_id) for e in MarketNeighbor.query.all()}
+
+
+def test_add_market_matches_full_rebuild(service, make_market):
+    markets = [make_market(q) for q in ('1,0', '0,1', '1,1', '-1,0')]
+    service.rebuild_graph()
+    new = make_market('1,0.2')
+
+    service.add_market(new)
+    incremental = _edges()
+    service.rebuild_graph()
+
+    assert incremental == _edges()
+    assert {n for m, n in incremental if m == new.id} == {markets[0].id, markets[2].id}
+    assert all(sum(1 for m, _ in incremental if m == market.id) == 2 for market in markets)
+
+
+def test_index_appends_new_markets_without_reloading(service, make_market, monkeypatch):
+    make_market('1,0')
+    make_market('0,1')
+    service.rebuild_graph()
+
+    loads = []
+    original = embedding_index.EmbeddingIndex._rows
+    monkeypatch.setattr(embedding_index.EmbeddingIndex, '_rows',
+                        lambda self, after_id=None: loads.append(after_id) or original(self, after_id))
+    new = make_market('1,1')
+    service.add_market(new)
+
+    ids, matrix = market_similarity._market_index.load()
+    assert loads == [new.id - 1]
+    assert ids[-1] == new.id
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+
+def test_upsert_edges_overwrites_existing_edge(service, make_market):
+    a, b = make_market('1,0'), make_market('0,1')
+    _upsert_edges([{'market_id': a.id, 'neighbor_id': b.id, 'score': 0.1}])
+    _upsert_edges([{'market_id': a.id, 'neighbor_id': b.id, 'score': 0.7}])
+    db.session.commit()
+
+    assert [(e.market_id, e.neighbor_id, e.score) for e in MarketNeighbor.query.all()] == [(a.id, b.id, 0.7)]
+
+
+def test_create_market_queues_a_graph_job(client, make_idea, job_executor):
+    idea = make_idea()
+
+    response = client.post('/api/markets', json={'idea_id': idea.id, 'question_text': 'Q?', 'outcomes': '["Yes", "No"]'})
+
+    assert response.status_code == 201
+    job = db.session.get(Job, job_executor.submitted[0])
+    assert job.job_type == 'market_graph_add'
+    assert job.params == {'market_id': response.get_json()['id']}
@@ -0,0 +1,125 @@
+import json
+import sys
+import types
+import numpy as np
+import pytest
+from app.services.onnx_embedding import MANIFEST_NAME, OnnxEmbeddingModel, validation_report
+
+MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+
+class StubTokenizer:
+    """Token ids are word lengths, padded with 0 to the longest text of the call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        self.calls.append(list(texts))
+        ids = [[len(word) for word in text.split()][:max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        input_ids = np.array([row + [0] * (width - len(row)) for row in ids], dtype=np.int32)
+        return {'input_ids': input_ids, 'attention_mask': (input_ids > 0).astype(np.int32)}
+
+
+class StubSession:
+    """Token embedding [id, 1]; padding positions would skew the mean if they were pooled"""
+
+    def __init__(self, path, options, providers):
+        self.path = path
+        self.options = options
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name='input_ids'), types.SimpleNamespace(name='attention_mask')]
+
+    def run(self, outputs, feeds):
+        assert feeds['input_ids'].dtype == np.int64
+        ids = feeds['input_ids'].astype(np.float32)
+        return [np.stack([ids, np.full_like(ids, 1.0) + (ids == 0) * 100], axis=-1)]
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    tokenizer = StubTokenizer()
+    ort = types.SimpleNamespace(
+        SessionOptions=types.SimpleNamespace,
+        GraphOptimizationLevel=types.SimpleNamespace(ORT_ENABLE_ALL='all'),
+        ExecutionMode=types.SimpleNamespace(ORT_SEQUENTIAL='sequential'),
+        InferenceSession=StubSession
+    )
+    transformers = types.SimpleNamespace(AutoTokenizer=types.SimpleNamespace(from_pretrained=lambda path: tokenizer))
+    monkeypatch.setitem(sys.modules, 'onnxruntime', ort)
+    monkeypatch.setitem(sys.modules, 'transformers', transformers)
+    return tokenizer
+
+
+def _export(tmp_path, **fields):
+    manifest = {
+        'model': MODEL, 'onnx_file': 'model_int8.onnx', 'max_seq_length': 4, 'normalize': False, 'dimension': 2,
+        'validation': {'passed': True}, **fields
+    }
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest))
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'validation': {'passed': False, 'min_cosine': 0.93}}, 'did not pass cosine validation'),
+    ({'validation': None}, 'did not pass cosine validation'),
+    ({'model': 'other-model'}, 'is of other-model'),
+])
+def test_exports_that_fail_validation_are_refused(runtime, tmp_path, fields, message):
+    with pytest.raises(ValueError, match=message):
+        OnnxEmbeddingModel(_export(tmp_path, **fields), MODEL)
+
+
+def test_missing_export_is_refused(runtime, tmp_path):
+    with pytest.raises(ValueError, match='No ONNX embedding export'):
+        OnnxEmbeddingModel(str(tmp_path), MODEL)
+
+
+def test_unvalidated_export_loads_for_the_validation_run(runtime, tmp_path):
+    model = OnnxEmbeddingModel(_export(tmp_path, validation={'passed': False}), MODEL, threads=2, require_validation=False)
+    assert model.session.options.intra_op_num_threads == 2
+    assert model.session.options.inter_op_num_threads == 1
+
+
+def test_encode_mean_pools_masked_tokens_in_input_order(runtime, tmp_path):
+    model = OnnxEmbeddingModel(_export(tmp_path), MODEL)
+    texts = ['a bb ccc dddd eeeee', 'xy', 'abc de']
+
+    embeddings = model.encode(texts, batch_size=2)
+
+    # Truncated to max_seq_length tokens; padding is excluded from the mean
+    assert embeddings.tolist() == [[2.5, 1.0], [2.0, 1.0], [2.5, 1.0]]
+    assert embeddings.dtype == np.float32
+    # Batches are formed shortest first so each pads only to its own longest text
+    assert runtime.calls == [['xy', 'abc de'], ['a bb ccc dddd eeeee']]
+
+
+def test_encode_normalizes_when_the_model_does(runtime, tmp_path):
+    model = OnnxEmbeddingModel(_export(tmp_path, normalize=True), MODEL)
+
+    embeddings = model.encode(['abc de', 'xy'])
+
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0)
+
+
+def test_validation_report_passes_only_when_every_text_agrees():
+    expected = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+    assert validation_report(expected, expected * 3, 0.99) == {
+        'samples': 2, 'min_cosine': 1.0, 'mean_cosine': 1.0, 'threshold': 0.99, 'passed': True
+    }
+    drifted = validation_report(expected, np.array([[1.0, 0.0], [0.5, 1.0]]), 0.99)
+    assert drifted['min_cosine'] == pytest.approx(0.89443) and not drifted['passed']
+
+
+@pytest.mark.parametrize('actual', [
+    np.array([[1.0, 0.0], [np.nan, 1.0]]),
+    np.zeros((2, 3)),
+    np.zeros((1, 2)),
+])
+def test_broken_exports_fail_validation(actual):
+    expected = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    assert validation_report(expected, actual, 0.99)['passed'] is False
+    assert 'error' in validation_report(expected, actual, 0.99)
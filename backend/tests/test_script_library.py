@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from app import db
+from app.models import GeneratedScript
+from app.services import embedding_index
+from app.services.code_generator import generate_test_code, stream_test_code
+from app.services.embedding_codec import encode_embedding
+from app.services.idea_extractor import IdeaExtractor
+from app.services.llm_client import FakeLLMClient, LLMError
+from app.services.llm_metrics import LLMMetrics
+from app.services.script_library import ScriptLibrary
+
+REQUEST = {'hypothesis': 'Sparse attention helps', 'formalized_claim': 'H1: accuracy improves'}
+
+
+@pytest.fixture
+def library(app, monkeypatch):
+    vectors = {}
+    monkeypatch.setattr(IdeaExtractor, 'embed_texts',
+                        lambda self, texts, batch_size=32: np.array([vectors[t] for t in texts], dtype=np.float32))
+    library = ScriptLibrary(app.config)
+    library.vectors = vectors
+    return library
+
+
+def _store(vector):
+    script = GeneratedScript(hypothesis='h', main_py='print(1)', embedding_blob=encode_embedding(vector))
+    db.session.add(script)
+    db.session.commit()
+    return script
+
+
+def _text(request):
+    return f"{request['hypothesis']}\n{request['formalized_claim']}"
+
+
+@pytest.mark.parametrize('vector, mode', [([1.0, 0.0], 'reuse'), ([0.9, 0.3], 'adapt'), ([0.0, 1.0], 'generate')])
+def test_lookup_modes(library, vector, mode):
+    script = _store([1.0, 0.0])
+    library.vectors[_text(REQUEST)] = vector
+
+    match = library.lookup(REQUEST)
+
+    assert match.mode == mode
+    assert (match.script is script) == (mode != 'generate')
+
+
+def test_lookup_ignores_scripts_from_another_embedding_model(library):
+    _store([1.0, 0.0, 0.0])
+    library.vectors[_text(REQUEST)] = [1.0, 0.0]
+
+    assert library.lookup(REQUEST).mode == 'generate'
+
+
+def test_matrix_is_loaded_once_and_extended_with_new_scripts(library, monkeypatch):
+    _store([1.0, 0.0])
+    library.vectors[_text(REQUEST)] = [0.0, 1.0]
+    library.lookup(REQUEST)
+
+    loads = []
+    original = embedding_index.EmbeddingIndex._rows
+    monkeypatch.setattr(embedding_index.EmbeddingIndex, '_rows',
+                        lambda self, after_id=None: loads.append(after_id) or original(self, after_id))
+    library.lookup(REQUEST)
+    new = _store([0.0, 1.0])
+    match = library.lookup(REQUEST)
+
+    assert loads == [new.id - 1]
+    assert match.mode == 'reuse' and match.script is new
+
+
+@pytest.mark.parametrize('vector, task', [([0.9, 0.3], 'code_adaptation'), ([0.0, 1.0], 'code_generation')])
+def test_failed_generation_records_the_fallback_under_its_task(library, monkeypatch, vector, task):
+    _store([1.0, 0.0])
+    library.vectors[_text(REQUEST)] = vector
+    fallbacks = []
+
+    def failing(self, task, request):
+        raise LLMError('Bad request', status_code=400)
+
+    monkeypatch.setattr(FakeLLMClient, '_create', failing)
+    monkeypatch.setattr(FakeLLMClient, '_create_stream', failing)
+    monkeypatch.setattr(LLMMetrics, 'record_fallback', lambda self, task, stage=None: fallbacks.append(task))
+
+    assert 'library' not in generate_test_code(REQUEST, use_cache=False)
+    assert 'library' not in list(stream_test_code(REQUEST, use_cache=False))[-1][1]
+    assert fallbacks == [task, task]
@@ -0,0 +1,64 @@
+import logging
+import pytest
+from app import db
+from app.models import Investigation, Workspace
+from app.tasks import single_flight
+from app.tasks.single_flight import single_flight_key, single_flight_lock
+
+
+@pytest.fixture
+def investigation(make_idea):
+    investigation = Investigation(idea_id=make_idea().id, formalized_claim='H1: sparse attention helps', status='completed')
+    db.session.add(investigation)
+    db.session.commit()
+    return investigation
+
+
+def _create(client, investigation, **fields):
+    return client.post('/api/workspaces', json={'generate_ai_code': True, 'investigation_id': investigation.id, **fields})
+
+
+def test_identical_workspace_requests_share_one_job(client, investigation, job_executor):
+    first = _create(client, investigation, name='Replication').get_json()
+    second = _create(client, investigation, name='Replication').get_json()
+
+    assert second['deduplicated'] is True
+    assert second['job_id'] == first['job_id']
+    assert len(job_executor.submitted) == 1
+
+
+def test_workspace_requests_with_different_bodies_keep_their_own_workspace(client, investigation, job_executor):
+    first = _create(client, investigation, name='Replication').get_json()
+    second = _create(client, investigation, name='Ablation', files={'main.py': 'print(1)\n'}).get_json()
+
+    assert second['deduplicated'] is False
+    assert second['data']['name'] == 'Ablation'
+    assert Workspace.query.get(second['data']['id']).files == {'main.py': 'print(1)\n'}
+    assert first['data']['id'] != second['data']['id']
+
+
+def test_key_depends_on_inputs():
+    assert single_flight_key('op', 1, {'a': 1, 'b': 2}) == single_flight_key('op', 1, {'b': 2, 'a': 1})
+    assert single_flight_key('op', 1, {'a': 1}) != single_flight_key('op', 1, {'a': 2})
+
+
+def test_lost_redis_lock_is_logged(app, monkeypatch, caplog):
+    class ExpiredLock:
+        def acquire(self):
+            return True
+
+        def release(self):
+            raise RuntimeError('Cannot release a lock that is no longer owned')
+
+    class FakeRedis:
+        def lock(self, name, timeout, blocking_timeout):
+            return ExpiredLock()
+
+    monkeypatch.setattr(single_flight, '_get_redis', lambda: FakeRedis())
+    app.config['SINGLE_FLIGHT_BACKEND'] = 'redis'
+
+    with caplog.at_level(logging.WARNING, logger='app.tasks.single_flight'):
+        with single_flight_lock('investigation:1:abc'):
+            pass
+
+    assert 'investigation:1:abc' in caplog.text
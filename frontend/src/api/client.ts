@@ -9,6 +9,43 @@ export const apiClient = axios.create({
   },
 });
 
+// Poll a background job until it finishes; resolves with the job result as `data`
+export const waitForJob = async (jobId: string, intervalMs: number = 1000) => {
+  for (;;) {
+    const response = await apiClient.get(`/jobs/${jobId}`);
+    const job = response.data;
+    if (job.status === 'completed') {
+      return { ...response, data: job.result };
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Job failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
+// Endpoints that answer 202 + job_id resolve once the job has finished
+const resolveJob = (response: any) =>
+  response.status === 202 && response.data?.job_id ? waitForJob(response.data.job_id) : response;
+
+// Subscribe to a server-sent event stream; handlers are keyed by event name.
+// The stream closes itself after a terminal event; call the returned function to close it early.
+const TERMINAL_EVENTS = ['done', 'completed', 'failed', 'timeout'];
+
+export const streamEvents = (path: string, handlers: Record<string, (data: any) => void>) => {
+  const source = new EventSource(`${API_URL}/api${path}`);
+  const events = Array.from(new Set([...Object.keys(handlers), ...TERMINAL_EVENTS]));
+  events.forEach((event) =>
+    source.addEventListener(event, (e) => {
+      handlers[event]?.(JSON.parse((e as MessageEvent).data));
+      if (TERMINAL_EVENTS.includes(event)) {
+        source.close();
+      }
+    })
+  );
+  return () => source.close();
+};
+
 // API functions
 export const api = {
   // Ideas
@@ -18,8 +55,11 @@ export const api = {
   getIdea: (id: number) =>
     apiClient.get(`/ideas/${id}`),
   
-  generateClaims: (count?: number, categories?: string[]) =>
-    apiClient.post('/ideas/generate', { count, categories }),
+  searchIdeas: (params: { q: string; limit?: number; source_id?: number; min_confidence?: number; max_confidence?: number; created_after?: string; created_before?: string }) =>
+    apiClient.get('/ideas/search', { params }),
+  
+  generateClaims: (count?: number, categories?: string[], packed?: boolean) =>
+    apiClient.post('/ideas/generate', { count, categories, packed }).then(resolveJob),
   
   // Investigations
   getInvestigations: (params?: { status?: string; limit?: number; offset?: number }) =>
@@ -28,8 +68,11 @@ export const api = {
   getInvestigation: (id: number) =>
     apiClient.get(`/investigations/${id}`),
   
+  streamInvestigation: (id: number, handlers: Record<string, (data: any) => void>) =>
+    streamEvents(`/investigations/${id}/stream`, handlers),
+  
   createInvestigation: (ideaId: number) =>
-    apiClient.post(`/ideas/${ideaId}/investigate`),
+    apiClient.post(`/ideas/${ideaId}/investigate`).then(resolveJob),
   
   // Markets
   getMarkets: (params?: { status?: string; limit?: number; offset?: number }) =>
@@ -41,6 +84,12 @@ export const api = {
   createMarket: (data: any) =>
     apiClient.post('/markets', data),
   
+  autocompleteMarkets: (q: string, limit?: number) =>
+    apiClient.get('/markets/autocomplete', { params: { q, limit } }),
+  
+  getSimilarMarkets: (marketId: number, limit?: number) =>
+    apiClient.get(`/markets/${marketId}/similar`, { params: { limit } }),
+  
   generateMarket: (keyword: string) =>
     apiClient.post('/markets/generate', { keyword }),
   
@@ -74,13 +123,20 @@ export const api = {
   getMarketExperiments: (marketId: number) =>
     apiClient.get(`/markets/${marketId}/experiments`),
   
+  // Jobs
+  getJob: (jobId: string) =>
+    apiClient.get(`/jobs/${jobId}`),
+  
   // Workspaces
   createWorkspace: (data: { investigation_id?: number; agent_id?: number; name: string; description?: string; files?: any; generate_ai_code?: boolean }) =>
-    apiClient.post('/workspaces', data),
+    apiClient.post('/workspaces', data).then(resolveJob),
   
   getWorkspace: (workspaceId: number) =>
     apiClient.get(`/workspaces/${workspaceId}`),
   
+  streamWorkspaceCode: (workspaceId: number, handlers: Record<string, (data: any) => void>) =>
+    streamEvents(`/workspaces/${workspaceId}/generate/stream`, handlers),
+  
   getFiles: (workspaceId: number) =>
     apiClient.get(`/workspaces/${workspaceId}/files`),
   